@@ -0,0 +1,63 @@
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+import os
+import shutil
+import tempfile
+from lsst.ctrl.execute.allocationConfig import AllocationConfig
+from lsst.ctrl.execute.condorConfig import CondorConfig
+from lsst.ctrl.execute.condorInfoConfig import CondorInfoConfig
+from lsst.ctrl.execute.configCache import ConfigSnapshotStore, clearConfigs, loadConfig
+
+_testfiles = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "testfiles")
+
+_configs = [(CondorConfig, os.path.join(_testfiles, "config_condor_slurm.py")),
+            (CondorInfoConfig, os.path.join(_testfiles, "allocator-info1.py")),
+            (AllocationConfig, os.path.join(_testfiles, "config_allocation_slurm.py"))]
+
+
+class ConfigCacheSuite:
+    """Loading the three configurations read at the start of each command,
+    as a new process does, with and without stored snapshots.
+    """
+
+    def setup(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = ConfigSnapshotStore(self.directory)
+        for configClass, fileName in _configs:
+            loadConfig(configClass, fileName, store=self.store)
+
+    def teardown(self):
+        clearConfigs()
+        shutil.rmtree(self.directory)
+
+    def time_loadCold(self):
+        for i in range(20):
+            clearConfigs()
+            store = ConfigSnapshotStore(os.path.join(self.directory, str(i)))
+            for configClass, fileName in _configs:
+                loadConfig(configClass, fileName, store=store)
+
+    def time_loadWarm(self):
+        for i in range(20):
+            clearConfigs()
+            for configClass, fileName in _configs:
+                loadConfig(configClass, fileName, store=self.store)
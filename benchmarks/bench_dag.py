@@ -0,0 +1,80 @@
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import contextlib
+import importlib.util
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from .fixtures import makeDag, makeIdList
+
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def loadGenerateDag():
+    """Import etc/scripts/generateDag.py, which isn't part of the package.
+    """
+    path = os.path.join(_root, "etc", "scripts", "generateDag.py")
+    spec = importlib.util.spec_from_file_location("generateDag", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class GenerateDagSuite:
+    """DAG generation from a list of 1M ids, 10 ids per job (100k nodes).
+    """
+    timeout = 600
+
+    def setup(self):
+        self.idList = makeIdList(1000000)
+        self.generateDag = loadGenerateDag()
+        self.directory = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.directory)
+
+    def teardown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directory)
+
+    def time_writeDagFile(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.generateDag.writeDagFile("Workflow", "worker.sh", self.idList, "worker",
+                                          None, "bench", 10)
+
+
+class DagIdInfoSuite:
+    """dagIdInfo.py lookups in a DAG with 100k nodes.
+    """
+    params = ["A1", "A50000", "A100000"]
+    param_names = ["node"]
+    timeout = 300
+
+    def setup(self, node):
+        self.dag = makeDag(100000)
+        self.script = os.path.join(_root, "bin.src", "dagIdInfo.py")
+
+    def time_dagIdInfo(self, node):
+        subprocess.run([sys.executable, self.script, node, self.dag], stdout=subprocess.DEVNULL, check=True)
@@ -0,0 +1,45 @@
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+from lsst.ctrl.execute import envString
+
+
+class EnvStringSuite:
+    """Environment variable resolution of configuration file names.
+    """
+
+    def setup(self):
+        self.env = {"HOME": "/home/c3po", "USER": "c3po", "CTRL_PLATFORM_DIR": "/software/ctrl_platform"}
+        self.strVals = ["$HOME/.lsst/condor-info.py",
+                        "${CTRL_PLATFORM_DIR}/etc/config/execConfig.py",
+                        "${SCRATCH:-/tmp}/$USER/configs",
+                        "/no/variables/here"] * 250
+
+    def time_resolve(self):
+        for strVal in self.strVals:
+            envString.resolve(strVal, self.env)
+
+    def time_resolveMany(self):
+        envString.resolveMany(self.strVals, self.env)
+
+    def time_resolveManyMemoized(self):
+        envString.resolveMany(self.strVals, self.env, memoize=True)
@@ -0,0 +1,47 @@
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import os
+import shutil
+import tempfile
+from lsst.ctrl.execute.seqFile import SeqFile
+
+
+class SeqFileSuite:
+    """Sequence number increments, as done for each new node set.
+    """
+
+    def setup(self):
+        self.directory = tempfile.mkdtemp()
+        self.seqFile = SeqFile(os.path.join(self.directory, "node-set.seq"))
+        self.seqFile.nextSeq()
+
+    def teardown(self):
+        shutil.rmtree(self.directory)
+
+    def time_nextSeq(self):
+        for i in range(100):
+            self.seqFile.nextSeq()
+
+    def time_reserve(self):
+        first = self.seqFile.reserve(500)
+        ["node_set_%d" % n for n in range(first, first + 500)]
@@ -0,0 +1,60 @@
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import os
+import tempfile
+from lsst.ctrl.execute.templateCache import TemplateCache
+from lsst.ctrl.execute.templateWriter import TemplateWriter
+from .fixtures import makeTemplate, templatePairs
+
+
+class TemplateWriterSuite:
+    """TemplateWriter rendering, for small and large key sets and templates.
+    """
+    params = [[10, 1000], [1000, 100000]]
+    param_names = ["keys", "lines"]
+    timeout = 300
+
+    def setup(self, keys, lines):
+        self.input = makeTemplate(keys, lines)
+        self.pairs = templatePairs(keys)
+        fd, self.output = tempfile.mkstemp(suffix=".txt")
+        os.close(fd)
+        self.cache = TemplateCache()
+        self.cache.get(self.input)
+
+    def teardown(self, keys, lines):
+        os.remove(self.output)
+
+    def time_rewrite(self, keys, lines):
+        TemplateWriter().rewrite(self.input, self.output, self.pairs)
+
+    def time_rewriteCached(self, keys, lines):
+        TemplateWriter(cache=self.cache).rewrite(self.input, self.output, self.pairs)
+
+    def time_renderMany(self, keys, lines):
+        pairsList = [dict(self.pairs, KEY_0000="node_set_%d" % i) for i in range(10)]
+        for text in TemplateWriter(cache=self.cache).renderMany(self.input, pairsList):
+            pass
+
+    def time_substitute(self, keys, lines):
+        TemplateWriter().substitute(self.cache.get(self.input).text, self.pairs)
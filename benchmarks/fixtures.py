@@ -0,0 +1,111 @@
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+# Synthetic inputs for the benchmarks.  They're far too large to check in,
+# so they are generated on first use into $CTRL_EXECUTE_BENCH_DIR, or
+# tests/benchfiles (next to tests/testfiles) if that isn't set, and reused
+# by later runs.
+
+import os
+import random
+
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def benchDirectory():
+    """The directory synthetic benchmark inputs are kept in.
+    """
+    directory = os.environ.get("CTRL_EXECUTE_BENCH_DIR") or os.path.join(_root, "tests", "benchfiles")
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def templatePairs(keyCount):
+    """Substitution values for a template made by makeTemplate.
+    """
+    return {"KEY_%04d" % i: "value_%d" % i for i in range(keyCount)}
+
+
+def makeTemplate(keyCount, lineCount):
+    """Create a template with lineCount lines, each referring to three of
+    keyCount keys, mixed in with shell and condor "$" syntax which must be
+    left alone.
+
+    Returns
+    -------
+    name : `str`
+        the template file name
+    """
+    name = os.path.join(benchDirectory(), "template_%d_%d.template" % (keyCount, lineCount))
+    if not os.path.exists(name):
+        rand = random.Random(keyCount * lineCount)
+        with open(name + ".tmp", "w") as f:
+            for i in range(lineCount):
+                keys = [rand.randrange(keyCount) for _ in range(3)]
+                f.write("line %d $KEY_%04d $(LOG)/$KEY_%04d ${hostname[$num]} $KEY_%04dx\n" %
+                        (i, keys[0], keys[1], keys[2]))
+        os.replace(name + ".tmp", name)
+    return name
+
+
+def makeIdList(idCount):
+    """Create a list of idCount data ids, one per line, as read by
+    generateDag.py.
+
+    Returns
+    -------
+    name : `str`
+        the id list file name
+    """
+    name = os.path.join(benchDirectory(), "ids_%d.txt" % idCount)
+    if not os.path.exists(name):
+        with open(name + ".tmp", "w") as f:
+            for i in range(idCount):
+                f.write("visit=%d raft=%d,%d sensor=%d,%d\n" % (i // 189, i % 5, i % 3, i % 3, i % 5))
+        os.replace(name + ".tmp", name)
+    return name
+
+
+def makeDag(nodeCount):
+    """Create a DAG with nodeCount worker nodes, in the format written by
+    generateDag.py and read by dagIdInfo.py.
+
+    Returns
+    -------
+    name : `str`
+        the DAG file name
+    """
+    name = os.path.join(benchDirectory(), "dag_%d.diamond.dag" % nodeCount)
+    if not os.path.exists(name):
+        with open(name + ".tmp", "w") as f:
+            f.write("CONFIG Workflow.config\nJOB A worker/Workflow.pre\nJOB B worker/Workflow.post\n \n")
+            for i in range(1, nodeCount + 1):
+                ids = "visit=%d raft=2,2 sensor=0,1 X visit=%d raft=2,2 sensor=1,1" % (i, i)
+                f.write("JOB A%d worker/worker.sh\n" % i)
+                f.write("VARS A%d var1=\"%s\" \n" % (i, ids))
+                f.write("VARS A%d var2=\"%d\" \n" % (i, i))
+                f.write("VARS A%d visit=\"%d\" \n" % (i, i // 100))
+                f.write("VARS A%d runid=\"bench\" \n" % i)
+                f.write("VARS A%d workerid=\"%d\" \n" % (i, i))
+                f.write("PARENT A CHILD A%d \nPARENT A%d CHILD B \n\n" % (i, i))
+        os.replace(name + ".tmp", name)
+    return name
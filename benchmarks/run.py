@@ -0,0 +1,156 @@
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+# Run the benchmarks without asv and write the results as JSON, so runs on
+# different commits can be compared:
+#
+#   python -m benchmarks.run -o before.json
+#   python -m benchmarks.run -o after.json
+#   python -m benchmarks.run --compare before.json after.json
+#
+# The suites themselves follow asv conventions (time_* methods, setup,
+# teardown, params and param_names), so "asv run" works on them as well.
+
+import argparse
+import importlib
+import itertools
+import json
+import os
+import pkgutil
+import platform
+import subprocess
+import sys
+import time
+
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def findSuites(pattern=None):
+    """Find every benchmark suite class in this package.
+
+    Returns
+    -------
+    suites : `list` of `tuple`
+        (qualified name, class) for each suite
+    """
+    suites = []
+    for info in pkgutil.iter_modules([os.path.dirname(__file__)]):
+        if not info.name.startswith("bench_"):
+            continue
+        module = importlib.import_module("benchmarks." + info.name)
+        for name, obj in sorted(vars(module).items()):
+            if isinstance(obj, type) and obj.__module__ == module.__name__ and name.endswith("Suite"):
+                suites.append(("%s.%s" % (info.name, name), obj))
+    return suites
+
+
+def runSuite(qualifiedName, suiteClass, repeat, pattern):
+    """Time every time_* method of a suite, for every parameter combination.
+
+    Returns
+    -------
+    results : `dict`
+        timings in seconds, keyed by benchmark name
+    """
+    params = getattr(suiteClass, "params", [])
+    if params and not isinstance(params[0], list):
+        params = [params]
+    results = {}
+    for combination in itertools.product(*params):
+        methods = [m for m in sorted(dir(suiteClass)) if m.startswith("time_")]
+        for method in methods:
+            name = "%s.%s" % (qualifiedName, method)
+            if combination:
+                name += "(%s)" % ", ".join(repr(p) for p in combination)
+            if pattern is not None and pattern not in name:
+                continue
+            timings = []
+            for i in range(repeat):
+                suite = suiteClass()
+                if hasattr(suite, "setup"):
+                    suite.setup(*combination)
+                try:
+                    start = time.perf_counter()
+                    getattr(suite, method)(*combination)
+                    timings.append(time.perf_counter() - start)
+                finally:
+                    if hasattr(suite, "teardown"):
+                        suite.teardown(*combination)
+            timings.sort()
+            results[name] = {"min": timings[0], "median": timings[len(timings) // 2], "repeat": repeat}
+            print("%-70s %10.4f s" % (name, timings[0]), file=sys.stderr)
+    return results
+
+
+def gitCommit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=_root,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(before, after):
+    """Print the ratio of the minimum timings of two result files.
+    """
+    with open(before) as f:
+        old = json.load(f)
+    with open(after) as f:
+        new = json.load(f)
+    print("%s -> %s" % (old.get("commit"), new.get("commit")))
+    for name in sorted(new["results"]):
+        if name not in old["results"]:
+            continue
+        oldTime = old["results"][name]["min"]
+        newTime = new["results"][name]["min"]
+        print("%-70s %10.4f %10.4f %7.2fx" % (name, oldTime, newTime, oldTime / newTime))
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.run")
+    parser.add_argument("-b", "--bench", dest="pattern", default=None,
+                        help="only run benchmarks whose name contains this string")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="times to run each benchmark")
+    parser.add_argument("-o", "--output", default=None, help="file to write JSON results to")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), default=None,
+                        help="compare two result files instead of running")
+    args = parser.parse_args()
+
+    if args.compare is not None:
+        compare(*args.compare)
+        return
+
+    results = {}
+    for qualifiedName, suiteClass in findSuites():
+        results.update(runSuite(qualifiedName, suiteClass, args.repeat, args.pattern))
+    report = {"commit": gitCommit(), "python": platform.python_version(),
+              "machine": platform.node(), "time": time.time(), "results": results}
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -24,38 +24,63 @@
 
 import sys
 import os
-import lsst.utils
 from lsst.ctrl.execute.namedClassFactory import NamedClassFactory
-from lsst.ctrl.execute.allocatorParser import AllocatorParser
-from lsst.ctrl.execute.condorConfig import CondorConfig
+from lsst.ctrl.execute.allocatorParser import AllocatorParser, BulkAllocatorParser
+from lsst.ctrl.execute.bulkAllocator import BulkAllocator, readManifest
+from lsst.ctrl.execute.configCache import getPlatformDir, loadConfig
+from lsst.ctrl.execute.executeDaemon import runMain
 from lsst.ctrl.execute import envString
+from lsst.ctrl.execute.timing import profiled
+
+
+def bulkMain():
+    """Allocates the Condor glide-in node sets listed in a manifest, and
+    prints the result of each request.
+    """
+    p = BulkAllocatorParser(sys.argv[0])
+    args = p.getArgs()
+
+    with profiled(args.profile, args.profileStats):
+        requests = readManifest(args.manifest)
+        allocator = BulkAllocator(requests, maxConcurrent=args.maxConcurrent, verbose=args.verbose)
+        results = allocator.run()
+    BulkAllocator.formatResults(results)
+    if any(r["status"] != "submitted" for r in results):
+        sys.exit(1)
 
 
 def main():
     """Allocates Condor glide-in nodes a scheduler on a remote Node.
     """
 
+    if any(arg in ("-M", "--manifest") or arg.startswith("--manifest=") for arg in sys.argv[1:]):
+        bulkMain()
+        return
+
     p = AllocatorParser(sys.argv[0])
     platform = p.getPlatform()
 
-    # load the CondorConfig file
-    platformPkgDir = lsst.utils.getPackageDir("ctrl_platform_"+platform)
-    execConfigName = os.path.join(platformPkgDir, "etc", "config", "execConfig.py")
+    args = p.getArgs()
+
+    # the timings are written even if the submission fails
+    with profiled(args.profile, args.profileStats):
+        # load the CondorConfig file
+        platformPkgDir = getPlatformDir(platform)
+        execConfigName = os.path.join(platformPkgDir, "etc", "config", "execConfig.py")
 
-    resolvedName = envString.resolve(execConfigName)
-    configuration = CondorConfig()
-    configuration.load(resolvedName)
+        resolvedName = envString.resolve(execConfigName)
+        configuration = loadConfig("lsst.ctrl.execute.condorConfig", resolvedName)
 
-    # create the plugin class
-    schedulerName = configuration.platform.scheduler
-    schedulerClass = NamedClassFactory.createClass("lsst.ctrl.execute." + schedulerName + "Plugin")
+        # create the plugin class
+        schedulerName = configuration.platform.scheduler
+        schedulerClass = NamedClassFactory.createClass("lsst.ctrl.execute." + schedulerName + "Plugin")
 
-    # create the plugin
-    scheduler = schedulerClass(platform, p.getArgs(), configuration, "$HOME/.lsst/condor-info.py")
+        # create the plugin
+        scheduler = schedulerClass(platform, args, configuration, "$HOME/.lsst/condor-info.py")
 
-    # submit the request
-    scheduler.submit(platform, platformPkgDir)
+        # submit the request
+        scheduler.submit(platform, platformPkgDir)
 
 
 if __name__ == "__main__":
-    main()
+    runMain(__file__, main)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import argparse
+import sys
+from lsst.ctrl.execute.autoscaler import Autoscaler, CommandQueueQuery, CondorQueueQuery, PluginBackend
+from lsst.ctrl.execute.autoscaler import parseWallClock
+
+
+def main():
+    """Keep a pool of glide-in node sets sized to the jobs waiting for it.
+    """
+    parser = argparse.ArgumentParser(prog=sys.argv[0])
+    parser.add_argument("platform", help="node allocation platform")
+    parser.add_argument("-n", "--node-count", action="store", dest="nodeCount", type=int, required=True,
+                        help="number of nodes in each node set")
+    parser.add_argument("-c", "--cpus", action="store", dest="cpus", type=int, required=True,
+                        help="cpus per node")
+    parser.add_argument("-m", "--maximum-wall-clock", action="store", dest="maximumWallClock",
+                        required=True, help="maximum wall clock time of each node set")
+    parser.add_argument("-N", "--node-set", action="store", dest="nodeSet", required=True,
+                        help="name of the node set the pool serves, which every node set it submits is given")
+    parser.add_argument("-q", "--queue", action="store", dest="queue", default=None, help="queue name")
+    parser.add_argument("-d", "--dynamic", const=True, nargs='?', action="store", dest="dynamic",
+                        default=None, help="configure to use dynamic slots")
+    parser.add_argument("--min", action="store", dest="minNodeSets", type=int, default=0,
+                        help="smallest number of node sets in the pool")
+    parser.add_argument("--max", action="store", dest="maxNodeSets", type=int, default=10,
+                        help="largest number of node sets in the pool")
+    parser.add_argument("--cooldown", action="store", dest="cooldown", type=float, default=300,
+                        help="seconds to wait after changing the pool before changing it again")
+    parser.add_argument("--max-step", action="store", dest="maxStep", type=int, default=4,
+                        help="most node sets submitted or cancelled at once")
+    parser.add_argument("--max-submits-per-hour", action="store", dest="maxSubmitsPerHour", type=int,
+                        default=None, help="most node sets submitted in any hour")
+    parser.add_argument("--idle-grace", action="store", dest="idleGrace", type=float, default=600,
+                        help="seconds a node set must be idle before it's cancelled")
+    parser.add_argument("--interval", action="store", dest="interval", type=float, default=60,
+                        help="seconds between checks of the queue")
+    parser.add_argument("--idle-command", action="store", dest="idleCommand", default=None,
+                        help="command printing the number of the user's idle jobs for the node set, "
+                        "instead of asking condor_q")
+    parser.add_argument("--busy-command", action="store", dest="busyCommand", default=None,
+                        help="command printing the node set's name if it's busy, instead of asking "
+                        "condor_status")
+    parser.add_argument("-v", "--verbose", action="store_true", dest="verbose", help="verbose")
+    args = parser.parse_args()
+
+    if args.idleCommand is None:
+        query = CondorQueueQuery(args.nodeSet)
+    else:
+        query = CommandQueueQuery(args.idleCommand, args.busyCommand)
+
+    request = {"platform": args.platform, "nodeCount": args.nodeCount, "cpus": args.cpus,
+               "maximumWallClock": args.maximumWallClock}
+    if args.queue is not None:
+        request["queue"] = args.queue
+    if args.dynamic is not None:
+        request["dynamic"] = args.dynamic
+    backend = PluginBackend(request, verbose=args.verbose)
+
+    autoscaler = Autoscaler(query, backend, args.nodeSet, args.nodeCount * args.cpus,
+                            parseWallClock(args.maximumWallClock), minNodeSets=args.minNodeSets,
+                            maxNodeSets=args.maxNodeSets, cooldown=args.cooldown, maxStep=args.maxStep,
+                            maxSubmitsPerHour=args.maxSubmitsPerHour, idleGrace=args.idleGrace)
+    autoscaler.run(args.interval, verbose=args.verbose)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import argparse
+import sys
+from lsst.ctrl.execute.executeDaemon import ExecuteDaemon, stopDaemon
+
+
+def main():
+    """Run allocateNodes.py, qstatus.py and qdelete.py for the current user
+    from one long-running process, until stopped.
+    """
+    parser = argparse.ArgumentParser(prog=sys.argv[0])
+    parser.add_argument("-s", "--socket", action="store", dest="socketName", default=None,
+                        help="socket to listen on (default $CTRL_EXECUTE_DAEMON_SOCKET, "
+                        "or $HOME/.lsst/ctrl_execute.sock)")
+    parser.add_argument("--idle-timeout", action="store", dest="idleTimeout", type=float, default=None,
+                        help="exit after this many seconds without a request")
+    parser.add_argument("--stop", action="store_true", dest="stop", help="stop a running daemon")
+    args = parser.parse_args()
+
+    if args.stop:
+        if not stopDaemon(args.socketName):
+            print("no daemon is running")
+            sys.exit(1)
+        return
+
+    daemon = ExecuteDaemon(args.socketName, idleTimeout=args.idleTimeout)
+    try:
+        daemon.serve()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import argparse
+import sys
+from lsst.ctrl.execute import envString
+from lsst.ctrl.execute.configLayout import ConfigLayout
+
+
+def main():
+    """Remove old generated files from a local scratch "configs" directory.
+    """
+    parser = argparse.ArgumentParser(prog=sys.argv[0])
+    parser.add_argument("localScratch", help="local scratch directory containing the configs directory")
+    parser.add_argument("-a", "--max-age-days", action="store", dest="maxAgeDays", type=int, default=None,
+                        help="remove days of files older than this many days")
+    parser.add_argument("-c", "--max-count", action="store", dest="maxCount", type=int, default=None,
+                        help="keep only the newest days of files adding up to at most this many files")
+    parser.add_argument("-l", "--limit", action="store", dest="limit", type=int, default=None,
+                        help="remove at most this many days")
+    parser.add_argument("-f", "--flat", action="store_true", dest="flat",
+                        help="also remove files older than --max-age-days written before sharding")
+    parser.add_argument("-n", "--dry-run", action="store_true", dest="dryRun",
+                        help="only list what would be removed")
+    parser.add_argument("-v", "--verbose", action="store_true", dest="verbose", help="verbose")
+    args = parser.parse_args()
+
+    if args.maxAgeDays is None and args.maxCount is None:
+        parser.error("at least one of --max-age-days or --max-count is required")
+    if args.flat and args.maxAgeDays is None:
+        parser.error("--flat requires --max-age-days")
+
+    layout = ConfigLayout(envString.resolve(args.localScratch), sharded=True)
+    removed = layout.prune(maxAgeDays=args.maxAgeDays, maxCount=args.maxCount, limit=args.limit,
+                           dryRun=args.dryRun)
+    if args.flat:
+        removed += layout.pruneFlat(args.maxAgeDays, dryRun=args.dryRun)
+
+    if args.verbose or args.dryRun:
+        for path in removed:
+            print(path)
+    print("%s %d entries" % ("would remove" if args.dryRun else "removed", len(removed)))
+
+
+if __name__ == "__main__":
+    main()
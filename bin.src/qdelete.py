@@ -23,14 +23,27 @@
 #
 
 import sys
+from lsst.ctrl.execute.executeDaemon import runMain
 from lsst.ctrl.execute.qCommand import QCommand
 
-if __name__ == "__main__":
+
+def main():
     platform = sys.argv[1]
-    jobId = sys.argv[2]
+    jobIds = sys.argv[2:]
 
     cmd = QCommand(platform)
 
-    command = "%s %s@%s %s/qdel %s" % (cmd.remoteLoginCmd, cmd.userName, cmd.hostName, cmd.utilityPath, jobId)
-    exitCode = cmd.runCommand(command)
+    # delete the jobs concurrently, reporting each one's outcome
+    commands = [cmd.loginCommand("%s/qdel %s" % (cmd.utilityPath, jobId)) for jobId in jobIds]
+    exitCode = 0
+    for jobId, result in zip(jobIds, cmd.runCommands(commands)):
+        sys.stdout.write(result.stdout)
+        sys.stderr.write(result.stderr)
+        if not result.ok:
+            print("error deleting %s" % jobId)
+            exitCode = exitCode or result.exitCode
     sys.exit(exitCode)
+
+
+if __name__ == "__main__":
+    runMain(__file__, main)
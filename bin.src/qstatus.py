@@ -24,21 +24,24 @@
 
 
 import sys
-import string
+from lsst.ctrl.execute.executeDaemon import runMain
 from lsst.ctrl.execute.qCommand import QCommand
 
-if __name__ == "__main__":
+
+def main():
     platform = sys.argv[1]
 
     cmd = QCommand(platform)
 
     # default to doing a status for the user, otherwise, pass the args to qstat
     if len(sys.argv) == 2:
-        command = "%s %s@%s %s/qstat -u%s" % (cmd.remoteLoginCmd,
-                                              cmd.userName, cmd.hostName, cmd.utilityPath, cmd.userName)
+        command = cmd.loginCommand("%s/qstat -u%s" % (cmd.utilityPath, cmd.userName))
     else:
-        command = "%s %s@%s %s/qstat %s" % (cmd.remoteLoginCmd, cmd.userName,
-                                            cmd.hostName, cmd.utilityPath, string.join(sys.argv[2:]))
+        command = cmd.loginCommand("%s/qstat %s" % (cmd.utilityPath, " ".join(sys.argv[2:])))
 
     exitCode = cmd.runCommand(command)
     sys.exit(exitCode)
+
+
+if __name__ == "__main__":
+    runMain(__file__, main)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from lsst.ctrl.execute.registry import Registry
+
+
+def toTimestamp(value):
+    """Convert an ISO 8601 date, or date and time, to seconds since the epoch.
+    """
+    return datetime.fromisoformat(value).timestamp()
+
+
+def main():
+    """Query the registry of allocated node sets and configured runs.
+    """
+    parser = argparse.ArgumentParser(prog=sys.argv[0])
+    parser.add_argument("kind", choices=["allocations", "runs"], help="what to list")
+    parser.add_argument("-p", "--platform", action="store", dest="platform", default=None, help="platform")
+    parser.add_argument("-N", "--node-set", action="store", dest="nodeSet", default=None,
+                        help="node set name")
+    parser.add_argument("-j", "--job-id", action="store", dest="jobId", default=None,
+                        help="scheduler job id (allocations only)")
+    parser.add_argument("-R", "--run-id", action="store", dest="runId", default=None,
+                        help="run id (runs only)")
+    parser.add_argument("-s", "--since", action="store", dest="since", type=toTimestamp, default=None,
+                        help="only entries on or after this ISO date/time")
+    parser.add_argument("-u", "--until", action="store", dest="until", type=toTimestamp, default=None,
+                        help="only entries before this ISO date/time")
+    parser.add_argument("-t", "--today", action="store_true", dest="today", help="only entries from today")
+    parser.add_argument("-l", "--limit", action="store", dest="limit", type=int, default=None,
+                        help="maximum number of entries")
+    parser.add_argument("-a", "--artifacts", action="store_true", dest="artifacts",
+                        help="list the generated files of each entry")
+    parser.add_argument("--json", action="store_true", dest="json", help="write entries as JSON")
+    parser.add_argument("--registry", action="store", dest="registry", default=None,
+                        help="registry file (default %s)" % Registry.defaultFileName)
+    args = parser.parse_args()
+
+    if args.today:
+        args.since = datetime.combine(datetime.now().date(), datetime.min.time()).timestamp()
+
+    with Registry(args.registry) as registry:
+        if args.kind == "allocations":
+            entries = registry.findAllocations(platform=args.platform, nodeSet=args.nodeSet, jobId=args.jobId,
+                                               since=args.since, until=args.until, limit=args.limit)
+            timeColumn = "submitted"
+        else:
+            entries = registry.findRuns(platform=args.platform, nodeSet=args.nodeSet, runId=args.runId,
+                                        since=args.since, until=args.until, limit=args.limit)
+            timeColumn = "created"
+        if args.artifacts:
+            for entry in entries:
+                if args.kind == "allocations":
+                    entry["artifacts"] = registry.getArtifacts(allocationId=entry["id"])
+                else:
+                    entry["artifacts"] = registry.getArtifacts(runRecordId=entry["id"])
+
+    if args.json:
+        json.dump(entries, sys.stdout, indent=2)
+        print()
+        return
+
+    for entry in entries:
+        when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry[timeColumn]))
+        if args.kind == "allocations":
+            print("%s  %-12s %-24s %s" % (when, entry["platform"], entry["node_set"], entry["job_id"] or "-"))
+        else:
+            print("%s  %-12s %-24s %s" % (when, entry["platform"], entry["node_set"] or "-", entry["run_id"]))
+        for path in entry.get("artifacts", []):
+            print("    %s" % path)
+
+
+if __name__ == "__main__":
+    main()
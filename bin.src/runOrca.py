@@ -22,10 +22,10 @@
 # see <http://www.lsstcorp.org/LegalNotices/>.
 #
 
-import lsst.utils
 import sys
 import os
 import os.path
+from lsst.ctrl.execute.configCache import getPlatformDir
 from lsst.ctrl.execute.configurator import Configurator
 from lsst.ctrl.execute.runOrcaParser import RunOrcaParser
 
@@ -35,7 +35,7 @@ def main():
     args = p.getArgs()
     creator = Configurator(args, "$HOME/.lsst/condor-info.py")
 
-    platformPkgDir = lsst.utils.getPackageDir("ctrl_platform_"+creator.platform)
+    platformPkgDir = getPlatformDir(creator.platform)
     if args.platformConfig is None:
         configFileName = os.path.join(platformPkgDir,
                                       "etc", "config", "execConfig.py")
@@ -41,6 +41,11 @@ class AllocatedPlatformConfig(pexConfig.Config):
                                         dtype=int, default=1)
     glideinShutdown = pexConfig.Field(doc="number of seconds of inactivity before glideins are cancelled",
                                       dtype=int, default=3600)
+    connectionPersist = pexConfig.Field(doc="seconds to keep an idle shared connection to the login host "
+                                        "open; 0 connects separately for every command",
+                                        dtype=int, default=600)
+    commandTimeout = pexConfig.Field(doc="seconds to wait for a submission command before killing it "
+                                     "(None waits forever)", dtype=int, default=None)
 
 
 class AllocationConfig(pexConfig.Config):
@@ -22,16 +22,37 @@
 # see <http://www.lsstcorp.org/LegalNotices/>.
 #
 
+import functools
 import os
-import sys
 import pwd
-from datetime import datetime
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
 from string import Template
-from lsst.ctrl.execute import envString
-from lsst.ctrl.execute.allocationConfig import AllocationConfig
-from lsst.ctrl.execute.condorInfoConfig import CondorInfoConfig
-from lsst.ctrl.execute.templateWriter import TemplateWriter
-from lsst.ctrl.execute.seqFile import SeqFile
+from lsst.ctrl.execute import commandRunner, envString
+from lsst.ctrl.execute.configCache import loadConfig
+from lsst.ctrl.execute.configLayout import ConfigLayout
+from lsst.ctrl.execute.registry import Registry
+from lsst.ctrl.execute.templateCache import sharedTemplateCache
+from lsst.ctrl.execute.templateWriter import LazyValue, TemplateWriter, resolveValue
+from lsst.ctrl.execute.seqFile import SeqAllocator, SeqFile
+from lsst.ctrl.execute.submitResult import SubmitResult
+from lsst.ctrl.execute.timing import timer
+from lsst.ctrl.execute.uniqueId import createUniqueId
+
+
+def timedPhase(phase):
+    """Decorates an Allocator method, so the time spent in it is recorded
+    as "phase".
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.timed(phase):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
 
 
 class Allocator:
@@ -49,61 +70,162 @@ class Allocator:
         Name of the file containing Config information
     """
 
+    # the file node set sequence numbers are stored in
+    nodeSetSeqFileName = "$HOME/.lsst/node-set.seq"
+
     def __init__(self, platform, opts, configuration, condorInfoFileName):
         """Constructor
         @param platform: target platform for PBS submission
         @param opts: options to override
         """
-        self.opts = opts
-        self.defaults = {}
-        self.configuration = configuration
-
-        fileName = envString.resolve(condorInfoFileName)
-        condorInfoConfig = CondorInfoConfig()
-        condorInfoConfig.load(fileName)
-
         self.platform = platform
+        self.timings = {}
+        with self.timed("init"):
+            self.opts = opts
+            self.defaults = {}
+            self.configuration = configuration
+            self.templateWriter = TemplateWriter(cache=sharedTemplateCache, atomic=True, skipUnchanged=True)
+            self.generatedFiles = []
+            self.registryFileName = Registry.defaultFileName
+            self.commandTimeout = None
+            # hands out node set sequence numbers; BulkAllocator shares one
+            # between its allocators
+            self.nodeSetSeq = None
+
+            fileName = envString.resolve(condorInfoFileName)
+            condorInfoConfig = loadConfig("lsst.ctrl.execute.condorInfoConfig", fileName)
+
+            # Look up the user's name and home directory in the
+            # $HOME/.lsst/condor-info.py file
+            # If the platform is lsst, and the user_name or user_home
+            # is not in there, then default to user running this
+            # command and the value of $HOME, respectively.
+            user_name = None
+            user_home = None
+            for name in condorInfoConfig.platform:
+                if name == self.platform:
+                    user_name = condorInfoConfig.platform[name].user.name
+                    user_home = condorInfoConfig.platform[name].user.home
+
+            if self.platform == "lsst":
+                if user_name is None:
+                    user_name = pwd.getpwuid(os.geteuid()).pw_name
+                if user_home is None:
+                    user_home = os.getenv('HOME')
 
-        # Look up the user's name and home directory in the
-        # $HOME/.lsst/condor-info.py file
-        # If the platform is lsst, and the user_name or user_home
-        # is not in there, then default to user running this
-        # command and the value of $HOME, respectively.
-        user_name = None
-        user_home = None
-        for name in condorInfoConfig.platform:
-            if name == self.platform:
-                user_name = condorInfoConfig.platform[name].user.name
-                user_home = condorInfoConfig.platform[name].user.home
-
-        if self.platform == "lsst":
             if user_name is None:
-                user_name = pwd.getpwuid(os.geteuid()).pw_name
+                raise RuntimeError("error: %s does not specify user name for platform == %s" %
+                                   (condorInfoFileName, self.platform))
             if user_home is None:
-                user_home = os.getenv('HOME')
+                raise RuntimeError("error: %s does not specify user home for platform == %s" %
+                                   (condorInfoFileName, self.platform))
 
-        if user_name is None:
-            raise RuntimeError("error: %s does not specify user name for platform == %s" %
-                               (condorInfoFileName, self.platform))
-        if user_home is None:
-            raise RuntimeError("error: %s does not specify user home for platform == %s" %
-                               (condorInfoFileName, self.platform))
+            self.defaults["USER_NAME"] = user_name
+            self.defaults["USER_HOME"] = user_home
 
-        self.defaults["USER_NAME"] = user_name
-        self.defaults["USER_HOME"] = user_home
+            self.commandLineDefaults = {}
 
-        self.commandLineDefaults = {}
+            self.commandLineDefaults["NODE_COUNT"] = self.opts.nodeCount
+            self.commandLineDefaults["CPUS"] = self.opts.cpus
+            self.commandLineDefaults["WALL_CLOCK"] = self.opts.maximumWallClock
 
-        self.commandLineDefaults["NODE_COUNT"] = self.opts.nodeCount
-        self.commandLineDefaults["CPUS"] = self.opts.cpus
-        self.commandLineDefaults["WALL_CLOCK"] = self.opts.maximumWallClock
+            self.commandLineDefaults["QUEUE"] = self.opts.queue
+            if self.opts.email == "no":
+                self.commandLineDefaults["EMAIL_NOTIFICATION"] = "#"
 
-        self.commandLineDefaults["QUEUE"] = self.opts.queue
-        if self.opts.email == "no":
-            self.commandLineDefaults["EMAIL_NOTIFICATION"] = "#"
+            self.load()
+
+    def submit(self, platform, platformPkgDir):
+        """Creates the files for the allocation, submits it, and prints the
+        node set information.  Exits if the submission fails.
+
+        Parameters
+        ----------
+        platform : `str`
+            the name of the platform to execute on
+        platformPkgDir : `str`
+            the platform package directory
+
+        Returns
+        -------
+        result : `SubmitResult`
+            the outcome of the submission
+        """
+        with timer.span("submit", platform):
+            self.prepare(platform, platformPkgDir)
+            self.pruneConfigs()
+            result = self.submitPrepared()
+        if not result.ok:
+            sys.exit(result.exitCode)
+
+        # print node set information
+        self.printNodeSetInfo()
+        return result
+
+    def cancel(self, jobId):
+        """Cancels a submitted allocation.  Scheduler plugins which can
+        cancel their allocations override this.
+
+        Parameters
+        ----------
+        jobId : `str`
+            the job id the scheduler gave the allocation
+
+        Returns
+        -------
+        exitCode : `int`
+            the exit code of the cancel command
+        """
+        raise RuntimeError("%s allocations can't be cancelled" % self.getScheduler())
+
+    def getActiveJobs(self):
+        """Lists the user's allocations which the scheduler still has queued
+        or running.  Scheduler plugins which can list their allocations
+        override this.
+
+        Returns
+        -------
+        jobIds : `set` of `str`
+            the job ids the scheduler gave the allocations
+        """
+        raise RuntimeError("%s allocations can't be listed" % self.getScheduler())
 
-        self.load()
+    @contextmanager
+    def timed(self, phase):
+        """Adds the time spent in the with block to the timing of "phase",
+        and records it as a span of the shared timer.
+        """
+        start = time.time()
+        try:
+            with timer.span(phase, self.platform):
+                yield
+        finally:
+            self.timings[phase] = self.timings.get(phase, 0.0) + time.time() - start
+
+    def makeSubmitResult(self, exitCode, jobId=None):
+        """Creates the result of submitting this allocation, recording the
+        allocation in the registry if it was submitted.
+
+        Parameters
+        ----------
+        exitCode : `int`
+            the exit code of the submission
+        jobId : `str`, optional
+            the job id the scheduler gave the allocation
 
+        Returns
+        -------
+        result : `SubmitResult`
+            the outcome of the submission
+        """
+        allocationId = None
+        if exitCode == 0:
+            allocationId = self.recordSubmission(jobId)
+        return SubmitResult(self.platform, self.getScheduler(), self.getNodeSetName(), exitCode,
+                            jobId=jobId, files=self.generatedFiles, timings=self.timings,
+                            uniqueId=self.uniqueIdentifier, allocationId=allocationId)
+
+    @timedPhase("nodeSetName")
     def createNodeSetName(self):
         """Creates the next "node_set" name, using the remote user name and
         a stored sequence number.
@@ -113,10 +235,27 @@ class Allocator:
         nodeSetName : `str`
             the new node_set name
         """
-        s = SeqFile("$HOME/.lsst/node-set.seq")
-        n = s.nextSeq()
-        nodeSetName = "%s_%d" % (self.defaults["USER_NAME"], n)
-        return nodeSetName
+        return self.createNodeSetNames(1)[0]
+
+    @timedPhase("nodeSetName")
+    def createNodeSetNames(self, count):
+        """Creates count new "node_set" names at once, taking their sequence
+        numbers from nodeSetSeq, which reserves them in a single update of
+        the sequence file if it doesn't already hold enough.
+
+        Parameters
+        ----------
+        count : `int`
+            the number of names to create
+
+        Returns
+        -------
+        nodeSetNames : `list` of `str`
+            the new node_set names
+        """
+        if self.nodeSetSeq is None:
+            self.nodeSetSeq = SeqAllocator(SeqFile(self.nodeSetSeqFileName))
+        return ["%s_%d" % (self.defaults["USER_NAME"], n) for n in self.nodeSetSeq.take(count)]
 
     def createUniqueIdentifier(self):
         """Creates a unique file identifier, based on the user's name
@@ -132,11 +271,9 @@ class Allocator:
         # easily located and shared with other users when debugging
         # The tempfile.mkstemp method restricts the file to only the user,
         # and does not guarantee a file name can that easily be identified.
-        now = datetime.now()
-        username = pwd.getpwuid(os.geteuid()).pw_name
-        ident = "%s_%02d_%02d%02d_%02d%02d%02d" % (
-            username, now.year, now.month, now.day, now.hour, now.minute, now.second)
-        return ident
+        # The host, process id and counter keep identifiers created in the
+        # same instant unique.
+        return createUniqueId()
 
     def load(self):
         """Loads all values from configuration and command line overrides into
@@ -147,29 +284,32 @@ class Allocator:
         # print("localScratch-> %s" % self.defaults["LOCAL_SCRATCH"])
         self.defaults["SCHEDULER"] = self.configuration.platform.scheduler
 
+    @timedPhase("loadAllocationConfig")
     def loadAllocationConfig(self, name, suffix):
         """Loads all values from allocationConfig and command line overrides
         into data structures suitable for use by the TemplateWriter object.
         """
         resolvedName = envString.resolve(name)
-        allocationConfig = AllocationConfig()
         if not os.path.exists(resolvedName):
             raise RuntimeError("%s was not found." % resolvedName)
-        allocationConfig.load(resolvedName)
+        allocationConfig = loadConfig("lsst.ctrl.execute.allocationConfig", resolvedName)
 
         self.defaults["QUEUE"] = allocationConfig.platform.queue
         self.defaults["EMAIL_NOTIFICATION"] = allocationConfig.platform.email
         self.defaults["HOST_NAME"] = allocationConfig.platform.loginHostName
 
         self.defaults["UTILITY_PATH"] = allocationConfig.platform.utilityPath
+        self.commandTimeout = allocationConfig.platform.commandTimeout
 
         if self.opts.glideinShutdown is None:
             self.defaults["GLIDEIN_SHUTDOWN"] = str(allocationConfig.platform.glideinShutdown)
         else:
             self.defaults["GLIDEIN_SHUTDOWN"] = str(self.opts.glideinShutdown)
 
+        # the node set name uses the sequence file, so it's only created
+        # when a template, or a caller, first asks for it.
         if self.opts.nodeSet is None:
-            self.defaults["NODE_SET"] = self.createNodeSetName()
+            self.defaults["NODE_SET"] = LazyValue(self.createNodeSetName)
         else:
             self.defaults["NODE_SET"] = self.opts.nodeSet
 
@@ -178,12 +318,12 @@ class Allocator:
         if self.opts.outputLog is not None:
             self.defaults["OUTPUT_LOG"] = self.opts.outputLog
         else:
-            self.defaults["OUTPUT_LOG"] = "%s.out" % nodeSetName
+            self.defaults["OUTPUT_LOG"] = LazyValue(lambda: "%s.out" % nodeSetName)
 
         if self.opts.errorLog is not None:
             self.defaults["ERROR_LOG"] = self.opts.errorLog
         else:
-            self.defaults["ERROR_LOG"] = "%s.err" % nodeSetName
+            self.defaults["ERROR_LOG"] = LazyValue(lambda: "%s.err" % nodeSetName)
 
         # This is the TOTAL number of cores in the job, not just the total
         # of the cores you intend to use.   In other words, the total available
@@ -193,10 +333,14 @@ class Allocator:
 
         self.uniqueIdentifier = self.createUniqueIdentifier()
 
-        # write these pbs and config files to {LOCAL_DIR}/configs
-        self.configDir = os.path.join(self.defaults["LOCAL_SCRATCH"], "configs")
-        if not os.path.exists(self.configDir):
-            os.makedirs(self.configDir)
+        # write these pbs and config files to {LOCAL_DIR}/configs, or to a
+        # date/hash shard of it
+        platformConfig = self.configuration.platform
+        self.configLayout = ConfigLayout(self.defaults["LOCAL_SCRATCH"], sharded=platformConfig.shardConfigs)
+        self.configDir = self.configLayout.makeDirectory(self.uniqueIdentifier)
+        self.configRetentionDays = platformConfig.configRetentionDays
+        self.configRetentionCount = platformConfig.configRetentionCount
+        self.defaults["CONFIG_DIR"] = self.configDir
 
         self.submitFileName = os.path.join(self.configDir, "alloc_%s.%s" % (self.uniqueIdentifier, suffix))
 
@@ -232,6 +376,7 @@ class Allocator:
             print("wrote new condor_config file to %s" % outfile)
         return outfile
 
+    @timedPhase("createFile")
     def createFile(self, input, output):
         """Creates a new file, using "input" as a Template, and writes the
         new file to output.
@@ -244,17 +389,140 @@ class Allocator:
         resolvedInputName = envString.resolve(input)
         if self.opts.verbose:
             print("creating file using %s" % resolvedInputName)
-        template = TemplateWriter()
-        # Uses the associative arrays of "defaults" and "commandLineDefaults"
-        # to write out the new file from the template.
-        # The commandLineDefaults override values in "defaults"
+        template = self.templateWriter
+        skipped = template.writesSkipped
+        template.rewrite(resolvedInputName, output, self.getSubstitutes())
+        self.addGeneratedFiles([output])
+        if self.opts.verbose and template.writesSkipped > skipped:
+            print("%s is unchanged; not rewritten" % output)
+        return output
+
+    def renderFile(self, input):
+        """Renders "input" as a Template in memory, without writing a file.
+
+        Returns
+        -------
+        text : `str`
+            The rendered contents
+        """
+        resolvedInputName = envString.resolve(input)
+        if self.opts.verbose:
+            print("rendering using %s" % resolvedInputName)
+        template = self.templateWriter
+        return template.render(resolvedInputName, self.getSubstitutes())
+
+    def createFiles(self, input, outputs):
+        """Creates several new files from the single template "input",
+        reading and parsing the template only once.
+
+        Parameters
+        ----------
+        input : `str`
+            the template file name
+        outputs : iterable of `tuple`
+            (output file name, overrides) pairs, where overrides is a dict
+            of values which replace the current substitutes for that file
+
+        Returns
+        -------
+        outfiles : `list` of `str`
+            The newly created file names
+        """
+        resolvedInputName = envString.resolve(input)
+        if self.opts.verbose:
+            print("creating files using %s" % resolvedInputName)
+        template = self.templateWriter
+        substitutes = self.getSubstitutes()
+
+        def perFile():
+            for output, overrides in outputs:
+                pairs = substitutes.copy()
+                pairs.update(overrides)
+                yield output, pairs
+        skipped = template.writesSkipped
+        outfiles = template.rewriteMany(resolvedInputName, perFile())
+        self.addGeneratedFiles(outfiles)
+        if self.opts.verbose:
+            print("created %d files, %d unchanged and not rewritten" %
+                  (len(outfiles), template.writesSkipped - skipped))
+        return outfiles
+
+    def addGeneratedFiles(self, outfiles):
+        """Note files written for this allocation.  They're counted in the
+        config directory's manifest as soon as they're written, so files
+        left by submissions which later fail still count towards
+        configRetentionCount.
+
+        Parameters
+        ----------
+        outfiles : `list` of `str`
+            the file names
+        """
+        self.generatedFiles.extend(outfiles)
+        self.configLayout.recordFiles(self.configDir, len(outfiles))
+
+    def pruneConfigs(self, keep=()):
+        """Prune old generated files, if the platform has a retention
+        policy.  This is done once this allocation's files are written, and
+        never removes the directory they were written to.
+
+        Parameters
+        ----------
+        keep : iterable of `str`, optional
+            other directories being written to, which must also be kept
+
+        Returns
+        -------
+        removed : `list` of `str`
+            the day directories removed
+        """
+        return self.configLayout.maybePrune(maxAgeDays=self.configRetentionDays,
+                                            maxCount=self.configRetentionCount,
+                                            keep=[self.configDir] + list(keep))
+
+    def getSubstitutes(self):
+        """Merges "defaults" and "commandLineDefaults" into the values used
+        to write out new files from templates.  The commandLineDefaults
+        override values in "defaults".
+
+        Returns
+        -------
+        substitutes : `dict`
+            the values to substitute
+        """
         substitutes = self.defaults.copy()
         for key in self.commandLineDefaults:
             val = self.commandLineDefaults[key]
             if val is not None:
                 substitutes[key] = self.commandLineDefaults[key]
-        template.rewrite(resolvedInputName, output, substitutes)
-        return output
+        return substitutes
+
+    def recordSubmission(self, jobId=None):
+        """Records this allocation, and the files generated for it, in the
+        registry.  Failing to record it isn't fatal, since the allocation
+        itself has already been submitted.
+
+        Parameters
+        ----------
+        jobId : `str`, optional
+            the scheduler's job id for the allocation
+
+        Returns
+        -------
+        allocationId : `int`
+            the registry id of the allocation, or None if it couldn't be
+            recorded
+        """
+        try:
+            with Registry(self.registryFileName) as registry:
+                return registry.recordAllocation(self.getNodeSetName(), self.platform,
+                                                 scheduler=self.getScheduler(), jobId=jobId,
+                                                 uniqueId=self.uniqueIdentifier,
+                                                 userName=self.getUserName(),
+                                                 artifacts=self.generatedFiles)
+        except (sqlite3.Error, OSError) as e:
+            print("warning: couldn't record allocation in %s: %s" % (self.registryFileName, e))
+            return None
 
     def isVerbose(self):
         """Status of the verbose flag
@@ -340,13 +608,27 @@ class Allocator:
         override (if set), or the default Config value
         """
         if value in self.commandLineDefaults:
-            return self.commandLineDefaults[value]
+            return resolveValue(self.commandLineDefaults[value])
         if value in self.defaults:
-            return self.defaults[value]
+            return resolveValue(self.defaults[value])
+        return None
+
+    def getTotalNodes(self):
+        """The number of nodes the whole allocation asks for; plugins which
+        submit more than one job, or job component, override this.
+        @return the total node count
+        """
+        return int(self.getNodes())
+
+    def getJobShape(self):
+        """Describes how the nodes are split between the jobs, or job
+        components, of the allocation.
+        @return the description, or None if it's a single job
+        """
         return None
 
     def printNodeSetInfo(self):
-        nodes = self.getNodes()
+        nodes = self.getTotalNodes()
         cpus = self.getCPUs()
         wallClock = self.getWallClock()
         nodeString = ""
@@ -364,39 +646,96 @@ with %s cpus per node and maximum time limit of %s" %
             print("%s node%s will be allocated on %s using dynamic slot block specified in \
 '%s' with %s cpus per node and maximum time limit of %s" %
                   (nodes, nodeString, self.platform, self.opts.dynamic, cpus, wallClock))
+        shape = self.getJobShape()
+        if shape is not None:
+            print(shape)
         print("Node set name:")
         print(self.getNodeSetName())
 
-    def runCommand(self, cmd, verbose):
-        cmd_split = cmd.split()
-        pid = os.fork()
-        if not pid:
-            # Methods of file transfer and login may
-            # produce different output, depending on how
-            # the "gsi" utilities are used.  The user can
-            # either use grid proxies or ssh, and gsiscp/gsissh
-            # does the right thing.  Since the output will be
-            # different in either case anything potentially parsing this
-            # output (like drpRun), would have to go through extra
-            # steps to deal with this output, and which ultimately
-            # end up not being useful.  So we optinally close the i/o output
-            # of the executing command down.
-            #
-            # stdin/stdio/stderr is treated specially
-            # by python, so we have to close down
-            # both the python objects and the
-            # underlying c implementations
-            if not verbose:
-                # close python i/o
-                sys.stdin.close()
-                sys.stdout.close()
-                sys.stderr.close()
-                # close C's i/o
-                os.close(0)
-                os.close(1)
-                os.close(2)
-            os.execvp(cmd_split[0], cmd_split)
-        pid, status = os.wait()
-        # high order bits are status, low order bits are signal.
-        exitCode = (status & 0xff00) >> 8
-        return exitCode
+    def runCommand(self, cmd, verbose, cwd=None):
+        """Run a command, and wait for it to finish.
+
+        Parameters
+        ----------
+        cmd : `str`
+            the command line to run
+        verbose : `bool`
+            if False, the command's output is discarded
+        cwd : `str`, optional
+            directory to run the command in
+
+        Returns
+        -------
+        exitCode : `int`
+            the exit code of the command
+        """
+        # Methods of file transfer and login may
+        # produce different output, depending on how
+        # the "gsi" utilities are used.  The user can
+        # either use grid proxies or ssh, and gsiscp/gsissh
+        # does the right thing.  Since the output will be
+        # different in either case anything potentially parsing this
+        # output (like drpRun), would have to go through extra
+        # steps to deal with this output, and which ultimately
+        # end up not being useful.  So we optionally discard the output
+        # of the executing command.
+        result = commandRunner.runCommand(cmd, timeout=self.commandTimeout, cwd=cwd,
+                                          capture=False, verbose=verbose)
+        if result.timedOut:
+            print("%s timed out after %s seconds" % (cmd, self.commandTimeout))
+        return result.exitCode
+
+    def runCommandOutput(self, cmd, verbose, input=None, cwd=None):
+        """Run a command and capture its output, which is also printed if
+        verbose is set.  The error output of a failed command is always
+        printed.
+
+        Parameters
+        ----------
+        cmd : `str`
+            the command line to run
+        verbose : `bool`
+            print the command's output
+        input : `str`, optional
+            the text sent to the command's stdin
+        cwd : `str`, optional
+            directory to run the command in
+
+        Returns
+        -------
+        result : `CommandResult`
+            the outcome of the command
+        """
+        result = commandRunner.runCommand(cmd, timeout=self.commandTimeout, input=input, cwd=cwd)
+        if verbose:
+            sys.stdout.write(result.stdout)
+        if verbose or not result.ok:
+            sys.stderr.write(result.stderr)
+        if result.timedOut:
+            print("%s timed out after %s seconds" % (cmd, self.commandTimeout))
+        return result
+
+    def runCommandWithInput(self, cmd, input, verbose, cwd=None):
+        """Run a command, feeding "input" to it on stdin.
+
+        Parameters
+        ----------
+        cmd : `str`
+            the command line to run
+        input : `str`
+            the text sent to the command's stdin
+        verbose : `bool`
+            if False, the command's output is discarded
+        cwd : `str`, optional
+            directory to run the command in
+
+        Returns
+        -------
+        exitCode : `int`
+            the exit code of the command
+        """
+        result = commandRunner.runCommand(cmd, timeout=self.commandTimeout, input=input, cwd=cwd,
+                                          capture=False, verbose=verbose)
+        if result.timedOut:
+            print("%s timed out after %s seconds" % (cmd, self.commandTimeout))
+        return result.exitCode
@@ -59,6 +59,25 @@ class AllocatorParser:
         The parser options and remaining arguments
         """
 
+        parser = self.makeParser(basename)
+        self.args = parser.parse_args()
+
+        return self.args
+
+    @staticmethod
+    def makeParser(basename):
+        """Create the parser for a single allocation request.
+
+        Parameters
+        ----------
+        basename : `str`
+            The name used to identify the running program
+
+        Returns
+        -------
+        parser : `argparse.ArgumentParser`
+            the parser
+        """
         parser = argparse.ArgumentParser(prog=basename)
         parser.add_argument("platform", help="node allocation platform")
         parser.add_argument("-n", "--node-count", action="store", default=None,
@@ -84,10 +103,28 @@ class AllocatorParser:
                             default=None, help="run id")
         parser.add_argument("-d", "--dynamic", const='__default__', nargs='?', action="store",
                             dest="dynamic", type=str, default=None, help="configure to use dynamic slots")
-
-        self.args = parser.parse_args()
-
-        return self.args
+        parser.add_argument("--submit-stdin", action="store_true", dest="submitStdin", default=False,
+                            help="pipe the submit script to the scheduler instead of writing it to a file "
+                            "(slurm only)")
+        parser.add_argument("--keep-submit-file", action="store_true", dest="keepSubmitFile",
+                            default=False, help="keep a copy of the submit script when using --submit-stdin "
+                            "(slurm only)")
+        parser.add_argument("--bundle", action="store_true", dest="bundle", default=False,
+                            help="send the generated files to the login host as one archive, and submit "
+                            "them in the same remote command (PBS only)")
+        parser.add_argument("--array", action="store", dest="arraySize", type=int, default=None,
+                            help="submit the node set as a job array of this many tasks, each of "
+                            "NODE_COUNT nodes (slurm only)")
+        parser.add_argument("--array-throttle", action="store", dest="arrayThrottle", type=int,
+                            default=None, help="maximum number of array tasks running at once")
+        parser.add_argument("--het-component", action="append", dest="hetComponents", default=None,
+                            metavar="NODES:CPUS", help="add a component of this shape, making the node "
+                            "set a heterogeneous job; may be repeated (slurm only)")
+        parser.add_argument("--profile", action="store", dest="profile", default=None,
+                            help="write the time spent in each phase to this JSON file")
+        parser.add_argument("--profile-stats", action="store", dest="profileStats", default=None,
+                            help="write cProfile statistics to this file, in pstats format")
+        return parser
 
     def getArgs(self):
         """Accessor method to get arguments left after standard parsed options
@@ -110,3 +147,38 @@ class AllocatorParser:
             the name of the "platform"
         """
         return self.args.platform
+
+
+class BulkAllocatorParser:
+    """An argument parser for submitting a manifest of node allocation
+    requests at once.
+
+    Parameters
+    ----------
+    basename : `str`
+        The name used to identify the running program
+    """
+
+    def __init__(self, basename):
+        parser = argparse.ArgumentParser(prog=basename)
+        parser.add_argument("-M", "--manifest", action="store", dest="manifest", required=True,
+                            help="JSON (or JSON lines) file listing the allocation requests")
+        parser.add_argument("-j", "--max-concurrent", action="store", dest="maxConcurrent",
+                            type=int, default=8, help="maximum number of submissions to run at once")
+        parser.add_argument("-v", "--verbose", action="store_true", dest="verbose", help="verbose")
+        parser.add_argument("--profile", action="store", dest="profile", default=None,
+                            help="write the time spent in each phase to this JSON file")
+        parser.add_argument("--profile-stats", action="store", dest="profileStats", default=None,
+                            help="write cProfile statistics to this file, in pstats format")
+
+        self.args = parser.parse_args()
+
+    def getArgs(self):
+        """Accessor method to get the parsed arguments.
+
+        Returns
+        -------
+        args: `argparse.Namespace`
+            the parsed command line arguments
+        """
+        return self.args
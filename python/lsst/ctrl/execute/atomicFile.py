@@ -0,0 +1,80 @@
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import os
+import tempfile
+
+
+def getUmask():
+    """Return the process umask.
+
+    It's read from /proc where possible, since reading it with os.umask
+    changes it, for a moment, for every thread in the process.
+
+    Returns
+    -------
+    umask : `int`
+        the umask
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError):
+        pass
+    umask = os.umask(0o077)
+    os.umask(umask)
+    return umask
+
+
+def writeAtomic(fileName, data, mode=None):
+    """Write a file by writing a temporary file next to it and renaming it
+    into place, so readers see either the old or the new contents, never
+    a partly written file.
+
+    Parameters
+    ----------
+    fileName : `str`
+        the file to write
+    data : `bytes`
+        the new contents
+    mode : `int`, optional
+        permissions of the file; by default those of the file being
+        replaced, or those open() would give a new file under the current
+        umask
+    """
+    dirName, baseName = os.path.split(os.path.abspath(fileName))
+    fd, tempName = tempfile.mkstemp(dir=dirName, prefix=".%s." % baseName, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            fp.write(data)
+        if mode is None:
+            try:
+                mode = os.stat(fileName).st_mode & 0o7777
+            except OSError:
+                mode = 0o666 & ~getUmask()
+        os.chmod(tempName, mode)
+        os.replace(tempName, fileName)
+    except BaseException:
+        os.unlink(tempName)
+        raise
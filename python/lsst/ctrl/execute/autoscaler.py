@@ -0,0 +1,397 @@
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import collections
+import math
+import shlex
+import signal
+import threading
+import time
+from lsst.ctrl.execute.bulkAllocator import BulkAllocator
+from lsst.ctrl.execute.commandRunner import runCommand
+
+
+def parseWallClock(wallClock):
+    """Convert a scheduler wall clock limit, [D-]HH:MM:SS, MM:SS or
+    minutes, to seconds.
+
+    Parameters
+    ----------
+    wallClock : `str`
+        the wall clock limit
+
+    Returns
+    -------
+    seconds : `int`
+        the limit in seconds
+    """
+    days = 0
+    if "-" in wallClock:
+        dayPart, wallClock = wallClock.split("-", 1)
+        days = int(dayPart)
+    parts = [int(part) for part in wallClock.split(":")]
+    if len(parts) == 1:
+        seconds = parts[0] * 60
+    elif len(parts) == 2:
+        seconds = parts[0] * 60 + parts[1]
+    elif len(parts) == 3:
+        seconds = parts[0] * 3600 + parts[1] * 60 + parts[2]
+    else:
+        raise RuntimeError("can't parse wall clock limit %s" % wallClock)
+    return days * 86400 + seconds
+
+
+class QueueQuery:
+    """Reports the demand on the glide-in pool.  Subclasses implement the
+    queries for a particular workload manager.
+    """
+
+    def getIdleJobs(self):
+        """Return the number of the user's jobs waiting for a slot of the
+        node set the pool serves.
+        """
+        raise NotImplementedError()
+
+    def getBusyNodeSets(self):
+        """Return the names of the pool's node sets which are running jobs.
+        """
+        raise NotImplementedError()
+
+
+class CommandQueueQuery(QueueQuery):
+    """Reports the demand on the glide-in pool by running commands.
+
+    Parameters
+    ----------
+    idleCommand : `str`
+        command which prints the number of idle jobs or, with countLines,
+        one line for each idle job
+    busyCommand : `str`, optional
+        command which prints the node set name of every busy slot, one per
+        line; if None, no node set is considered busy
+    timeout : `float`
+        seconds to wait for each command
+    countLines : `bool`
+        count the lines idleCommand prints, instead of reading a number
+    """
+
+    def __init__(self, idleCommand, busyCommand=None, timeout=60, countLines=False):
+        self.idleCommand = idleCommand
+        self.busyCommand = busyCommand
+        self.timeout = timeout
+        self.countLines = countLines
+
+    def run(self, cmd):
+        """Run a query command, returning the lines it printed.
+        """
+        result = runCommand(cmd, timeout=self.timeout)
+        if not result.ok:
+            raise RuntimeError("%s failed with exit code %d: %s" % (cmd, result.exitCode,
+                                                                    result.stderr.strip()))
+        return [line.strip() for line in result.stdout.splitlines() if line.strip()]
+
+    def getIdleJobs(self):
+        lines = self.run(self.idleCommand)
+        if self.countLines or not lines:
+            return len(lines)
+        if len(lines) != 1 or not lines[0].isdigit():
+            raise RuntimeError("%s didn't print a number of idle jobs: %s" % (self.idleCommand,
+                                                                              " ".join(lines)))
+        return int(lines[0])
+
+    def getBusyNodeSets(self):
+        if self.busyCommand is None:
+            return set()
+        return set(line.strip('"') for line in self.run(self.busyCommand))
+
+
+class CondorQueueQuery(CommandQueueQuery):
+    """Reports the demand on the glide-in pool from the local Condor pool:
+    the user's idle jobs pinned to the pool's node set with the NODE_SET
+    keyword, and the glide-in slots of that node set claimed by a job.
+
+    Parameters
+    ----------
+    nodeSet : `str`
+        the name of the node set the pool serves
+    timeout : `float`
+        seconds to wait for each command
+    """
+
+    def __init__(self, nodeSet, timeout=60):
+        # condor_q lists only the user's own jobs, and prints one ClusterId
+        # for each, so a single idle job looks like a count unless the
+        # lines are counted
+        idle = 'JobStatus == 1 && NODE_SET == "%s"' % nodeSet
+        busy = 'IS_GLIDEIN && State == "Claimed" && NODE_SET == "%s"' % nodeSet
+        CommandQueueQuery.__init__(self, "condor_q -constraint %s -af ClusterId" % shlex.quote(idle),
+                                   "condor_status -constraint %s -af NODE_SET" % shlex.quote(busy),
+                                   timeout, countLines=True)
+
+
+class PluginBackend:
+    """Submits, lists and cancels node sets of one shape through the
+    platform's scheduler plugin.
+
+    Parameters
+    ----------
+    request : `dict`
+        the allocation request for each node set, as in a BulkAllocator
+        manifest
+    maxConcurrent : `int`
+        the maximum number of submissions to run at once
+    **kwargs
+        passed to BulkAllocator
+    """
+
+    def __init__(self, request, maxConcurrent=8, **kwargs):
+        self.request = dict(request)
+        self.maxConcurrent = maxConcurrent
+        self.kwargs = kwargs
+
+    def submit(self, count, nodeSet):
+        """Submit count node sets, all named nodeSet.
+
+        Returns
+        -------
+        entries : `list` of `dict`
+            the node sets submitted, with the keys "nodeSet", "jobId" and
+            "allocator"
+        """
+        request = dict(self.request, nodeSet=nodeSet)
+        allocator = BulkAllocator([request] * count, maxConcurrent=self.maxConcurrent, **self.kwargs)
+        entries = []
+        for result in allocator.run():
+            if result["status"] == "submitted":
+                entries.append({"nodeSet": result["nodeSet"], "jobId": result["jobId"],
+                                "allocator": result["allocator"]})
+            else:
+                print("error submitting node set: %s" % (result["error"] or result["exitCode"]))
+        return entries
+
+    def getActiveJobs(self, entries):
+        """Ask the scheduler which of the node sets returned by submit are
+        still queued or running.
+
+        Returns
+        -------
+        jobIds : `set` of `str`
+            the job ids of the node sets still queued or running
+        """
+        allocators = [entry["allocator"] for entry in entries if entry["allocator"] is not None]
+        if not allocators:
+            return set()
+        return allocators[0].getActiveJobs()
+
+    def cancel(self, entry):
+        """Cancel a node set returned by submit.
+
+        Returns
+        -------
+        cancelled : `bool`
+            True if the node set was cancelled
+        """
+        if entry["jobId"] is None:
+            print("can't cancel node set %s: its job id is unknown" % entry["nodeSet"])
+            return False
+        return entry["allocator"].cancel(entry["jobId"]) == 0
+
+
+class Autoscaler:
+    """Grows and shrinks a pool of glide-in node sets to follow the demand
+    reported by a QueueQuery.
+
+    Every node set in the pool is given the same name, nodeSet, so the
+    jobs pinned to that node set can run on any of them; the query reports
+    the demand for that node set alone.  Since glide-ins only advertise
+    their node set's name, the pool's node sets are busy, and idle,
+    together.
+
+    The pool is sized so every running job keeps its node set and the idle
+    jobs fit in new ones, within [minNodeSets, maxNodeSets].  It grows and
+    shrinks by at most maxStep node sets at a time, waits cooldown seconds
+    after each change before making another, and submits at most
+    maxSubmitsPerHour node sets in any hour.  Only node sets which have
+    run no jobs for idleGrace seconds are cancelled, the most recently
+    submitted first.  Node sets are forgotten once the scheduler no longer
+    lists them, as when their glide-ins shut down early, or once their
+    wall clock limit has passed.
+
+    Parameters
+    ----------
+    query : `QueueQuery`
+        reports the demand
+    backend : `PluginBackend`
+        submits, lists and cancels node sets
+    nodeSet : `str`
+        the name of the node set the pool serves
+    slotsPerNodeSet : `int`
+        the number of jobs each node set can run at once
+    wallClock : `int`
+        seconds each node set lasts
+    minNodeSets : `int`
+        the smallest pool
+    maxNodeSets : `int`
+        the largest pool
+    cooldown : `float`
+        seconds to wait after changing the pool before changing it again
+    maxStep : `int`
+        the most node sets submitted or cancelled at once
+    maxSubmitsPerHour : `int`, optional
+        the most node sets submitted in any hour
+    idleGrace : `float`
+        seconds a node set must have been idle before it's cancelled
+    clock : callable
+        returns the current time in seconds
+    """
+
+    def __init__(self, query, backend, nodeSet, slotsPerNodeSet, wallClock, minNodeSets=0, maxNodeSets=10,
+                 cooldown=300, maxStep=4, maxSubmitsPerHour=None, idleGrace=600, clock=time.time):
+        if slotsPerNodeSet < 1:
+            raise RuntimeError("slotsPerNodeSet must be at least 1, not %d" % slotsPerNodeSet)
+        if not 0 <= minNodeSets <= maxNodeSets:
+            raise RuntimeError("need 0 <= minNodeSets (%d) <= maxNodeSets (%d)" % (minNodeSets, maxNodeSets))
+        self.query = query
+        self.backend = backend
+        self.nodeSet = nodeSet
+        self.slotsPerNodeSet = slotsPerNodeSet
+        self.wallClock = wallClock
+        self.minNodeSets = minNodeSets
+        self.maxNodeSets = maxNodeSets
+        self.cooldown = cooldown
+        self.maxStep = maxStep
+        self.maxSubmitsPerHour = maxSubmitsPerHour
+        self.idleGrace = idleGrace
+        self.clock = clock
+        # the node sets in the pool, oldest first; each entry also records
+        # when it was submitted and when it was last seen busy
+        self.nodeSets = []
+        self.lastChange = None
+        self.submitTimes = collections.deque()
+        self.stopped = threading.Event()
+
+    def getDesiredSize(self, idleJobs, busy):
+        """Return the pool size wanted for the given demand.
+        """
+        desired = busy + math.ceil(idleJobs / self.slotsPerNodeSet)
+        return max(self.minNodeSets, min(self.maxNodeSets, desired))
+
+    def step(self):
+        """Query the demand, and grow or shrink the pool once.
+
+        Returns
+        -------
+        action : `dict`
+            what was done, with the keys "idleJobs", "busy", "size",
+            "desired", "submitted" and "cancelled"
+        """
+        now = self.clock()
+        # node sets past their wall clock limit, or which the scheduler no
+        # longer lists, have ended on their own
+        self.nodeSets = [e for e in self.nodeSets if now - e["submitted"] < self.wallClock]
+        if self.nodeSets:
+            active = self.backend.getActiveJobs(self.nodeSets)
+            self.nodeSets = [e for e in self.nodeSets if e["jobId"] is None or e["jobId"] in active]
+        while self.submitTimes and now - self.submitTimes[0] >= 3600:
+            self.submitTimes.popleft()
+
+        idleJobs = self.query.getIdleJobs()
+        busyNames = self.query.getBusyNodeSets()
+        busy = 0
+        for entry in self.nodeSets:
+            if entry["nodeSet"] in busyNames:
+                entry["lastBusy"] = now
+                busy += 1
+
+        size = len(self.nodeSets)
+        desired = self.getDesiredSize(idleJobs, busy)
+        action = {"idleJobs": idleJobs, "busy": busy, "size": size, "desired": desired,
+                  "submitted": [], "cancelled": []}
+        if desired == size:
+            return action
+        if self.lastChange is not None and now - self.lastChange < self.cooldown:
+            return action
+
+        if desired > size:
+            count = min(desired - size, self.maxStep)
+            if self.maxSubmitsPerHour is not None:
+                count = min(count, self.maxSubmitsPerHour - len(self.submitTimes))
+            if count <= 0:
+                return action
+            entries = self.backend.submit(count, self.nodeSet)
+            for entry in entries:
+                entry["submitted"] = entry["lastBusy"] = now
+                self.submitTimes.append(now)
+            self.nodeSets.extend(entries)
+            action["submitted"] = [entry["nodeSet"] for entry in entries]
+        else:
+            idle = [e for e in reversed(self.nodeSets)
+                    if e["nodeSet"] not in busyNames and now - e["lastBusy"] >= self.idleGrace]
+            for entry in idle[:min(size - desired, self.maxStep)]:
+                if self.backend.cancel(entry):
+                    self.nodeSets.remove(entry)
+                    action["cancelled"].append(entry["nodeSet"])
+        if action["submitted"] or action["cancelled"]:
+            self.lastChange = now
+        return action
+
+    def stop(self, *args):
+        """Stop run() after the current step; usable as a signal handler.
+        """
+        self.stopped.set()
+
+    def run(self, interval=60, maxSteps=None, verbose=False):
+        """Step every interval seconds, until stopped by SIGTERM or SIGINT,
+        or until maxSteps steps have been taken.
+
+        Parameters
+        ----------
+        interval : `float`
+            seconds between steps
+        maxSteps : `int`, optional
+            the number of steps to take
+        verbose : `bool`
+            print each step's action
+        """
+        self.stopped.clear()
+        previous = {}
+        # signal handlers can only be set from the main thread
+        if threading.current_thread() is threading.main_thread():
+            previous = {sig: signal.signal(sig, self.stop) for sig in (signal.SIGTERM, signal.SIGINT)}
+        steps = 0
+        try:
+            while not self.stopped.is_set() and (maxSteps is None or steps < maxSteps):
+                try:
+                    action = self.step()
+                except RuntimeError as e:
+                    print("autoscaler: %s" % e)
+                else:
+                    if verbose or action["submitted"] or action["cancelled"]:
+                        print("autoscaler: idle jobs %(idleJobs)d, busy node sets %(busy)d, "
+                              "pool %(size)d -> %(desired)d, submitted %(submitted)s, "
+                              "cancelled %(cancelled)s" % action)
+                steps += 1
+                if maxSteps is None or steps < maxSteps:
+                    self.stopped.wait(interval)
+        finally:
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
@@ -0,0 +1,281 @@
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import json
+import os
+import sys
+from lsst.ctrl.execute import envString
+from lsst.ctrl.execute.allocator import Allocator
+from lsst.ctrl.execute.allocatorParser import AllocatorParser
+from lsst.ctrl.execute.configCache import getPlatformDir, loadConfig
+from lsst.ctrl.execute.namedClassFactory import NamedClassFactory
+from lsst.ctrl.execute.seqFile import SeqAllocator, SeqFile
+
+
+def readManifest(fileName):
+    """Read a manifest of allocation requests.
+
+    The manifest is either a JSON list of requests, or JSON lines with one
+    request per line.  Each request is a dictionary keyed on the option
+    names used by AllocatorParser, for example::
+
+        {"platform": "lsst", "nodeCount": 4, "cpus": 12,
+         "maximumWallClock": "00:30:00", "queue": "normal", "dynamic": true}
+
+    Parameters
+    ----------
+    fileName : `str`
+        the manifest file name
+
+    Returns
+    -------
+    requests : `list` of `dict`
+        the allocation requests
+    """
+    with open(fileName) as f:
+        text = f.read()
+    try:
+        requests = json.loads(text)
+    except ValueError:
+        try:
+            requests = [json.loads(line) for line in text.splitlines() if line.strip()]
+        except ValueError as e:
+            raise RuntimeError("couldn't read manifest %s: %s" % (fileName, e))
+    if isinstance(requests, dict):
+        requests = [requests]
+    if not isinstance(requests, list) or not all(isinstance(r, dict) for r in requests):
+        raise RuntimeError("manifest %s must contain allocation request objects" % fileName)
+    return requests
+
+
+class BulkAllocator:
+    """Submits many node allocation requests from a single process.
+
+    Each platform's configuration and scheduler plugin are loaded once, the
+    node set names the requests need are reserved together, and every
+    submit file is written before any of them are submitted.  Submissions
+    then run concurrently, at most maxConcurrent at a time.
+
+    Parameters
+    ----------
+    requests : `list` of `dict`
+        the allocation requests, as returned by readManifest
+    maxConcurrent : `int`
+        the maximum number of submissions to run at once
+    verbose : `bool`
+        default verbose flag for requests which don't set one
+    condorInfoFileName : `str`
+        Name of the file containing Config information
+    platformDirs : `dict`, optional
+        maps platform names to their package directories; platforms not
+        listed are looked up as the ctrl_platform_<platform> package
+    """
+
+    # the fields every request must supply
+    requiredFields = ("platform", "nodeCount", "cpus", "maximumWallClock")
+
+    def __init__(self, requests, maxConcurrent=8, verbose=False,
+                 condorInfoFileName="$HOME/.lsst/condor-info.py", platformDirs=None):
+        if maxConcurrent < 1:
+            raise RuntimeError("maxConcurrent must be at least 1, not %d" % maxConcurrent)
+        self.requests = requests
+        self.maxConcurrent = maxConcurrent
+        self.verbose = verbose
+        self.condorInfoFileName = condorInfoFileName
+        self.platformDirs = dict(platformDirs or {})
+        # platform name -> (platformPkgDir, configuration, schedulerClass)
+        self.platforms = {}
+
+    def makeOptions(self, request):
+        """Turn one request into the options AllocatorParser would have
+        produced for it on the command line.
+
+        Parameters
+        ----------
+        request : `dict`
+            the allocation request
+
+        Returns
+        -------
+        opts : `argparse.Namespace`
+            the options
+        """
+        missing = [name for name in self.requiredFields if request.get(name) is None]
+        if missing:
+            raise RuntimeError("request is missing %s" % ", ".join(missing))
+        argv = [str(request["platform"]),
+                "-n", str(request["nodeCount"]),
+                "-c", str(request["cpus"]),
+                "-m", str(request["maximumWallClock"])]
+        parser = AllocatorParser.makeParser("bulk")
+        try:
+            opts = parser.parse_args(argv)
+        except SystemExit:
+            raise RuntimeError("invalid request: %s" % " ".join(argv))
+        opts.verbose = self.verbose
+        for name, value in request.items():
+            if name in self.requiredFields:
+                continue
+            if not hasattr(opts, name):
+                raise RuntimeError("unknown request field %s" % name)
+            if name == "dynamic":
+                # true selects the platform's default dynamic slots block
+                if value is True:
+                    value = "__default__"
+                elif value is False:
+                    value = None
+            setattr(opts, name, value)
+        return opts
+
+    def getPlatform(self, platform):
+        """Load a platform's package directory, configuration and scheduler
+        plugin class, once.
+
+        Parameters
+        ----------
+        platform : `str`
+            the name of the platform
+
+        Returns
+        -------
+        platformPkgDir : `str`
+            the platform package directory
+        configuration : `ConfigSnapshot`
+            the platform's execConfig.py configuration
+        schedulerClass : `type`
+            the scheduler plugin class
+        """
+        if platform not in self.platforms:
+            platformPkgDir = self.platformDirs.get(platform)
+            if platformPkgDir is None:
+                platformPkgDir = getPlatformDir(platform)
+            execConfigName = os.path.join(platformPkgDir, "etc", "config", "execConfig.py")
+            configuration = loadConfig("lsst.ctrl.execute.condorConfig", envString.resolve(execConfigName))
+            schedulerName = configuration.platform.scheduler
+            schedulerClass = NamedClassFactory.createClass("lsst.ctrl.execute." + schedulerName + "Plugin")
+            self.platforms[platform] = (platformPkgDir, configuration, schedulerClass)
+        return self.platforms[platform]
+
+    def reserveNodeSetNames(self, schedulers):
+        """Give every scheduler without a node set name a new one, reserving
+        all of their sequence numbers in a single update of the sequence
+        file.
+
+        Parameters
+        ----------
+        schedulers : `list` of `Allocator`
+            the schedulers that need node set names
+        """
+        if not schedulers:
+            return
+        nodeSetSeq = SeqAllocator(SeqFile(Allocator.nodeSetSeqFileName), blockSize=len(schedulers))
+        for scheduler in schedulers:
+            scheduler.nodeSetSeq = nodeSetSeq
+            scheduler.opts.nodeSet = scheduler.createNodeSetName()
+
+    def run(self):
+        """Prepare and submit every request.
+
+        Returns
+        -------
+        results : `list` of `dict`
+            one result per request, in manifest order, with the keys
+            "index", "platform", "nodeSet", "status", "exitCode", "jobId",
+            "error" and "allocator", the scheduler plugin which handled the
+            request
+        """
+        results = []
+        schedulers = []
+        for index, request in enumerate(self.requests):
+            result = {"index": index, "platform": request.get("platform"), "nodeSet": None,
+                      "status": "failed", "exitCode": None, "jobId": None, "error": None,
+                      "allocator": None}
+            results.append(result)
+            try:
+                opts = self.makeOptions(request)
+                platformPkgDir, configuration, schedulerClass = self.getPlatform(opts.platform)
+                scheduler = schedulerClass(opts.platform, opts, configuration, self.condorInfoFileName)
+            except (Exception, SystemExit) as e:
+                result["error"] = str(e)
+                schedulers.append(None)
+                continue
+            schedulers.append((scheduler, platformPkgDir))
+            result["allocator"] = scheduler
+
+        self.reserveNodeSetNames([entry[0] for entry in schedulers
+                                  if entry is not None and entry[0].opts.nodeSet is None])
+
+        # write every file before submitting anything
+        for result, entry in zip(results, schedulers):
+            if entry is None:
+                continue
+            scheduler, platformPkgDir = entry
+            result["nodeSet"] = scheduler.opts.nodeSet
+            try:
+                scheduler.prepare(result["platform"], platformPkgDir)
+                result["status"] = "prepared"
+            except (Exception, SystemExit) as e:
+                result["error"] = str(e)
+
+        # prune old generated files now every new file is written, keeping
+        # the directories this run wrote to; after the first, prunes of the
+        # same configs directory are skipped until the prune interval passes
+        prepared = [entry[0] for result, entry in zip(results, schedulers) if result["status"] == "prepared"]
+        configDirs = [scheduler.configDir for scheduler in prepared]
+        for scheduler in prepared:
+            scheduler.pruneConfigs(keep=configDirs)
+
+        def submit(result, scheduler):
+            try:
+                submitResult = scheduler.submitPrepared()
+            except (Exception, SystemExit) as e:
+                result["error"] = str(e)
+                result["status"] = "failed"
+                return
+            result["exitCode"] = submitResult.exitCode
+            result["jobId"] = submitResult.jobId
+            result["status"] = "submitted" if submitResult.ok else "failed"
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=self.maxConcurrent) as executor:
+            for result, entry in zip(results, schedulers):
+                if result["status"] == "prepared":
+                    executor.submit(submit, result, entry[0])
+        return results
+
+    @staticmethod
+    def formatResults(results, out=sys.stdout):
+        """Write a table of results.
+
+        Parameters
+        ----------
+        results : `list` of `dict`
+            the results returned by run()
+        out : file-like
+            where to write the table
+        """
+        fmt = "%-5s %-12s %-24s %-10s %-5s %-16s %s\n"
+        out.write(fmt % ("index", "platform", "node set", "status", "exit", "job id", "error"))
+        for r in results:
+            out.write(fmt % (r["index"], r["platform"], r["nodeSet"] or "-", r["status"],
+                             "-" if r["exitCode"] is None else r["exitCode"], r["jobId"] or "-",
+                             r["error"] or ""))
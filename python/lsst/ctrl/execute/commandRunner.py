@@ -0,0 +1,184 @@
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import shlex
+import subprocess
+import time
+
+
+class CommandResult:
+    """The outcome of running a command.
+
+    Parameters
+    ----------
+    args : `list` of `str`
+        the command that was run
+    exitCode : `int`
+        the command's exit code; negative if it was killed by a signal, and
+        127 if it couldn't be started
+    stdout : `str`
+        the command's standard output, if it was captured
+    stderr : `str`
+        the command's standard error, if it was captured
+    elapsed : `float`
+        seconds the command took
+    timedOut : `bool`
+        True if the command was killed because it ran out of time
+    """
+
+    def __init__(self, args, exitCode, stdout=None, stderr=None, elapsed=0.0, timedOut=False):
+        self.args = args
+        self.exitCode = exitCode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.elapsed = elapsed
+        self.timedOut = timedOut
+
+    @property
+    def ok(self):
+        """True if the command exited with status 0.
+        """
+        return self.exitCode == 0
+
+    def __repr__(self):
+        return "CommandResult(%r, exitCode=%d, elapsed=%.3f, timedOut=%s)" % (
+            " ".join(self.args), self.exitCode, self.elapsed, self.timedOut)
+
+
+def splitCommand(cmd):
+    """Split a command line into its arguments, the way the shell would.
+
+    Parameters
+    ----------
+    cmd : `str` or `list` of `str`
+        the command line, or an already split command
+
+    Returns
+    -------
+    args : `list` of `str`
+        the arguments
+    """
+    if isinstance(cmd, str):
+        return shlex.split(cmd)
+    return list(cmd)
+
+
+def runCommand(cmd, timeout=None, input=None, cwd=None, capture=True, verbose=False):
+    """Run a command, and wait for it to finish.
+
+    Parameters
+    ----------
+    cmd : `str` or `list` of `str`
+        the command line; strings are split with shell quoting rules, but
+        not run by a shell
+    timeout : `float`, optional
+        seconds to wait before killing the command
+    input : `str` or `bytes`, optional
+        data sent to the command's stdin; otherwise stdin is empty
+    cwd : `str`, optional
+        directory to run the command in
+    capture : `bool`
+        capture the command's standard output and error
+    verbose : `bool`
+        if output isn't captured, let the command write to this process's
+        output; otherwise it's discarded
+
+    Returns
+    -------
+    result : `CommandResult`
+        the outcome of the command
+    """
+    args = splitCommand(cmd)
+    if isinstance(input, str):
+        input = input.encode()
+    if capture:
+        output = subprocess.PIPE
+    else:
+        output = None if verbose else subprocess.DEVNULL
+    start = time.time()
+    try:
+        proc = subprocess.Popen(args, stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+                                stdout=output, stderr=output, cwd=cwd)
+    except OSError as e:
+        return CommandResult(args, 127, "" if capture else None, str(e) if capture else None,
+                             time.time() - start)
+    timedOut = False
+    try:
+        stdout, stderr = proc.communicate(input, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        stdout, stderr = proc.communicate()
+        timedOut = True
+    if capture:
+        stdout = stdout.decode(errors="replace")
+        stderr = stderr.decode(errors="replace")
+    return CommandResult(args, proc.returncode, stdout, stderr, time.time() - start, timedOut)
+
+
+class CommandPool:
+    """Runs commands concurrently, at most maxWorkers of them at a time.
+
+    Parameters
+    ----------
+    maxWorkers : `int`
+        the maximum number of commands running at once
+    """
+
+    def __init__(self, maxWorkers=8):
+        if maxWorkers < 1:
+            raise RuntimeError("maxWorkers must be at least 1, not %d" % maxWorkers)
+        # concurrent.futures pulls in logging; most commands never need it
+        from concurrent.futures import ThreadPoolExecutor
+        self.executor = ThreadPoolExecutor(max_workers=maxWorkers)
+
+    def submit(self, cmd, **kwargs):
+        """Start running a command; kwargs are passed to runCommand.
+
+        Returns
+        -------
+        future : `concurrent.futures.Future`
+            the future whose result is the command's `CommandResult`
+        """
+        return self.executor.submit(runCommand, cmd, **kwargs)
+
+    def runAll(self, cmds, **kwargs):
+        """Run every command, and wait for all of them to finish; kwargs
+        are passed to runCommand.
+
+        Returns
+        -------
+        results : `list` of `CommandResult`
+            the outcomes, in the same order as cmds
+        """
+        futures = [self.submit(cmd, **kwargs) for cmd in cmds]
+        return [future.result() for future in futures]
+
+    def close(self):
+        """Wait for running commands, and release the pool's threads.
+        """
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
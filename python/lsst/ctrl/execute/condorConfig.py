@@ -41,6 +41,12 @@ class PlatformConfig(pexConfig.Config):
     setup_using = pexConfig.Field(doc="environment setup type", dtype=str, default=None)
     manager_software_home = pexConfig.Field(doc="location of workflow manager software",
                                             dtype=str, default=None)
+    shardConfigs = pexConfig.Field(doc="write generated files into date/hash sharded subdirectories "
+                                   "of the local configs directory", dtype=bool, default=False)
+    configRetentionDays = pexConfig.Field(doc="days to keep sharded generated files (None keeps them)",
+                                          dtype=int, default=None)
+    configRetentionCount = pexConfig.Field(doc="maximum number of sharded generated files to keep "
+                                           "(None for no limit)", dtype=int, default=None)
 
 
 class CondorConfig(pexConfig.Config):
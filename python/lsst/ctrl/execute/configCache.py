@@ -0,0 +1,369 @@
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import hashlib
+import importlib.util
+import os
+import re
+import sys
+import threading
+from collections.abc import Mapping, Sequence
+from lsst.ctrl.execute.marshalStore import MarshalStore
+from lsst.ctrl.execute.namedClassFactory import NamedClassFactory
+from lsst.ctrl.execute.timing import timer
+
+# loaded configurations, keyed on the config class, resolved file name and
+# the values of the environment variables the file reads
+_configs = {}
+_lock = threading.Lock()
+
+# environment variables a config file reads, which its snapshot depends on:
+# through os.environ or os.getenv, or as $NAME or ${NAME} expanded by
+# envString.resolve or os.path.expandvars
+_environPattern = re.compile(r"""(?:environ\s*\[\s*|environ\.get\s*\(\s*|getenv\s*\(\s*)['"](\w+)['"]"""
+                             r"""|\$\{?([A-Za-z_]\w*)""")
+
+# calls through which a config file may read other files, whose changes
+# its snapshot couldn't follow
+_includePattern = re.compile(r"\b(?:load|loadFromStream|exec|execfile|open)\s*\(")
+
+# what each config file reads, as (environment variable names, whether it
+# reads other files), keyed on the resolved file name and its modification
+# time and size
+_sources = {}
+
+
+class ConfigSnapshot:
+    """A plain copy of the values of a loaded pex_config Config.
+
+    Fields are read as they are from the Config: nested Configs are
+    ConfigSnapshots, choice and dictionary fields holding Configs are
+    ConfigSnapshotDicts, and every other value is a plain Python value.
+    Reading a snapshot doesn't need lsst.pex.config to be imported.
+
+    Parameters
+    ----------
+    values : `dict`
+        field values, keyed by field name
+    """
+
+    def __init__(self, values):
+        self.__dict__.update(values)
+
+    def toDict(self):
+        """The field values, with nested snapshots also made into dicts.
+        """
+        return {name: _toDict(value) for name, value in self.__dict__.items()}
+
+    def __eq__(self, other):
+        return isinstance(other, ConfigSnapshot) and self.__dict__ == other.__dict__
+
+    def __repr__(self):
+        return "ConfigSnapshot(%r)" % self.toDict()
+
+
+class ConfigSnapshotDict(dict):
+    """The snapshot of a ConfigChoiceField or ConfigDictField: a dict of
+    ConfigSnapshots, keyed like the field.
+    """
+
+    def toDict(self):
+        return {name: _toDict(value) for name, value in self.items()}
+
+
+def _toDict(value):
+    if isinstance(value, (ConfigSnapshot, ConfigSnapshotDict)):
+        return value.toDict()
+    return value
+
+
+def _freeze(value):
+    """Convert a Config field value into marshal-friendly data, tagging
+    nested Configs and dicts of Configs so they can be rebuilt as snapshots.
+    """
+    if hasattr(value, "items") and hasattr(value, "_fields"):
+        return ("config", {name: _freeze(v) for name, v in value.items()})
+    if isinstance(value, Mapping):
+        items = {name: _freeze(v) for name, v in value.items()}
+        if any(hasattr(v, "_fields") for v in value.values()):
+            return ("configs", items)
+        return ("value", items)
+    if isinstance(value, Sequence) and not isinstance(value, (str, bytes)):
+        return ("value", [_freeze(v)[1] for v in value])
+    return ("value", value)
+
+
+def _thaw(data):
+    """Rebuild a value frozen by _freeze.
+    """
+    tag, value = data
+    if tag == "config":
+        return ConfigSnapshot({name: _thaw(v) for name, v in value.items()})
+    if tag == "configs":
+        return ConfigSnapshotDict((name, _thaw(v)) for name, v in value.items())
+    if isinstance(value, dict):
+        return {name: _thaw(v) for name, v in value.items()}
+    return value
+
+
+def _classKey(configClass):
+    """The module and class name of a config class, or of the class a
+    NamedClassFactory name refers to, without importing it.
+    """
+    if isinstance(configClass, str):
+        dot = configClass.rindex('.')
+        className = configClass[dot+1:]
+        return configClass, className[0].capitalize() + className[1:]
+    return configClass.__module__, configClass.__qualname__
+
+
+def _moduleFile(moduleName):
+    """The source file of a module, found without importing it.
+    """
+    module = sys.modules.get(moduleName)
+    if module is not None:
+        return getattr(module, "__file__", None)
+    try:
+        spec = importlib.util.find_spec(moduleName)
+    except (ImportError, ValueError):
+        return None
+    return None if spec is None else spec.origin
+
+
+def makeSnapshot(config):
+    """Take a snapshot of a loaded pex_config Config.
+
+    Parameters
+    ----------
+    config : `lsst.pex.config.Config`
+        the configuration
+
+    Returns
+    -------
+    snapshot : `ConfigSnapshot`
+        the snapshot
+    """
+    return _thaw(_freeze(config))
+
+
+class ConfigSnapshotStore(MarshalStore):
+    """An on-disk store of config snapshots, so a new process can skip
+    executing config files that an earlier one has already loaded.
+
+    Entries are keyed on the config class (and the modification time of
+    the module defining it), the config file's name, modification time and
+    size, and the values of any environment variables the file reads.
+    Config files which may read other files, with config.load, exec or
+    open, are executed every time instead, since their snapshots couldn't
+    tell when those files change.
+
+    Parameters
+    ----------
+    directory : `str`, optional
+        directory to keep snapshots in; defaults to
+        $XDG_CACHE_HOME/ctrl_execute/configs
+    """
+
+    name = "configs"
+
+    def getPath(self, configClass, path, stamp):
+        """The file name a snapshot of this config file is stored under.
+        """
+        moduleName, className = _classKey(configClass)
+        try:
+            classStamp = os.stat(_moduleFile(moduleName)).st_mtime_ns
+        except (TypeError, OSError):
+            classStamp = None
+        key = repr((self.version, moduleName, className, classStamp,
+                    path, stamp, list(_environValues(path, stamp))))
+        return os.path.join(self.directory, "%s.snap" % hashlib.sha256(key.encode()).hexdigest())
+
+    def get(self, configClass, path, stamp):
+        """Retrieve the snapshot of a config file, loading the file and
+        storing its snapshot if it isn't already stored.
+
+        Parameters
+        ----------
+        configClass : `type` or `str`
+            the pex_config Config class to load the file into, or its
+            NamedClassFactory name
+        path : `str`
+            the resolved config file name
+        stamp : `tuple`
+            the file's modification time and size
+
+        Returns
+        -------
+        snapshot : `ConfigSnapshot`
+            the snapshot of the loaded configuration
+        """
+        if _scanSource(path, stamp)[1]:
+            return makeSnapshot(_execConfig(configClass, path))
+        snapshotPath = self.getPath(configClass, path, stamp)
+        data = self.load(snapshotPath)
+        if data is not None:
+            self.hits += 1
+            return _thaw(data)
+        self.misses += 1
+        data = _freeze(_execConfig(configClass, path))
+        self.save(snapshotPath, data)
+        return _thaw(data)
+
+
+# the store used by loadConfig, unless snapshots are turned off by setting
+# $CTRL_EXECUTE_CONFIG_SNAPSHOTS to 0
+sharedSnapshotStore = ConfigSnapshotStore()
+
+
+def _scanSource(path, stamp):
+    """Find what a config file reads, scanning it once for each
+    modification time and size.
+
+    Returns
+    -------
+    names : `tuple` of `str`
+        the sorted names of the environment variables it reads
+    readsFiles : `bool`
+        True if it may read other files
+    """
+    info = _sources.get((path, stamp))
+    if info is None:
+        try:
+            with open(path, 'rb') as fp:
+                source = fp.read().decode(errors="replace")
+        except OSError:
+            source = ""
+        names = set(name or dollarName for name, dollarName in _environPattern.findall(source))
+        info = (tuple(sorted(names)), _includePattern.search(source) is not None)
+        _sources[(path, stamp)] = info
+    return info
+
+
+def _environValues(path, stamp):
+    """The current values of the environment variables a config file
+    reads, as sorted (name, value) pairs.
+
+    The values are looked up each time, since a long-running process, like
+    the execute daemon, runs requests under different environments.
+    """
+    return tuple((name, os.environ.get(name)) for name in _scanSource(path, stamp)[0])
+
+
+def _execConfig(configClass, path):
+    if isinstance(configClass, str):
+        configClass = NamedClassFactory.createClass(configClass)
+    with timer.span("loadConfig", path):
+        config = configClass()
+        config.load(path)
+    return config
+
+
+def loadConfig(configClass, fileName, store=None):
+    """Load a pex_config file, reusing the configuration already loaded
+    from it by this process, or a snapshot saved by an earlier process, if
+    the file hasn't changed since.
+
+    The returned snapshot is shared, so callers must treat it as read-only.
+    The config class may be given by its NamedClassFactory name, such as
+    "lsst.ctrl.execute.condorConfig", so that neither it nor pex_config
+    are imported unless the file has to be executed.
+
+    Parameters
+    ----------
+    configClass : `type` or `str`
+        the pex_config Config class to load the file into, or its
+        NamedClassFactory name
+    fileName : `str`
+        the config file name
+    store : `ConfigSnapshotStore`, optional
+        the on-disk snapshot store to use; defaults to sharedSnapshotStore,
+        unless $CTRL_EXECUTE_CONFIG_SNAPSHOTS is 0
+
+    Returns
+    -------
+    config : `ConfigSnapshot`
+        the loaded configuration
+    """
+    path = os.path.realpath(fileName)
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    key = (_classKey(configClass), path, _environValues(path, stamp))
+    with _lock:
+        entry = _configs.get(key)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+    if store is None and os.environ.get("CTRL_EXECUTE_CONFIG_SNAPSHOTS", "1") != "0":
+        store = sharedSnapshotStore
+    if store is None:
+        config = makeSnapshot(_execConfig(configClass, path))
+    else:
+        config = store.get(configClass, path, stamp)
+    with _lock:
+        _configs[key] = (stamp, config)
+    return config
+
+
+def clearConfigs():
+    """Forget every loaded configuration.
+    """
+    with _lock:
+        _configs.clear()
+        _sources.clear()
+
+
+def getPackageDir(packageName):
+    """Find the directory of a package.
+
+    $<PACKAGE>_DIR, as set up by EUPS, is used directly; lsst.utils is
+    only imported and asked when it isn't set.
+
+    Parameters
+    ----------
+    packageName : `str`
+        the package name
+
+    Returns
+    -------
+    directory : `str`
+        the package directory
+    """
+    directory = os.environ.get(packageName.upper() + "_DIR")
+    if directory:
+        return directory
+    import lsst.utils
+    return lsst.utils.getPackageDir(packageName)
+
+
+def getPlatformDir(platform):
+    """Find the directory of the ctrl_platform package for a platform.
+
+    Parameters
+    ----------
+    platform : `str`
+        the platform name
+
+    Returns
+    -------
+    directory : `str`
+        the package directory
+    """
+    return getPackageDir("ctrl_platform_" + platform)
@@ -0,0 +1,256 @@
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import hashlib
+import os
+import shutil
+import time
+
+
+class ConfigLayout:
+    """The layout of the directory that generated scheduler, condor and
+    orca configuration files are written to, $LOCAL_SCRATCH/configs.
+
+    By default every file goes directly into that directory.  When sharded,
+    files go into configs/YYYY/MM/DD/<h>, where <h> is one hex digit of the
+    hash of the file's identifier, so no single directory grows without
+    bound, and old files can be removed a whole day at a time.
+
+    Each day directory keeps a small ".manifest" file with one line per
+    group of files written there, so it can be pruned by count without
+    listing the files themselves.
+
+    Parameters
+    ----------
+    localScratch : `str`
+        the local scratch directory
+    sharded : `bool`, optional
+        if True, use the date/hash sharded layout
+    """
+
+    # name of the per-day file counting the files written that day
+    manifestName = ".manifest"
+
+    # name of the file whose modification time records the last prune
+    stampName = ".last-prune"
+
+    def __init__(self, localScratch, sharded=False):
+        self.root = os.path.join(localScratch, "configs")
+        self.sharded = sharded
+
+    def getDirectory(self, ident, now=None):
+        """The directory files for ident are written to.
+
+        Parameters
+        ----------
+        ident : `str`
+            the unique identifier or run id the files are named after
+        now : `float`, optional
+            the time the files are written, in seconds since the epoch
+
+        Returns
+        -------
+        directory : `str`
+            the directory name
+        """
+        if not self.sharded:
+            return self.root
+        day = time.strftime("%Y/%m/%d", time.localtime(now))
+        shard = hashlib.sha1(ident.encode()).hexdigest()[0]
+        return os.path.join(self.root, day, shard)
+
+    def makeDirectory(self, ident, now=None):
+        """Create, if needed, the directory files for ident are written to.
+
+        Returns
+        -------
+        directory : `str`
+            the directory name
+        """
+        directory = self.getDirectory(ident, now)
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    def recordFiles(self, directory, count):
+        """Note that count files were written into directory, so the day
+        they belong to can later be pruned by count.
+        """
+        if not self.sharded or count == 0:
+            return
+        manifest = os.path.join(os.path.dirname(directory), self.manifestName)
+        with open(manifest, "a") as f:
+            f.write("%d\n" % count)
+
+    def listDays(self):
+        """The day directories of the sharded layout, oldest first.
+
+        Only the year, month and day directories are listed, never the
+        files.
+
+        Returns
+        -------
+        days : `list` of `tuple`
+            (time.struct_time of the day, directory name) for each day
+        """
+        days = []
+        for year in self._subdirectories(self.root, 4):
+            yearDir = os.path.join(self.root, year)
+            for month in self._subdirectories(yearDir, 2):
+                monthDir = os.path.join(yearDir, month)
+                for day in self._subdirectories(monthDir, 2):
+                    try:
+                        date = time.strptime("%s%s%s" % (year, month, day), "%Y%m%d")
+                    except ValueError:
+                        continue
+                    days.append((date, os.path.join(monthDir, day)))
+        return days
+
+    def countFiles(self, dayDir):
+        """The number of files written into a day directory, from its
+        manifest, or by listing it if there is no manifest.
+        """
+        try:
+            with open(os.path.join(dayDir, self.manifestName)) as f:
+                return sum(int(line) for line in f if line.strip())
+        except (OSError, ValueError):
+            count = 0
+            for dirPath, dirNames, fileNames in os.walk(dayDir):
+                count += len([n for n in fileNames if n != self.manifestName])
+            return count
+
+    def prune(self, maxAgeDays=None, maxCount=None, limit=None, dryRun=False, now=None, keep=()):
+        """Remove whole days of generated files, oldest first.
+
+        The current day is never removed, nor any day holding one of the
+        directories in keep, since jobs submitted from them may still be
+        waiting to read their files.  Their files still count towards
+        maxCount.
+
+        Parameters
+        ----------
+        maxAgeDays : `int`, optional
+            remove days older than this many days
+        maxCount : `int`, optional
+            keep only the newest days whose files add up to at most this
+            many
+        limit : `int`, optional
+            remove at most this many days, so pruning can be done a little
+            at a time
+        dryRun : `bool`, optional
+            if True, only report what would be removed
+        now : `float`, optional
+            the current time, in seconds since the epoch
+        keep : iterable of `str`, optional
+            directories being written to, whose days must be kept
+
+        Returns
+        -------
+        removed : `list` of `str`
+            the day directories removed
+        """
+        if now is None:
+            now = time.time()
+        days = self.listDays()
+        kept = {os.path.realpath(os.path.join(self.root, time.strftime("%Y/%m/%d", time.localtime(now))))}
+        kept.update(os.path.realpath(os.path.dirname(directory)) for directory in keep)
+        expired = set()
+        if maxAgeDays is not None:
+            cutoff = time.strftime("%Y%m%d", time.localtime(now - maxAgeDays * 86400))
+            expired.update(path for date, path in days if time.strftime("%Y%m%d", date) < cutoff)
+        if maxCount is not None:
+            total = 0
+            for date, path in reversed(days):
+                if path in expired:
+                    continue
+                total += self.countFiles(path)
+                if total > maxCount:
+                    expired.add(path)
+        removed = [path for date, path in days if path in expired and os.path.realpath(path) not in kept]
+        if limit is not None:
+            removed = removed[:limit]
+        if dryRun:
+            return removed
+        for path in removed:
+            shutil.rmtree(path, ignore_errors=True)
+            # remove the month and year directories once they're empty
+            for parent in (os.path.dirname(path), os.path.dirname(os.path.dirname(path))):
+                try:
+                    os.rmdir(parent)
+                except OSError:
+                    break
+        if os.path.isdir(self.root):
+            with open(os.path.join(self.root, self.stampName), "w"):
+                pass
+        return removed
+
+    def pruneFlat(self, maxAgeDays, dryRun=False, now=None):
+        """Remove files older than maxAgeDays from directly within the
+        configs directory, where they were written before the layout was
+        sharded.  This lists the whole directory, so it is meant to be run
+        once, by hand.
+
+        Returns
+        -------
+        removed : `list` of `str`
+            the files removed
+        """
+        if now is None:
+            now = time.time()
+        cutoff = now - maxAgeDays * 86400
+        removed = []
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.startswith(".") and entry.stat().st_mtime < cutoff:
+                    removed.append(entry.path)
+        if not dryRun:
+            for path in removed:
+                os.remove(path)
+        return removed
+
+    def maybePrune(self, maxAgeDays=None, maxCount=None, interval=3600, limit=10, keep=()):
+        """Prune a few days, if there's a retention policy and no prune was
+        done within the last interval seconds.  This is meant to be called
+        after the new files have been written, with their directories in
+        keep.
+
+        Returns
+        -------
+        removed : `list` of `str`
+            the day directories removed
+        """
+        if not self.sharded or (maxAgeDays is None and maxCount is None):
+            return []
+        try:
+            if os.stat(os.path.join(self.root, self.stampName)).st_mtime > time.time() - interval:
+                return []
+        except OSError:
+            pass
+        return self.prune(maxAgeDays=maxAgeDays, maxCount=maxCount, limit=limit, keep=keep)
+
+    def _subdirectories(self, directory, width):
+        try:
+            with os.scandir(directory) as entries:
+                names = [e.name for e in entries
+                         if e.is_dir() and len(e.name) == width and e.name.isdigit()]
+        except OSError:
+            return []
+        return sorted(names)
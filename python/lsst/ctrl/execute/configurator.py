@@ -24,16 +24,17 @@
 import os
 import os.path
 import pwd
+import sqlite3
 import sys
 
-import lsst.utils
-import eups
-from datetime import datetime
 from string import Template
-from .templateWriter import TemplateWriter
-from .condorConfig import CondorConfig
-from .condorInfoConfig import CondorInfoConfig
+from .templateCache import sharedTemplateCache
+from .templateWriter import LazyValue, TemplateWriter, resolveValue
+from .configCache import getPackageDir, getPlatformDir, loadConfig
+from .configLayout import ConfigLayout
+from .registry import Registry
 from lsst.ctrl.execute import envString
+from lsst.ctrl.execute.uniqueId import createUniqueId
 
 
 class Configurator:
@@ -49,13 +50,17 @@ class Configurator:
         self.opts = opts
         self.setup_using = None
         self.manager = None
+        self.shardConfigs = False
+        self.configRetentionDays = None
+        self.configRetentionCount = None
+        self.templateWriter = TemplateWriter(cache=sharedTemplateCache, atomic=True, skipUnchanged=True)
+        self.registryFileName = Registry.defaultFileName
 
         self.defaults = {}
 
         fileName = envString.resolve(configFileName)
 
-        condorInfoConfig = CondorInfoConfig()
-        condorInfoConfig.load(fileName)
+        condorInfoConfig = loadConfig("lsst.ctrl.execute.condorInfoConfig", fileName)
 
         self.platform = self.opts.platform
 
@@ -139,7 +144,7 @@ class Configurator:
         on which target environment jobs will be running on.
         @return the name of the orca config template
         """
-        executePkgDir = lsst.utils.getPackageDir('ctrl_execute')
+        executePkgDir = getPackageDir('ctrl_execute')
 
         name = "config_with_%s.py.template" % self.setup_using
         genericConfigName = os.path.join(executePkgDir,
@@ -153,11 +158,9 @@ class Configurator:
         """create a unique runid
         @return runid
         """
-        # runid is in the form of <login>_YYYY_MMDD_HHMMSS
-        now = datetime.now()
-        username = pwd.getpwuid(os.geteuid()).pw_name
-        runid = "%s_%02d_%02d%02d_%02d%02d%02d" % (username, now.year, now.month,
-                                                   now.day, now.hour, now.minute, now.second)
+        # runid is in the form of
+        # <login>_YYYY_MMDD_HHMMSS_uuuuuu_<host>_<pid>_<n>
+        runid = createUniqueId()
         self.runid = runid
         return runid
 
@@ -169,6 +172,7 @@ class Configurator:
         environment that jobs will use.
         @return string containing all setup commands, one per line.
         """
+        import eups
         e = eups.Eups()
         setupProducts = e.getSetupProducts()
         a = ""
@@ -202,8 +206,7 @@ class Configurator:
         data structures suitable for use by the TemplateWriter object.
         """
         resolvedName = envString.resolve(name)
-        configuration = CondorConfig()
-        configuration.load(resolvedName)
+        configuration = loadConfig("lsst.ctrl.execute.condorConfig", resolvedName)
         self.defaults = {}
 
         if configuration.platform.nodeSetRequired and self.opts.nodeSet is None:
@@ -223,10 +226,13 @@ class Configurator:
         self.defaults["EUPS_PATH"] = configuration.platform.eupsPath
         self.defaults["MANAGER_SOFTWARE_HOME"] = configuration.platform.manager_software_home
 
-        platform_dir = lsst.utils.getPackageDir("ctrl_platform_"+self.opts.platform)
+        platform_dir = getPlatformDir(self.opts.platform)
         self.defaults["PLATFORM_DIR"] = platform_dir
         self.manager = configuration.platform.manager
         self.setup_using = configuration.platform.setup_using
+        self.shardConfigs = configuration.platform.shardConfigs
+        self.configRetentionDays = configuration.platform.configRetentionDays
+        self.configRetentionCount = configuration.platform.configRetentionCount
 
     def createConfiguration(self, input):
         """ creates a new Orca configuration file
@@ -236,24 +242,46 @@ class Configurator:
         resolvedInputName = envString.resolve(input)
         if self.opts.verbose:
             print("creating configuration using ", resolvedInputName)
-        template = TemplateWriter()
+        template = self.templateWriter
         substitutes = self.defaults.copy()
         for key in self.commandLineDefaults:
             val = self.commandLineDefaults[key]
             if val is not None:
                 substitutes[key] = self.commandLineDefaults[key]
 
-        substitutes["CTRL_EXECUTE_SETUP_PACKAGES"] = self.getSetupPackages()
+        # scanning the setup products is expensive, so only do it if the
+        # template actually uses them.
+        substitutes["CTRL_EXECUTE_SETUP_PACKAGES"] = LazyValue(self.getSetupPackages)
 
-        configDir = os.path.join(substitutes["LOCAL_SCRATCH"], "configs")
-        if not os.path.exists(configDir):
-            os.mkdir(configDir)
+        layout = ConfigLayout(substitutes["LOCAL_SCRATCH"], sharded=self.shardConfigs)
+        configDir = layout.makeDirectory(self.runid)
         self.outputFileName = os.path.join(configDir, "%s.config" % (self.runid))
         if self.opts.verbose:
             print("writing new configuration to ", self.outputFileName)
         template.rewrite(resolvedInputName, self.outputFileName, substitutes)
+        layout.recordFiles(configDir, 1)
+        layout.maybePrune(maxAgeDays=self.configRetentionDays, maxCount=self.configRetentionCount,
+                          keep=[configDir])
+        if self.opts.verbose and template.writesSkipped:
+            print("configuration unchanged; %d write(s) skipped" % template.writesSkipped)
+        self.recordRun()
         return self.outputFileName
 
+    def recordRun(self):
+        """Records this run, and its configuration file, in the registry.
+        Failing to record it isn't fatal.
+        @return the registry id of the run, or None if it couldn't be recorded
+        """
+        try:
+            with Registry(self.registryFileName) as registry:
+                return registry.recordRun(self.runid, self.platform,
+                                          nodeSet=self.getParameter("NODE_SET"),
+                                          userName=self.getParameter("USER_NAME"),
+                                          artifacts=[self.outputFileName])
+        except (sqlite3.Error, OSError) as e:
+            print("warning: couldn't record run in %s: %s" % (self.registryFileName, e))
+            return None
+
     def isVerbose(self):
         """Checks to see if verbose flag was set.
         @return value of verbose flag if it was set on the command line
@@ -266,9 +294,9 @@ class Configurator:
         override (if set), or the default Config value
         """
         if value in self.commandLineDefaults:
-            return self.commandLineDefaults[value]
+            return resolveValue(self.commandLineDefaults[value])
         if value in self.defaults:
-            return self.defaults[value]
+            return resolveValue(self.defaults[value])
         return None
 
     def getRunId(self):
@@ -24,23 +24,68 @@
 
 import re
 import os
-import sys
 
-# Given a string, look for any $ prefixed word, attempt to substitute
-# an environment variable with that name.
+# matches $VAR, ${VAR} and ${VAR:-default}
+_pattern = re.compile(r'\$(?:\{([a-zA-Z0-9_]+)(?::-([^}]*))?\}|([a-zA-Z0-9_]+))')
+
+# resolved strings, keyed on the environment snapshot they were resolved in.
+# Only the most recent snapshot is kept.
+_memo = {}
+
+
+def _replacer(env):
+    def replace(match):
+        name, default, plainName = match.groups()
+        if plainName is not None:
+            name = plainName
+        val = env.get(name)
+        if default is not None and not val:
+            return default
+        if val is None:
+            raise RuntimeError("couldn't find environment variable " + match.group(0))
+        return val
+    return replace
+
+
+# Given a string, look for any $VAR, ${VAR} or ${VAR:-default} reference,
+# and substitute the environment variable with that name; when a
+# ${VAR:-default} variable is unset or empty, default is used instead.
 # @throw exception if the environment variable doesn't exist
 # @return the resulting string
 
 
-def resolve(strVal):
-    p = re.compile(r'\$[a-zA-Z0-9_]+')
-    retVal = strVal
-    exprs = p.findall(retVal)
-    for i in exprs:
-        var = i[1:]
-        val = os.getenv(var, None)
-        if val is None:
-            raise RuntimeError("couldn't find environment variable "+i)
-            sys.exit(120)
-        retVal = p.sub(val, retVal, 1)
-    return retVal
+def resolve(strVal, env=None):
+    if env is None:
+        env = os.environ
+    if "$" not in strVal:
+        return strVal
+    return _pattern.sub(_replacer(env), strVal)
+
+
+# Resolve a list of strings against a single snapshot of the environment.
+# @param strVals the strings to resolve
+# @param env mapping to resolve against; defaults to a snapshot of os.environ
+# @param memoize if True, reuse strings already resolved against an
+#        identical environment snapshot
+# @throw exception if an environment variable doesn't exist
+# @return list of resolved strings
+
+
+def resolveMany(strVals, env=None, memoize=False):
+    if env is None:
+        env = dict(os.environ)
+    if not memoize:
+        return [resolve(strVal, env) for strVal in strVals]
+
+    key = frozenset(env.items())
+    cache = _memo.get(key)
+    if cache is None:
+        _memo.clear()
+        cache = _memo[key] = {}
+    retVals = []
+    for strVal in strVals:
+        retVal = cache.get(strVal)
+        if retVal is None:
+            retVal = cache[strVal] = resolve(strVal, env)
+        retVals.append(retVal)
+    return retVals
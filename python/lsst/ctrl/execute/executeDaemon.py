@@ -0,0 +1,310 @@
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import json
+import os
+import socket
+import sys
+from lsst.ctrl.execute import envString
+from lsst.ctrl.execute.atomicFile import getUmask
+
+defaultSocketName = "$HOME/.lsst/ctrl_execute.sock"
+
+# the commands a daemon runs for its clients
+daemonScripts = ("allocateNodes.py", "qdelete.py", "qstatus.py")
+
+
+def runInDaemon(scriptFile, argv, socketName=None):
+    """Ask a running ExecuteDaemon to run a command for this process.
+
+    The daemon runs the script's main() with this process's arguments,
+    environment, working directory, umask, stdin, stdout and stderr, so it
+    behaves as if it had been run here, except that the daemon's loaded
+    configurations, parsed templates and remote sessions are reused.
+
+    Parameters
+    ----------
+    scriptFile : `str`
+        the script whose main() is run
+    argv : `list` of `str`
+        the command line arguments, including the script name
+    socketName : `str`, optional
+        the daemon's socket; defaults to $CTRL_EXECUTE_DAEMON_SOCKET, or
+        defaultSocketName
+
+    Returns
+    -------
+    exitCode : `int`
+        the exit code of the command, or None if no daemon is running, or
+        $CTRL_EXECUTE_NO_DAEMON is set, and the command should be run in
+        this process instead
+    """
+    if os.environ.get("CTRL_EXECUTE_NO_DAEMON"):
+        return None
+    if socketName is None:
+        socketName = os.environ.get("CTRL_EXECUTE_DAEMON_SOCKET", defaultSocketName)
+    socketName = envString.resolve(socketName)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(socketName)
+        except OSError:
+            return None
+        request = {"script": os.path.realpath(scriptFile), "argv": list(argv), "cwd": os.getcwd(),
+                   "environ": dict(os.environ), "umask": getUmask()}
+        sys.stdout.flush()
+        sys.stderr.flush()
+        socket.send_fds(sock, [b"F"], [0, 1, 2])
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        with sock.makefile("rb") as fp:
+            line = fp.readline()
+        if not line:
+            raise RuntimeError("the ctrl_execute daemon at %s exited without replying" % socketName)
+        return json.loads(line.decode())["exitCode"]
+    finally:
+        sock.close()
+
+
+def stopDaemon(socketName=None):
+    """Ask a running ExecuteDaemon to exit.
+
+    Returns
+    -------
+    stopped : `bool`
+        True if a daemon was running
+    """
+    if socketName is None:
+        socketName = os.environ.get("CTRL_EXECUTE_DAEMON_SOCKET", defaultSocketName)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(envString.resolve(socketName))
+        except OSError:
+            return False
+        socket.send_fds(sock, [b"S"], [])
+        with sock.makefile("rb") as fp:
+            fp.readline()
+        return True
+    finally:
+        sock.close()
+
+
+class ExecuteDaemon:
+    """A long-running process which runs allocateNodes.py, qstatus.py and
+    qdelete.py for runInDaemon clients, one at a time, over a UNIX socket.
+
+    Everything the commands load and keep per process, such as
+    configurations, templates and remote sessions, stays loaded between
+    requests, so a command run by the daemon doesn't pay for starting an
+    interpreter, executing config files or logging in to the remote host.
+
+    Only the user running the daemon can connect to it.
+
+    Parameters
+    ----------
+    socketName : `str`, optional
+        the socket to listen on; environment variables are resolved.
+        Defaults to $CTRL_EXECUTE_DAEMON_SOCKET, or defaultSocketName
+    idleTimeout : `float`, optional
+        exit after this many seconds without a request; None waits forever
+    """
+
+    def __init__(self, socketName=None, idleTimeout=None):
+        if socketName is None:
+            socketName = os.environ.get("CTRL_EXECUTE_DAEMON_SOCKET", defaultSocketName)
+        self.socketName = envString.resolve(socketName)
+        self.idleTimeout = idleTimeout
+        self.mains = {}
+        self.requests = 0
+        self.sock = None
+        self.stopping = False
+
+    def listen(self):
+        """Create the socket, replacing a stale one left by a daemon which
+        didn't exit cleanly.
+        """
+        if os.path.exists(self.socketName):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socketName)
+                raise RuntimeError("a daemon is already listening on %s" % self.socketName)
+            except OSError:
+                os.unlink(self.socketName)
+            finally:
+                probe.close()
+        os.makedirs(os.path.dirname(self.socketName), exist_ok=True)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o177)
+        try:
+            self.sock.bind(self.socketName)
+        finally:
+            os.umask(umask)
+        self.sock.listen(16)
+        self.sock.settimeout(self.idleTimeout)
+
+    def serve(self):
+        """Handle requests until asked to stop, or idle for idleTimeout
+        seconds.
+        """
+        if self.sock is None:
+            self.listen()
+        try:
+            while not self.stopping:
+                try:
+                    connection, address = self.sock.accept()
+                except socket.timeout:
+                    break
+                with connection:
+                    connection.settimeout(None)
+                    try:
+                        self.handle(connection)
+                    except (OSError, ValueError, KeyError) as e:
+                        print("ctrl_execute daemon: bad request: %s" % e, file=sys.stderr)
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop listening, and remove the socket.
+        """
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+            try:
+                os.unlink(self.socketName)
+            except OSError:
+                pass
+
+    def handle(self, connection):
+        """Handle one client connection.
+        """
+        if hasattr(socket, "SO_PEERCRED"):
+            import struct
+            creds = connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+            pid, uid, gid = struct.unpack("3i", creds)
+            if uid != os.getuid():
+                raise OSError("refusing a request from uid %d" % uid)
+        kind, fds, flags, address = socket.recv_fds(connection, 1, 3)
+        try:
+            if kind == b"S":
+                self.stopping = True
+                connection.sendall(b"{}\n")
+                return
+            if kind != b"F" or len(fds) != 3:
+                raise ValueError("expected a command request")
+            with connection.makefile("rb") as fp:
+                request = json.loads(fp.readline().decode())
+            exitCode = self.runScript(request["script"], request["argv"], request["cwd"],
+                                      request["environ"], fds, request.get("umask"))
+            connection.sendall(json.dumps({"exitCode": exitCode}).encode() + b"\n")
+        finally:
+            for fd in fds:
+                os.close(fd)
+
+    def getMain(self, script):
+        """Return the main() of a script, loading it the first time it's
+        asked for, or if it has changed since.
+        """
+        if os.path.basename(script) not in daemonScripts:
+            raise ValueError("%s can't be run by the daemon" % script)
+        mtime = os.stat(script).st_mtime_ns
+        entry = self.mains.get(script)
+        if entry is None or entry[0] != mtime:
+            import runpy
+            scriptGlobals = runpy.run_path(script, run_name="__ctrl_execute_daemon__")
+            entry = (mtime, scriptGlobals["main"])
+            self.mains[script] = entry
+        return entry[1]
+
+    def runScript(self, script, argv, cwd, environ, fds, umask=None):
+        """Run a script's main() as if it were run by the client, with its
+        arguments, environment, working directory, umask and standard
+        streams.
+
+        Returns
+        -------
+        exitCode : `int`
+            the exit code of the command
+        """
+        main = self.getMain(script)
+        self.requests += 1
+        sys.stdout.flush()
+        sys.stderr.flush()
+        saved = [os.dup(fd) for fd in (0, 1, 2)]
+        savedArgv = sys.argv
+        savedEnviron = dict(os.environ)
+        savedCwd = os.getcwd()
+        savedUmask = None
+        try:
+            for fd, target in zip(fds, (0, 1, 2)):
+                os.dup2(fd, target)
+            sys.argv = list(argv)
+            os.environ.clear()
+            os.environ.update(environ)
+            os.chdir(cwd)
+            if umask is not None:
+                savedUmask = os.umask(umask)
+            try:
+                main()
+                exitCode = 0
+            except SystemExit as e:
+                if e.code is None:
+                    exitCode = 0
+                elif isinstance(e.code, int):
+                    exitCode = e.code
+                else:
+                    print(e.code, file=sys.stderr)
+                    exitCode = 1
+            except Exception:
+                import traceback
+                traceback.print_exc()
+                exitCode = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            if savedUmask is not None:
+                os.umask(savedUmask)
+            os.chdir(savedCwd)
+            os.environ.clear()
+            os.environ.update(savedEnviron)
+            sys.argv = savedArgv
+            for fd, target in zip(saved, (0, 1, 2)):
+                os.dup2(fd, target)
+                os.close(fd)
+        return exitCode
+
+
+def runMain(scriptFile, main):
+    """Run a command through a running daemon, or by calling main() in
+    this process if there isn't one, and exit with its exit code.
+
+    Parameters
+    ----------
+    scriptFile : `str`
+        the script being run
+    main : callable
+        the script's main()
+    """
+    exitCode = runInDaemon(scriptFile, sys.argv)
+    if exitCode is None:
+        main()
+    else:
+        sys.exit(exitCode)
@@ -0,0 +1,103 @@
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import marshal
+import os
+from lsst.ctrl.execute.atomicFile import writeAtomic
+
+
+def cacheDirectory(name):
+    """A directory under the user's cache directory ($XDG_CACHE_HOME, or
+    $HOME/.cache) for ctrl_execute to keep files in.
+
+    Parameters
+    ----------
+    name : `str`
+        the name of the directory
+
+    Returns
+    -------
+    directory : `str`
+        the directory name
+    """
+    cacheHome = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cacheHome, "ctrl_execute", name)
+
+
+class MarshalStore:
+    """Base class of the on-disk stores which keep marshalled entries, so
+    a new process can reuse the work of an earlier one.
+
+    Like .pyc files, entries are a best-effort cache: an unreadable entry,
+    or one written by a different version, is treated as missing, and
+    failures to save an entry are ignored.
+
+    Parameters
+    ----------
+    directory : `str`, optional
+        directory to keep entries in; defaults to cacheDirectory(name),
+        looked up each time it's used
+    """
+
+    # the name of the default directory under the cache directory
+    name = None
+
+    # the version of the entries' format; entries of other versions are
+    # ignored
+    version = 1
+
+    def __init__(self, directory=None):
+        self._directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def directory(self):
+        if self._directory is None:
+            return cacheDirectory(self.name)
+        return self._directory
+
+    def load(self, path):
+        """Read an entry.
+
+        Returns
+        -------
+        data : `object`
+            the entry's data, or None if there isn't a usable entry
+        """
+        try:
+            with open(path, 'rb') as fp:
+                version, data = marshal.loads(fp.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if version != self.version:
+            return None
+        return data
+
+    def save(self, path, data):
+        """Write an entry, atomically, ignoring any failure.
+        """
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            writeAtomic(path, marshal.dumps((self.version, data)))
+        except (OSError, ValueError):
+            pass
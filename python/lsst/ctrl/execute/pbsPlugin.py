@@ -22,32 +22,48 @@
 # see <http://www.lsstcorp.org/LegalNotices/>.
 #
 
+import io
 import os
-import sys
+import shlex
+import tarfile
 from string import Template
 
 from lsst.ctrl.execute.allocator import Allocator
+from lsst.ctrl.execute.remoteSession import getSession
 
 
 class PbsPlugin(Allocator):
 
-    def submit(self, platform, platformPkgDir):
-        # This have specific paths to prevent abitrary binaries from being
-        # executed. The "gsi"* utilities are configured to use either grid
-        # proxies or ssh, automatically.
-        remoteLoginCmd = "/usr/bin/gsissh"
-        remoteCopyCmd = "/usr/bin/gsiscp"
-
-        configName = os.path.join(platformPkgDir, "etc", "config", "pbsConfig.py")
-
-        self.loadPbs(configName)
+    def prepare(self, platform, platformPkgDir):
+        """Loads the PBS configuration and creates the files needed to
+        submit the allocation, without submitting it.
+        """
+        if self.opts.submitStdin or self.opts.keepSubmitFile:
+            raise RuntimeError("--submit-stdin and --keep-submit-file are only supported by slurm; "
+                               "use --bundle instead")
+        with self.timed("prepare"):
+            configName = os.path.join(platformPkgDir, "etc", "config", "pbsConfig.py")
+
+            self.loadPbs(configName)
+
+            pbsName = os.path.join(platformPkgDir, "etc", "templates", "generic.pbs.template")
+            self.generatedPbsFile = self.createSubmitFile(pbsName)
+
+            condorFile = os.path.join(platformPkgDir, "etc", "templates", "glidein_condor_config.template")
+            self.generatedCondorConfigFile = self.createCondorConfigFile(condorFile)
+
+    def submitPrepared(self):
+        """Copies the files created by prepare() to the remote login node,
+        runs qsub there, and records the allocation.
+
+        Returns
+        -------
+        result : `SubmitResult`
+            the outcome of the submission, with the job id qsub gave it
+        """
         verbose = self.isVerbose()
-
-        pbsName = os.path.join(platformPkgDir, "etc", "templates", "generic.pbs.template")
-        generatedPbsFile = self.createPbsFile(pbsName)
-
-        condorFile = os.path.join(platformPkgDir, "etc", "templates", "glidein_condor_config.template")
-        generatedCondorConfigFile = self.createCondorConfigFile(condorFile)
+        generatedPbsFile = self.generatedPbsFile
+        generatedCondorConfigFile = self.generatedCondorConfigFile
 
         scratchDirParam = self.getScratchDirectory()
         template = Template(scratchDirParam)
@@ -58,46 +74,175 @@ class PbsPlugin(Allocator):
 
         utilityPath = self.getUtilityPath()
 
+        # the commands share one connection to the login host, which stays
+        # open for later allocations to the same host.
+        session = getSession(userName, hostName, self.connectionPersist)
+
+        if self.opts.bundle:
+            with self.timed("qsub"):
+                exitCode, jobId = self.submitBundle(session, scratchDir)
+            if exitCode != 0:
+                print("error running %s to %s." % (session.loginCmd, hostName))
+            return self.makeSubmitResult(exitCode, jobId)
+
+        with self.timed("connect"):
+            session.startMaster(self.commandTimeout)
+
         #
         # execute copy of PBS file to XSEDE node
         #
-        cmd = "%s %s %s@%s:%s/%s" % (remoteCopyCmd, generatedPbsFile, userName,
-                                     hostName, scratchDir, os.path.basename(generatedPbsFile))
+        cmd = session.copyCommand(generatedPbsFile,
+                                  "%s/%s" % (scratchDir, os.path.basename(generatedPbsFile)))
         if verbose:
             print(cmd)
-        exitCode = self.runCommand(cmd, verbose)
+        with self.timed("copy"):
+            exitCode = self.runCommand(cmd, verbose)
         if exitCode != 0:
-            print("error running %s to %s." % (remoteCopyCmd, hostName))
-            sys.exit(exitCode)
+            print("error running %s to %s." % (session.copyCmd, hostName))
+            return self.makeSubmitResult(exitCode)
 
         #
         # execute copy of Condor config file to XSEDE node
         #
-        cmd = "%s %s %s@%s:%s/%s" % (remoteCopyCmd, generatedCondorConfigFile, userName,
-                                     hostName, scratchDir, os.path.basename(generatedCondorConfigFile))
+        cmd = session.copyCommand(generatedCondorConfigFile,
+                                  "%s/%s" % (scratchDir, os.path.basename(generatedCondorConfigFile)))
         if verbose:
             print(cmd)
-        exitCode = self.runCommand(cmd, verbose)
+        with self.timed("copy"):
+            exitCode = self.runCommand(cmd, verbose)
         if exitCode != 0:
-            print("error running %s to %s." % (remoteCopyCmd, hostName))
-            sys.exit(exitCode)
+            print("error running %s to %s." % (session.copyCmd, hostName))
+            return self.makeSubmitResult(exitCode)
 
         #
         # execute qsub command on XSEDE node to perform Condor glide-in
         #
-        cmd = "%s %s@%s %s/qsub %s/%s" % (remoteLoginCmd, userName, hostName,
-                                          utilityPath, scratchDir, os.path.basename(generatedPbsFile))
+        cmd = session.loginCommand("%s/qsub %s/%s" % (utilityPath, scratchDir,
+                                                      os.path.basename(generatedPbsFile)))
         if verbose:
             print(cmd)
-        exitCode = self.runCommand(cmd, verbose)
-        if exitCode != 0:
-            print("error running %s to %s." % (remoteLoginCmd, hostName))
-            sys.exit(exitCode)
-
-        self.printNodeSetInfo()
+        with self.timed("qsub"):
+            result = self.runCommandOutput(cmd, verbose)
+        if not result.ok:
+            print("error running %s to %s." % (session.loginCmd, hostName))
+            return self.makeSubmitResult(result.exitCode)
+
+        return self.makeSubmitResult(result.exitCode, self.parseJobId(result.stdout))
+
+    def cancel(self, jobId):
+        """Cancels a submitted allocation by running qdel on the login
+        host.
+
+        Parameters
+        ----------
+        jobId : `str`
+            the job id qsub gave the allocation
+
+        Returns
+        -------
+        exitCode : `int`
+            the exit code of qdel
+        """
+        session = getSession(self.getUserName(), self.getHostName(), self.connectionPersist)
+        session.startMaster(self.commandTimeout)
+        cmd = session.loginCommand("%s/qdel %s" % (self.getUtilityPath(), jobId))
+        result = self.runCommandOutput(cmd, self.isVerbose())
+        if not result.ok:
+            print("error running %s to %s." % (session.loginCmd, self.getHostName()))
+        return result.exitCode
+
+    def getActiveJobs(self):
+        """Lists the user's allocations which PBS still has queued, held,
+        waiting or running, with qselect on the login host.
+
+        Returns
+        -------
+        jobIds : `set` of `str`
+            the job ids qsub gave the allocations
+        """
+        session = getSession(self.getUserName(), self.getHostName(), self.connectionPersist)
+        remoteCommand = "%s/qselect -u %s -s EHQRSTW" % (self.getUtilityPath(), self.getUserName())
+        result = session.run(remoteCommand, timeout=self.commandTimeout)
+        if not result.ok:
+            raise RuntimeError("error running %s to %s: %s" %
+                               (session.loginCmd, self.getHostName(), result.stderr.strip()))
+        return set(result.stdout.split())
+
+    def makeBundle(self, fileNames):
+        """Create a gzipped tar archive holding the given files, under their
+        base names.
+
+        Parameters
+        ----------
+        fileNames : `list` of `str`
+            the files to archive
+
+        Returns
+        -------
+        bundle : `bytes`
+            the archive
+        """
+        buf = io.BytesIO()
+        with tarfile.open(fileobj=buf, mode="w:gz") as tar:
+            for name in fileNames:
+                tar.add(name, arcname=os.path.basename(name))
+        return buf.getvalue()
+
+    def submitBundle(self, session, scratchDir):
+        """Send the PBS and Condor config files to the login host as one
+        archive, and unpack it into the scratch directory and run qsub in
+        the same remote command.
+
+        Parameters
+        ----------
+        session : `RemoteSession`
+            the session with the login host
+        scratchDir : `str`
+            the remote scratch directory
+
+        Returns
+        -------
+        exitCode : `int`
+            the exit code of the remote command
+        jobId : `str`
+            the job id printed by qsub, or None if the command failed
+        """
+        bundle = self.makeBundle([self.generatedPbsFile, self.generatedCondorConfigFile])
+        qsub = os.path.join(self.getUtilityPath(), "qsub")
+        remoteCommand = "mkdir -p %s && cd %s && tar xzf - && %s %s" % (
+            shlex.quote(scratchDir), shlex.quote(scratchDir), shlex.quote(qsub),
+            shlex.quote(os.path.basename(self.generatedPbsFile)))
+        verbose = self.isVerbose()
+        if verbose:
+            print(session.loginCommand(remoteCommand))
+        result = session.run(remoteCommand, bundle, timeout=self.commandTimeout)
+        if verbose:
+            print(result.stdout, end="")
+        if not result.ok:
+            print(result.stderr, end="")
+            return result.exitCode, None
+        return result.exitCode, self.parseJobId(result.stdout)
+
+    def parseJobId(self, output):
+        """Finds the job id in the output of qsub, which prints it on its
+        last line.
+
+        Parameters
+        ----------
+        output : `str`
+            the output of qsub
+
+        Returns
+        -------
+        jobId : `str`
+            the job id, or None if there was no output
+        """
+        words = output.split()
+        return words[-1] if words else None
 
     def loadPbs(self, name):
         configuration = self.loadAllocationConfig(name, "pbs")
         template = Template(configuration.platform.scratchDirectory)
         scratchDir = template.substitute(USER_HOME=self.getUserHome())
         self.defaults["SCRATCH_DIR"] = scratchDir
+        self.connectionPersist = configuration.platform.connectionPersist
@@ -20,12 +20,11 @@
 # see <http://www.lsstcorp.org/LegalNotices/>.
 #
 
-import lsst.utils
-import os
 import os.path
 from lsst.ctrl.execute import envString
-from lsst.ctrl.execute.allocationConfig import AllocationConfig
-from lsst.ctrl.execute.condorInfoConfig import CondorInfoConfig
+from lsst.ctrl.execute.commandRunner import CommandPool, runCommand
+from lsst.ctrl.execute.configCache import getPlatformDir, loadConfig
+from lsst.ctrl.execute.remoteSession import getSession
 
 
 class QCommand:
@@ -43,29 +42,61 @@ class QCommand:
         configFileName = "$HOME/.lsst/condor-info.py"
         fileName = envString.resolve(configFileName)
 
-        condorInfoConfig = CondorInfoConfig()
-        condorInfoConfig.load(fileName)
+        condorInfoConfig = loadConfig("lsst.ctrl.execute.condorInfoConfig", fileName)
 
-        platformPkgDir = lsst.utils.getPackageDir("ctrl_platform_"+platform)
+        platformPkgDir = getPlatformDir(platform)
         configName = os.path.join(platformPkgDir, "etc", "config", "pbsConfig.py")
 
-        allocationConfig = AllocationConfig()
-        allocationConfig.load(configName)
+        allocationConfig = loadConfig("lsst.ctrl.execute.allocationConfig", configName)
 
         self.userName = condorInfoConfig.platform[platform].user.name
 
         self.hostName = allocationConfig.platform.loginHostName
         self.utilityPath = allocationConfig.platform.utilityPath
+        self.commandTimeout = allocationConfig.platform.commandTimeout
+
+        # commands share one connection to the login host, which is kept
+        # open between commands
+        self.session = getSession(self.userName, self.hostName, allocationConfig.platform.connectionPersist)
+
+    def loginCommand(self, remoteCommand):
+        """Build the command line running remoteCommand on the login host.
+        The shared connection is started when the command is run.
+
+        Returns
+        -------
+        cmd : `str`
+            the local command line
+        """
+        return self.session.loginCommand(remoteCommand)
 
     def runCommand(self, command):
         """Execute the command line
+
+        Returns
+        -------
+        exitCode : `int`
+            the exit code of the command
+        """
+        self.session.startMaster(self.commandTimeout)
+        return runCommand(command, capture=False, verbose=True).exitCode
+
+    def runCommands(self, commands, maxConcurrent=8):
+        """Execute several command lines concurrently, and collect their
+        output.
+
+        Parameters
+        ----------
+        commands : `list` of `str`
+            the command lines
+        maxConcurrent : `int`
+            the maximum number of commands running at once
+
+        Returns
+        -------
+        results : `list` of `CommandResult`
+            the outcome of each command, in order
         """
-        cmd_split = command.split()
-        pid = os.fork()
-        if not pid:
-            os.execvp(cmd_split[0], cmd_split)
-        pid, status = os.wait()
-        # low order bits of status contain the signal that killed the process
-        # high order bits of status contain the exit code
-        exitCode = (status & 0xff00) >> 8
-        return exitCode
+        self.session.startMaster(self.commandTimeout)
+        with CommandPool(maxConcurrent) as pool:
+            return pool.runAll(commands)
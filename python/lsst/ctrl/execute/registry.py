@@ -0,0 +1,266 @@
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import os
+import sqlite3
+import time
+from lsst.ctrl.execute import envString
+
+_schema = """
+CREATE TABLE IF NOT EXISTS allocations (
+    id INTEGER PRIMARY KEY,
+    node_set TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    scheduler TEXT,
+    job_id TEXT,
+    unique_id TEXT,
+    user_name TEXT,
+    submitted REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS allocations_node_set ON allocations (node_set);
+CREATE INDEX IF NOT EXISTS allocations_platform ON allocations (platform, submitted);
+CREATE INDEX IF NOT EXISTS allocations_submitted ON allocations (submitted);
+CREATE INDEX IF NOT EXISTS allocations_job_id ON allocations (job_id);
+
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    node_set TEXT,
+    user_name TEXT,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_run_id ON runs (run_id);
+CREATE INDEX IF NOT EXISTS runs_node_set ON runs (node_set);
+CREATE INDEX IF NOT EXISTS runs_platform ON runs (platform, created);
+CREATE INDEX IF NOT EXISTS runs_created ON runs (created);
+
+CREATE TABLE IF NOT EXISTS artifacts (
+    id INTEGER PRIMARY KEY,
+    allocation INTEGER REFERENCES allocations (id),
+    run INTEGER REFERENCES runs (id),
+    path TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS artifacts_allocation ON artifacts (allocation);
+CREATE INDEX IF NOT EXISTS artifacts_run ON artifacts (run);
+CREATE INDEX IF NOT EXISTS artifacts_created ON artifacts (created);
+"""
+
+
+class Registry:
+    """An SQLite database recording the node sets allocated, the runs
+    configured, and the files generated for each of them.
+
+    Parameters
+    ----------
+    fileName : `str`
+        the database file; environment variables are resolved
+    """
+
+    # the default location of the registry
+    defaultFileName = "$HOME/.lsst/ctrl_execute.sqlite3"
+
+    def __init__(self, fileName=None):
+        if fileName is None:
+            fileName = self.defaultFileName
+        self.fileName = envString.resolve(fileName)
+        dirName = os.path.dirname(os.path.abspath(self.fileName))
+        if not os.path.exists(dirName):
+            os.makedirs(dirName)
+        self.connection = sqlite3.connect(self.fileName, timeout=30)
+        self.connection.row_factory = sqlite3.Row
+        with self.connection:
+            self.connection.executescript(_schema)
+
+    def close(self):
+        """Close the database.
+        """
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def recordAllocation(self, nodeSet, platform, scheduler=None, jobId=None, uniqueId=None,
+                         userName=None, artifacts=(), submitted=None):
+        """Record a node set allocation, and the files generated for it.
+
+        Parameters
+        ----------
+        nodeSet : `str`
+            the node set name
+        platform : `str`
+            the platform the nodes were allocated on
+        scheduler : `str`, optional
+            the scheduler type ("slurm", "pbs")
+        jobId : `str`, optional
+            the scheduler's job id
+        uniqueId : `str`, optional
+            the identifier used in the generated file names
+        userName : `str`, optional
+            the user name on the platform
+        artifacts : iterable of `str`, optional
+            paths of the generated files
+        submitted : `float`, optional
+            submission time in seconds since the epoch; defaults to now
+
+        Returns
+        -------
+        allocationId : `int`
+            the registry id of the allocation
+        """
+        if submitted is None:
+            submitted = time.time()
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO allocations (node_set, platform, scheduler, job_id, unique_id, user_name, "
+                "submitted) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (nodeSet, platform, scheduler, jobId, uniqueId, userName, submitted))
+            allocationId = cursor.lastrowid
+            self.connection.executemany(
+                "INSERT INTO artifacts (allocation, path, created) VALUES (?, ?, ?)",
+                [(allocationId, os.path.abspath(path), submitted) for path in artifacts])
+        return allocationId
+
+    def recordRun(self, runId, platform, nodeSet=None, userName=None, artifacts=(), created=None):
+        """Record a run configuration, and the files generated for it.
+
+        Parameters
+        ----------
+        runId : `str`
+            the run id
+        platform : `str`
+            the platform the run executes on
+        nodeSet : `str`, optional
+            the node set the run uses
+        userName : `str`, optional
+            the user name on the platform
+        artifacts : iterable of `str`, optional
+            paths of the generated files
+        created : `float`, optional
+            creation time in seconds since the epoch; defaults to now
+
+        Returns
+        -------
+        runRecordId : `int`
+            the registry id of the run
+        """
+        if created is None:
+            created = time.time()
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (run_id, platform, node_set, user_name, created) VALUES (?, ?, ?, ?, ?)",
+                (runId, platform, nodeSet or None, userName, created))
+            runRecordId = cursor.lastrowid
+            self.connection.executemany(
+                "INSERT INTO artifacts (run, path, created) VALUES (?, ?, ?)",
+                [(runRecordId, os.path.abspath(path), created) for path in artifacts])
+        return runRecordId
+
+    def _select(self, table, timeColumn, filters, since, until, limit):
+        clauses = []
+        values = []
+        for column, value in filters:
+            if value is not None:
+                clauses.append("%s = ?" % column)
+                values.append(value)
+        if since is not None:
+            clauses.append("%s >= ?" % timeColumn)
+            values.append(since)
+        if until is not None:
+            clauses.append("%s < ?" % timeColumn)
+            values.append(until)
+        query = "SELECT * FROM %s" % table
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY %s DESC, id DESC" % timeColumn
+        if limit is not None:
+            query += " LIMIT %d" % limit
+        return [dict(row) for row in self.connection.execute(query, values)]
+
+    def findAllocations(self, platform=None, nodeSet=None, jobId=None, since=None, until=None, limit=None):
+        """Find recorded allocations, most recent first.
+
+        Parameters
+        ----------
+        platform, nodeSet, jobId : `str`, optional
+            only return allocations with these values
+        since, until : `float`, optional
+            only return allocations submitted in [since, until), in seconds
+            since the epoch
+        limit : `int`, optional
+            the maximum number of allocations to return
+
+        Returns
+        -------
+        allocations : `list` of `dict`
+            the matching allocations
+        """
+        filters = [("platform", platform), ("node_set", nodeSet), ("job_id", jobId)]
+        return self._select("allocations", "submitted", filters, since, until, limit)
+
+    def findRuns(self, platform=None, nodeSet=None, runId=None, since=None, until=None, limit=None):
+        """Find recorded runs, most recent first.
+
+        Parameters
+        ----------
+        platform, nodeSet, runId : `str`, optional
+            only return runs with these values
+        since, until : `float`, optional
+            only return runs created in [since, until), in seconds since the
+            epoch
+        limit : `int`, optional
+            the maximum number of runs to return
+
+        Returns
+        -------
+        runs : `list` of `dict`
+            the matching runs
+        """
+        filters = [("platform", platform), ("node_set", nodeSet), ("run_id", runId)]
+        return self._select("runs", "created", filters, since, until, limit)
+
+    def getArtifacts(self, allocationId=None, runRecordId=None):
+        """The files generated for an allocation or a run.
+
+        Parameters
+        ----------
+        allocationId : `int`, optional
+            the registry id of an allocation
+        runRecordId : `int`, optional
+            the registry id of a run
+
+        Returns
+        -------
+        paths : `list` of `str`
+            the generated file names
+        """
+        if allocationId is not None:
+            rows = self.connection.execute("SELECT path FROM artifacts WHERE allocation = ? ORDER BY id",
+                                           (allocationId,))
+        else:
+            rows = self.connection.execute("SELECT path FROM artifacts WHERE run = ? ORDER BY id",
+                                           (runRecordId,))
+        return [row["path"] for row in rows]
@@ -0,0 +1,240 @@
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import os
+import threading
+import time
+from lsst.ctrl.execute import envString
+from lsst.ctrl.execute.commandRunner import runCommand
+
+# sessions shared by this process, keyed on (user name, host name)
+_sessions = {}
+_lock = threading.Lock()
+
+
+class RemoteSession:
+    """Runs commands on, and copies files to, a remote login host, sharing
+    one authenticated connection between them.
+
+    Before running a command, the session starts an OpenSSH ControlMaster
+    connection, unless one is already open, which is kept open for
+    "persist" seconds after it was last used.  Every command, from this
+    process or from another one, goes through that connection instead of
+    authenticating with the login host again.  Callers which run the
+    command lines built by loginCommand() or copyCommand() themselves call
+    startMaster() first.
+
+    Parameters
+    ----------
+    userName : `str`
+        the user name on the login host
+    hostName : `str`
+        the login host
+    persist : `int`
+        seconds to keep an idle shared connection open; 0 turns connection
+        sharing off
+    controlDirectory : `str`
+        directory for the shared connection sockets; environment variables
+        are resolved
+    """
+
+    # These have specific paths to prevent abitrary binaries from being
+    # executed. The "gsi"* utilities are configured to use either grid
+    # proxies or ssh, automatically.
+    loginCmd = "/usr/bin/gsissh"
+    copyCmd = "/usr/bin/gsiscp"
+
+    def __init__(self, userName, hostName, persist=600, controlDirectory="$HOME/.lsst/ssh"):
+        self.userName = userName
+        self.hostName = hostName
+        self.persist = persist
+        self.controlDirectory = envString.resolve(controlDirectory)
+        # when the shared connection was last checked, or started
+        self.masterCheckTime = None
+        self.lock = threading.Lock()
+
+    def getControlPath(self):
+        """Return the path of the shared connection socket; ssh expands
+        the user, host and port in it.
+        """
+        return os.path.join(self.controlDirectory, "%r@%h:%p")
+
+    def getControlOptions(self):
+        """Return the ssh options which share the connection.
+
+        Returns
+        -------
+        options : `list` of `str`
+            the options, or an empty list if sharing is turned off
+        """
+        if self.persist <= 0:
+            return []
+        return ["-o", "ControlMaster=no", "-o", "ControlPath=%s" % self.getControlPath()]
+
+    def startMaster(self, timeout=None):
+        """Start the shared connection, unless it's already open, or this
+        session checked it less than "persist" seconds ago, so it can't
+        have expired since.
+
+        The master is started on its own, with its output discarded.  It
+        isn't left to the first command that uses it (ControlMaster=auto),
+        because some OpenSSH and GSI-OpenSSH builds keep that command's
+        stderr open in the backgrounded master, and a caller capturing the
+        command's output would wait until the master exits.  If the master
+        can't be started, commands connect on their own.
+
+        Parameters
+        ----------
+        timeout : `float`, optional
+            seconds to wait for each ssh command before killing it
+        """
+        if self.persist <= 0:
+            return
+        with self.lock:
+            now = time.time()
+            if self.masterCheckTime is not None and now - self.masterCheckTime < self.persist:
+                return
+            self.masterCheckTime = now
+            os.makedirs(self.controlDirectory, mode=0o700, exist_ok=True)
+            controlPath = ["-o", "ControlPath=%s" % self.getControlPath()]
+            if runCommand([self.loginCmd] + controlPath + ["-O", "check", self.getDestination()],
+                          timeout=timeout).ok:
+                return
+            runCommand([self.loginCmd, "-o", "ControlMaster=yes"] + controlPath +
+                       ["-o", "ControlPersist=%d" % self.persist, "-f", "-N", self.getDestination()],
+                       timeout=timeout, capture=False)
+
+    def getDestination(self):
+        """Return the user@host destination of the session.
+        """
+        return "%s@%s" % (self.userName, self.hostName)
+
+    def loginCommand(self, remoteCommand):
+        """Build the command line running remoteCommand on the login host.
+
+        Parameters
+        ----------
+        remoteCommand : `str`
+            the command to run remotely
+
+        Returns
+        -------
+        cmd : `str`
+            the local command line
+        """
+        return " ".join([self.loginCmd] + self.getControlOptions() + [self.getDestination(), remoteCommand])
+
+    def copyCommand(self, localFile, remoteFile):
+        """Build the command line copying localFile to remoteFile on the
+        login host.
+
+        Parameters
+        ----------
+        localFile : `str`
+            the file to copy
+        remoteFile : `str`
+            the path to copy it to on the login host
+
+        Returns
+        -------
+        cmd : `str`
+            the local command line
+        """
+        return " ".join([self.copyCmd] + self.getControlOptions() +
+                        [localFile, "%s:%s" % (self.getDestination(), remoteFile)])
+
+    def run(self, remoteCommand, input=None, timeout=None):
+        """Run remoteCommand on the login host, and capture its output.
+
+        Parameters
+        ----------
+        remoteCommand : `str`
+            the command to run remotely; it's interpreted by the remote
+            shell
+        input : `bytes`, optional
+            data sent to the remote command's stdin
+        timeout : `float`, optional
+            seconds to wait before killing the command
+
+        Returns
+        -------
+        result : `CommandResult`
+            the outcome of the command, with its output
+        """
+        self.startMaster(timeout)
+        cmd = [self.loginCmd] + self.getControlOptions() + [self.getDestination(), remoteCommand]
+        return runCommand(cmd, timeout=timeout, input=input)
+
+    def close(self):
+        """Ask the shared connection, if there is one, to exit.
+
+        Returns
+        -------
+        exitCode : `int`
+            the exit code of the request; non-zero if no connection was
+            open
+        """
+        if self.persist <= 0:
+            return 0
+        self.masterCheckTime = None
+        cmd = [self.loginCmd, "-o", "ControlPath=%s" % self.getControlPath(), "-O", "exit",
+               self.getDestination()]
+        return runCommand(cmd, capture=False).exitCode
+
+
+def getSession(userName, hostName, persist=600):
+    """Return this process's session with a login host, creating it the
+    first time it's asked for.
+
+    Parameters
+    ----------
+    userName : `str`
+        the user name on the login host
+    hostName : `str`
+        the login host
+    persist : `int`
+        seconds to keep an idle shared connection open; 0 turns connection
+        sharing off
+
+    Returns
+    -------
+    session : `RemoteSession`
+        the session
+    """
+    key = (userName, hostName)
+    with _lock:
+        session = _sessions.get(key)
+        if session is None or session.persist != persist:
+            session = RemoteSession(userName, hostName, persist)
+            _sessions[key] = session
+        return session
+
+
+def closeSessions():
+    """Close every shared connection this process has used, and forget the
+    sessions.
+    """
+    with _lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
@@ -22,11 +22,21 @@
 #
 
 from lsst.ctrl.execute import envString
+from lsst.ctrl.execute.atomicFile import writeAtomic
+from contextlib import contextmanager
+import fcntl
+import os
 import os.path
+import threading
 
 
 class SeqFile:
     """Class which can read and increment files used to store sequence numbers
+
+    Increments are done while holding an exclusive lock on a companion
+    ".lock" file, and new values are written to a temporary file which is
+    renamed over the sequence file, so concurrent processes on the same host
+    never receive the same number, and never see a partially written file.
     """
 
     def __init__(self, seqFileName):
@@ -34,19 +44,40 @@ class SeqFile:
         @param seqFileName file name to operate on
         """
         self.fileName = envString.resolve(seqFileName)
+        self.lockFileName = self.fileName + ".lock"
+
+    @contextmanager
+    def locked(self):
+        """Hold the exclusive lock on the sequence file.
+        """
+        fd = os.open(self.lockFileName, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
 
     def nextSeq(self):
         """Produce the next sequence number.
         @return a sequence number
         """
-        seq = 0
-        if not os.path.exists(self.fileName):
-            self.writeSeq(seq)
-        else:
-            seq = self.readSeq()
-            seq += 1
-            self.writeSeq(seq)
-        return seq
+        return self.reserve(1)
+
+    def reserve(self, count):
+        """Atomically claim a contiguous block of sequence numbers, in a
+        single locked read and write of the sequence file.
+        @param count the number of sequence numbers to claim
+        @return the first sequence number of the block; the block is
+        range(first, first+count)
+        """
+        if count < 1:
+            raise RuntimeError("can't reserve %d sequence numbers" % count)
+        with self.locked():
+            first = 0
+            if os.path.exists(self.fileName):
+                first = self.readSeq() + 1
+            self.writeSeq(first + count - 1)
+        return first
 
     def readSeq(self):
         """Read a sequence number
@@ -55,12 +86,58 @@ class SeqFile:
         with open(self.fileName) as seqFile:
             line = seqFile.read()
             seq = int(line)
-        seqFile.close()
         return seq
 
     def writeSeq(self, seq):
         """Write a sequence number
         """
-        with open(self.fileName, 'w') as seqFile:
-            print(seq, file=seqFile)
-        seqFile.close()
+        writeAtomic(self.fileName, ("%d\n" % seq).encode(), mode=0o644)
+
+
+class SeqAllocator:
+    """Hands out sequence numbers within this process from blocks reserved
+    from a SeqFile, so that only one file transaction is needed per block.
+
+    Numbers that are reserved but never handed out are simply skipped.
+
+    Parameters
+    ----------
+    seqFile : `SeqFile`
+        the sequence file to reserve blocks from
+    blockSize : `int`
+        the number of sequence numbers to reserve at a time
+    """
+
+    def __init__(self, seqFile, blockSize=1):
+        self.seqFile = seqFile
+        self.blockSize = blockSize
+        self.next = 0
+        self.end = 0
+        self.lock = threading.Lock()
+
+    def nextSeq(self):
+        """Produce the next sequence number, reserving a new block if the
+        current one is used up.
+        @return a sequence number
+        """
+        with self.lock:
+            if self.next >= self.end:
+                self.next = self.seqFile.reserve(self.blockSize)
+                self.end = self.next + self.blockSize
+            seq = self.next
+            self.next += 1
+        return seq
+
+    def take(self, count):
+        """Produce count sequence numbers; if the current block can't supply
+        all of them, a new block of at least count numbers is reserved.
+        @return list of sequence numbers
+        """
+        with self.lock:
+            if self.end - self.next < count:
+                size = max(count, self.blockSize)
+                self.next = self.seqFile.reserve(size)
+                self.end = self.next + size
+            seqs = list(range(self.next, self.next + count))
+            self.next += count
+        return seqs
@@ -23,52 +23,166 @@
 #
 
 import os
-import sys
+import re
 from string import Template
 
+from lsst.ctrl.execute import envString
 from lsst.ctrl.execute.allocator import Allocator
+from lsst.ctrl.execute.templateWriter import LazyValue
 
 
 class SlurmPlugin(Allocator):
 
-    def submit(self, platform, platformPkgDir):
+    def prepare(self, platform, platformPkgDir):
+        """Loads the slurm configuration and creates the files needed to
+        submit the allocation, without submitting it.
+        """
+        with self.timed("prepare"):
+            configName = os.path.join(platformPkgDir, "etc", "config", "slurmConfig.py")
+
+            self.loadSlurm(configName, platformPkgDir)
+            verbose = self.isVerbose()
+
+            # create the fully-resolved scratch directory string
+            scratchDirParam = self.getScratchDirectory()
+            template = Template(scratchDirParam)
+            template.substitute(USER_HOME=self.getUserHome())
+
+            # create the slurm submit file; with --submit-stdin it is only
+            # rendered in memory, and written out if a copy was asked for.
+            slurmName = os.path.join(platformPkgDir, "etc", "templates", "generic.slurm.template")
+            self.checkJobShape(slurmName)
+            if self.opts.submitStdin:
+                self.slurmScript = self.renderFile(slurmName)
+                if self.opts.keepSubmitFile:
+                    self.templateWriter.write(self.submitFileName, self.slurmScript)
+                    self.addGeneratedFiles([self.submitFileName])
+                    if verbose:
+                        print("wrote new Slurm file to %s" % self.submitFileName)
+            else:
+                self.generatedSlurmFile = self.createSubmitFile(slurmName)
+
+            # create the condor configuration file
+            condorFile = os.path.join(platformPkgDir, "etc", "templates", "glidein_condor_config.template")
+            self.createCondorConfigFile(condorFile)
+
+            # create the script that the slurm submit file calls
+            allocationName = os.path.join(platformPkgDir, "etc", "templates", "allocation.sh.template")
+            self.createAllocationFile(allocationName)
 
-        configName = os.path.join(platformPkgDir, "etc", "config", "slurmConfig.py")
+            # sbatch is run from the local scratch directory
+            template = Template(self.getLocalScratchDirectory())
+            self.localScratchDir = template.substitute(USER_NAME=self.getUserName())
+            if not os.path.exists(self.localScratchDir):
+                os.mkdir(self.localScratchDir)
 
-        self.loadSlurm(configName, platformPkgDir)
+    def submitPrepared(self):
+        """Runs sbatch on the files created by prepare(), and records the
+        allocation.
+
+        Returns
+        -------
+        result : `SubmitResult`
+            the outcome of the submission, with the job id sbatch gave it
+        """
         verbose = self.isVerbose()
+        with self.timed("sbatch"):
+            if self.opts.submitStdin:
+                cmd = self.getSubmitCommand()
+                result = self.runCommandOutput(cmd, verbose, input=self.slurmScript, cwd=self.localScratchDir)
+            else:
+                cmd = self.getSubmitCommand(self.generatedSlurmFile)
+                result = self.runCommandOutput(cmd, verbose, cwd=self.localScratchDir)
+        if not result.ok:
+            print("error running %s" % cmd)
+            return self.makeSubmitResult(result.exitCode)
+
+        return self.makeSubmitResult(result.exitCode, self.parseJobId(result.stdout))
 
-        # create the fully-resolved scratch directory string
-        scratchDirParam = self.getScratchDirectory()
-        template = Template(scratchDirParam)
-        template.substitute(USER_HOME=self.getUserHome())
-
-        # create the slurm submit file
-        slurmName = os.path.join(platformPkgDir, "etc", "templates", "generic.slurm.template")
-        generatedSlurmFile = self.createSubmitFile(slurmName)
-
-        # create the condor configuration file
-        condorFile = os.path.join(platformPkgDir, "etc", "templates", "glidein_condor_config.template")
-        self.createCondorConfigFile(condorFile)
-
-        # create the script that the slurm submit file calls
-        allocationName = os.path.join(platformPkgDir, "etc", "templates", "allocation.sh.template")
-        self.createAllocationFile(allocationName)
-
-        # run the sbatch command
-        template = Template(self.getLocalScratchDirectory())
-        localScratchDir = template.substitute(USER_NAME=self.getUserName())
-        if not os.path.exists(localScratchDir):
-            os.mkdir(localScratchDir)
-        os.chdir(localScratchDir)
-        cmd = "sbatch %s" % generatedSlurmFile
-        exitCode = self.runCommand(cmd, verbose)
-        if exitCode != 0:
+    def cancel(self, jobId):
+        """Cancels a submitted allocation with scancel.
+
+        Parameters
+        ----------
+        jobId : `str`
+            the job id sbatch gave the allocation
+
+        Returns
+        -------
+        exitCode : `int`
+            the exit code of scancel
+        """
+        cmd = "scancel %s" % jobId
+        result = self.runCommandOutput(cmd, self.isVerbose())
+        if not result.ok:
             print("error running %s" % cmd)
-            sys.exit(exitCode)
+        return result.exitCode
+
+    def getActiveJobs(self):
+        """Lists the user's allocations which Slurm still has queued or
+        running, with squeue.
+
+        Returns
+        -------
+        jobIds : `set` of `str`
+            the job ids sbatch gave the allocations; the tasks of job
+            arrays and the components of heterogeneous jobs are listed
+            under the job id of the whole job
+        """
+        cmd = "squeue -h -o %%i -u %s" % self.getUserName()
+        result = self.runCommandOutput(cmd, self.isVerbose())
+        if not result.ok:
+            raise RuntimeError("error running %s" % cmd)
+        return set(re.split(r"[_+]", line)[0] for line in result.stdout.split())
+
+    def getSubmitCommand(self, fileName=None):
+        """Builds the sbatch command line.  Job arrays are requested on the
+        command line, so any submit file template can be used for them, as
+        are the components of a heterogeneous job when the template has no
+        $HETEROGENEOUS_BLOCK.
 
-        # print node set information
-        self.printNodeSetInfo()
+        Parameters
+        ----------
+        fileName : `str`, optional
+            the submit file; if None, sbatch reads the script from stdin
+
+        Returns
+        -------
+        cmd : `str`
+            the command line
+        """
+        cmd = ["sbatch"]
+        if self.arraySpec is not None:
+            cmd.append("--array=%s" % self.arraySpec)
+        if self.hetCommandLine:
+            components = [(self.getNodes(), self.getCPUs())] + self.hetComponents
+            options = ["-N %s -n %s -c %s" % (nodes, nodes, cpus) for nodes, cpus in components]
+            cmd.append(" : ".join(options))
+        if fileName is not None:
+            cmd.append(fileName)
+        return " ".join(cmd)
+
+    def parseJobId(self, output):
+        """Finds the job id in the output of sbatch.
+
+        Parameters
+        ----------
+        output : `str`
+            the output of sbatch
+
+        Returns
+        -------
+        jobId : `str`
+            the job id, or None if it couldn't be found
+        """
+        match = re.search(r"Submitted batch job (\S+)", output)
+        if match is not None:
+            return match.group(1)
+        # sbatch --parsable prints "jobid[;cluster]"
+        words = output.split()
+        if len(words) == 1:
+            return words[0].split(";")[0]
+        return None
 
     def loadSlurm(self, name, platformPkgDir):
         if self.opts.reservation is not None:
@@ -85,6 +199,8 @@ class SlurmPlugin(Allocator):
         self.allocationFileName = os.path.join(self.configDir, "allocation_%s.sh" % self.uniqueIdentifier)
         self.defaults["GENERATED_ALLOCATE_SCRIPT"] = os.path.basename(self.allocationFileName)
 
+        self.loadJobShape()
+
         # handle dynamic slot block template:
         # 1) if it isn't specified, just put a comment in it's place
         # 2) if it's specified, but without a filename, use the default
@@ -106,6 +222,91 @@ class SlurmPlugin(Allocator):
                 block += line
             self.defaults["DYNAMIC_SLOTS_BLOCK"] = block
 
+    def loadJobShape(self):
+        """Sets up the template variables for submitting the node set as a
+        job array or as a heterogeneous job.
+
+        For a job array, ARRAY_SIZE is the number of tasks, ARRAY_SPEC the
+        --array specification, and ARRAY_TASK_ID expands, at run time, to
+        the index of the task.  For a heterogeneous job,
+        HETEROGENEOUS_BLOCK holds the "#SBATCH hetjob" directives of the
+        extra components, HET_SIZE is the number of components, and
+        HET_GROUPS their range, for "srun --het-group".
+        """
+        arraySize = self.opts.arraySize
+        hetComponents = self.opts.hetComponents or []
+        if arraySize is not None and hetComponents:
+            raise RuntimeError("a node set can't be both a job array and a heterogeneous job")
+
+        self.arraySpec = None
+        if arraySize is not None:
+            if arraySize < 1:
+                raise RuntimeError("job array size must be at least 1, not %d" % arraySize)
+            self.arraySpec = "0-%d" % (arraySize - 1)
+            if self.opts.arrayThrottle is not None:
+                self.arraySpec += "%%%d" % self.opts.arrayThrottle
+            # each task writes its own logs
+            nodeSetName = self.defaults["NODE_SET"]
+            if self.opts.outputLog is None:
+                self.defaults["OUTPUT_LOG"] = LazyValue(lambda: "%s_%%a.out" % nodeSetName)
+            if self.opts.errorLog is None:
+                self.defaults["ERROR_LOG"] = LazyValue(lambda: "%s_%%a.err" % nodeSetName)
+        self.defaults["ARRAY_SIZE"] = str(arraySize or 1)
+        self.defaults["ARRAY_SPEC"] = self.arraySpec or ""
+        self.defaults["ARRAY_TASK_ID"] = "${SLURM_ARRAY_TASK_ID:-0}"
+
+        self.hetComponents = []
+        self.hetCommandLine = False
+        lines = []
+        for component in hetComponents:
+            try:
+                nodes, cpus = [int(value) for value in component.split(":")]
+            except ValueError:
+                raise RuntimeError("heterogeneous job component %s isn't NODES:CPUS" % component)
+            self.hetComponents.append((nodes, cpus))
+            lines += ["#SBATCH hetjob", "#SBATCH -N %d" % nodes, "#SBATCH -n %d" % nodes,
+                      "#SBATCH -c %d" % cpus]
+        self.defaults["HETEROGENEOUS_BLOCK"] = "\n".join(lines) if lines else "#"
+        self.defaults["HET_SIZE"] = str(len(hetComponents) + 1)
+        self.defaults["HET_GROUPS"] = "0-%d" % len(hetComponents)
+
+    def checkJobShape(self, slurmName):
+        """Decides how the components of a heterogeneous job are submitted:
+        through the template's $HETEROGENEOUS_BLOCK if it has one, and on
+        the sbatch command line otherwise.
+
+        Parameters
+        ----------
+        slurmName : `str`
+            the submit file template
+        """
+        if self.hetComponents:
+            placeholders = self.templateWriter.placeholders(envString.resolve(slurmName))
+            self.hetCommandLine = "HETEROGENEOUS_BLOCK" not in placeholders
+
+    def getTotalNodes(self):
+        """The number of nodes asked for by all the tasks of a job array,
+        or all the components of a heterogeneous job.
+        @return the total node count
+        """
+        nodes = int(self.getNodes())
+        if self.arraySpec is not None:
+            return nodes * self.opts.arraySize
+        return nodes + sum(component[0] for component in self.hetComponents)
+
+    def getJobShape(self):
+        """Describes how the nodes are split between the tasks of a job
+        array, or the components of a heterogeneous job.
+        @return the description, or None for an ordinary job
+        """
+        if self.arraySpec is not None:
+            return "as a job array of %d tasks of %s nodes each" % (self.opts.arraySize, self.getNodes())
+        if self.hetComponents:
+            components = [(self.getNodes(), self.getCPUs())] + self.hetComponents
+            return "as a heterogeneous job of %s" % ", ".join("%s nodes with %s cpus" % component
+                                                              for component in components)
+        return None
+
     def createAllocationFile(self, input):
         """Creates Allocation script file using the file "input" as a Template
 
@@ -0,0 +1,75 @@
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+
+class SubmitResult:
+    """The outcome of submitting a node allocation.
+
+    Parameters
+    ----------
+    platform : `str`
+        the platform the allocation was submitted to
+    scheduler : `str`
+        the scheduler type
+    nodeSet : `str`
+        the node set name
+    exitCode : `int`
+        the exit code of the submission; 0 if it succeeded
+    jobId : `str`, optional
+        the job id the scheduler gave the allocation, if it could be parsed
+    files : `list` of `str`, optional
+        the files generated for the allocation
+    timings : `dict`, optional
+        seconds spent in each phase of the submission, keyed on the phase
+    uniqueId : `str`, optional
+        the identifier used to name the generated files
+    allocationId : `int`, optional
+        the registry id of the allocation, if it was recorded
+    """
+
+    def __init__(self, platform, scheduler, nodeSet, exitCode, jobId=None, files=None, timings=None,
+                 uniqueId=None, allocationId=None):
+        self.platform = platform
+        self.scheduler = scheduler
+        self.nodeSet = nodeSet
+        self.exitCode = exitCode
+        self.jobId = jobId
+        self.files = list(files or [])
+        self.timings = dict(timings or {})
+        self.uniqueId = uniqueId
+        self.allocationId = allocationId
+
+    @property
+    def ok(self):
+        """True if the allocation was submitted.
+        """
+        return self.exitCode == 0
+
+    def toDict(self):
+        """Return the result as a dictionary, suitable for JSON.
+        """
+        return {"platform": self.platform, "scheduler": self.scheduler, "nodeSet": self.nodeSet,
+                "exitCode": self.exitCode, "jobId": self.jobId, "files": self.files,
+                "timings": self.timings, "uniqueId": self.uniqueId, "allocationId": self.allocationId}
+
+    def __repr__(self):
+        return "SubmitResult(nodeSet=%r, jobId=%r, exitCode=%d)" % (self.nodeSet, self.jobId, self.exitCode)
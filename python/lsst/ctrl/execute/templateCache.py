@@ -0,0 +1,109 @@
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import os
+import threading
+from collections import OrderedDict
+from lsst.ctrl.execute.templateStore import CompiledTemplateStore
+from lsst.ctrl.execute.templateWriter import ParsedTemplate
+
+
+class TemplateCache:
+    """A bounded, least recently used cache of parsed templates.
+
+    Entries are keyed on the resolved path of the template and are checked
+    against the modification time and size of the file each time they are
+    requested, so an edited template is reread automatically.
+
+    Parameters
+    ----------
+    maxSize : `int`
+        the maximum number of templates to keep
+    store : `CompiledTemplateStore`, optional
+        on-disk store to look up compiled templates in, instead of parsing
+        them again
+    storeMinSize : `int`
+        the size, in characters, below which templates are parsed rather
+        than looked up in the store; small templates parse faster than
+        the store can hash and read them
+    """
+
+    def __init__(self, maxSize=32, store=None, storeMinSize=65536):
+        self.maxSize = maxSize
+        self.store = store
+        self.storeMinSize = storeMinSize
+        self.hits = 0
+        self.misses = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, name):
+        """Retrieve a template, reading it only if it isn't cached, or if
+        the file changed since it was cached.
+
+        Parameters
+        ----------
+        name : `str`
+            the template file name
+
+        Returns
+        -------
+        template : `ParsedTemplate`
+            the parsed template
+        """
+        path = os.path.realpath(name)
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry[0] == stamp:
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        with open(path, 'r') as fp:
+            text = fp.read()
+        compiled = None
+        if self.store is not None and len(text) >= self.storeMinSize:
+            compiled = self.store.get(text)
+        template = ParsedTemplate(path, text, compiled)
+        with self.lock:
+            self.entries[path] = (stamp, template)
+            self.entries.move_to_end(path)
+            while len(self.entries) > self.maxSize:
+                self.entries.popitem(last=False)
+        return template
+
+    def clear(self):
+        """Remove all templates from the cache and reset the counters.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+
+# the cache shared by everything in this process
+sharedTemplateCache = TemplateCache(store=CompiledTemplateStore())
@@ -0,0 +1,72 @@
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import hashlib
+import os
+from lsst.ctrl.execute.marshalStore import MarshalStore
+from lsst.ctrl.execute.templateWriter import CompiledTemplate
+
+
+class CompiledTemplateStore(MarshalStore):
+    """An on-disk store of compiled templates, keyed by the hash of the
+    template contents, so a new process can skip parsing templates that
+    an earlier one has already compiled.
+
+    Parameters
+    ----------
+    directory : `str`, optional
+        directory to keep compiled templates in; defaults to
+        $XDG_CACHE_HOME/ctrl_execute/templates
+    """
+
+    name = "templates"
+    version = CompiledTemplate.version
+
+    def getPath(self, text):
+        """The file name a template with these contents is stored under.
+        """
+        key = hashlib.sha256(text.encode()).hexdigest()
+        return os.path.join(self.directory, "%s.ctpl" % key)
+
+    def get(self, text):
+        """Retrieve the compiled form of a template, compiling and storing
+        it if it isn't already stored.
+
+        Parameters
+        ----------
+        text : `str`
+            the template contents
+
+        Returns
+        -------
+        compiled : `CompiledTemplate`
+            the compiled template
+        """
+        path = self.getPath(text)
+        parts = self.load(path)
+        if parts is not None:
+            self.hits += 1
+            return CompiledTemplate(parts)
+        self.misses += 1
+        compiled = CompiledTemplate.fromText(text)
+        self.save(path, compiled.parts)
+        return compiled
@@ -26,12 +26,308 @@
 # keys, writing a new file generated from the template.
 #
 
+import hashlib
+import os
+import re
+from functools import lru_cache
+from lsst.ctrl.execute.atomicFile import writeAtomic
+
+
+@lru_cache(maxsize=64)
+def compilePattern(names):
+    """Build one regular expression which matches "$NAME" for every name
+    in names.
+
+    Names are tried longest first, so a key such as NODE_SET is never
+    clobbered by a shorter key like NODE that happens to be its prefix.
+
+    Parameters
+    ----------
+    names : `tuple` of `str`
+        the substitution key names
+
+    Returns
+    -------
+    pattern : `re.Pattern`
+        the compiled pattern; group 1 holds the matched name
+    """
+    ordered = sorted(names, key=len, reverse=True)
+    return re.compile(r"\$(%s)" % "|".join(re.escape(name) for name in ordered))
+
+
+_placeholderPattern = re.compile(r"\$([A-Za-z0-9_]+)")
+
+
+def findPlaceholders(text):
+    """Index the placeholders used in a template.
+
+    Parameters
+    ----------
+    text : `str`
+        the template contents
+
+    Returns
+    -------
+    placeholders : `frozenset` of `str`
+        every run of name characters following a "$" in text.  A key is used
+        by the template if it is one of these, or a prefix of one of them.
+    """
+    return frozenset(_placeholderPattern.findall(text))
+
+
+def usedKeys(placeholders, pairs):
+    """Find the keys of pairs which a template with the given placeholders
+    refers to.
+
+    Parameters
+    ----------
+    placeholders : `frozenset` of `str`
+        the placeholders found by findPlaceholders
+    pairs : `dict`
+        the values to substitute
+
+    Returns
+    -------
+    names : `tuple` of `str`
+        the used keys, in the order they appear in pairs
+    """
+    found = set()
+    for placeholder in placeholders:
+        for i in range(1, len(placeholder) + 1):
+            if placeholder[:i] in pairs:
+                found.add(placeholder[:i])
+    return tuple(name for name in pairs if name in found)
+
+
+class LazyValue:
+    """A substitution value which is only computed when a template actually
+    uses it, and then only once.
+
+    Parameters
+    ----------
+    provider : callable
+        function, taking no arguments, which computes the value
+    """
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.computed = False
+        self.value = None
+
+    def get(self):
+        """Compute the value, if it hasn't been already.
+
+        Returns
+        -------
+        value : `object`
+            the value returned by the provider
+        """
+        if not self.computed:
+            self.value = self.provider()
+            self.computed = True
+        return self.value
+
+    def __str__(self):
+        return str(self.get())
+
+
+def resolveValue(value):
+    """Return value, computing it first if it is a `LazyValue`.
+    """
+    if isinstance(value, LazyValue):
+        return value.get()
+    return value
+
+
+class _Expander:
+    """Substitute the values of pairs through text in a single pass.
+
+    A value which itself contains "$NAME" references is expanded using only
+    the keys which follow it in pairs, which is what the original
+    line-by-line, key-by-key replacement did.
+    """
+
+    def __init__(self, pairs):
+        self.pairs = pairs
+        self.names = tuple(pairs)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.values = {}
+
+    def expand(self, text, start=0, names=None):
+        if names is None:
+            names = self.names[start:]
+        if not names or "$" not in text:
+            return text
+        pattern = compilePattern(names)
+        return pattern.sub(self._value, text)
+
+    def _value(self, match):
+        return self.valueOf(match.group(1))
+
+    def valueOf(self, name):
+        val = self.values.get(name)
+        if val is None:
+            val = self.expand(str(self.pairs[name]), self.index[name] + 1)
+            self.values[name] = val
+        return val
+
+
+class CompiledTemplate:
+    """A template split into its literal text and its placeholder slots, so
+    it can be filled in without being scanned again.
+
+    Parameters
+    ----------
+    parts : sequence of `str`
+        alternating literal text and slot names, starting and ending with
+        literal text, as produced by splitting on "$NAME" placeholders
+    """
+
+    # bumped whenever the stored form of a compiled template changes
+    version = 1
+
+    def __init__(self, parts):
+        self.parts = tuple(parts)
+
+    @classmethod
+    def fromText(cls, text):
+        """Compile the contents of a template.
+
+        Parameters
+        ----------
+        text : `str`
+            the template contents
+
+        Returns
+        -------
+        compiled : `CompiledTemplate`
+            the compiled template
+        """
+        return cls(_placeholderPattern.split(text))
+
+    @property
+    def placeholders(self):
+        """The placeholders used in the template.
+        """
+        return frozenset(self.parts[1::2])
+
+    def render(self, pairs):
+        """Fill in the slots with the values in pairs.
+
+        A slot is filled with the value of the longest key which is a prefix
+        of the slot name, followed by the rest of the slot name, which is
+        what matching "$KEY" in the template text would do.  Slots with no
+        matching key are left as they were.
+
+        Parameters
+        ----------
+        pairs : `dict`
+            the values to substitute
+
+        Returns
+        -------
+        text : `str`
+            the rendered template
+        """
+        expander = _Expander(pairs)
+        filled = {}
+        out = list(self.parts)
+        for i in range(1, len(out), 2):
+            slot = out[i]
+            val = filled.get(slot)
+            if val is None:
+                val = "$" + slot
+                for end in range(len(slot), 0, -1):
+                    if slot[:end] in pairs:
+                        val = expander.valueOf(slot[:end]) + slot[end:]
+                        break
+                filled[slot] = val
+            out[i] = val
+        return "".join(out)
+
+
+class ParsedTemplate:
+    """The contents of a template file, along with its compiled form.
+
+    Parameters
+    ----------
+    name : `str`
+        the resolved path of the template
+    text : `str`
+        the contents of the template
+    compiled : `CompiledTemplate`, optional
+        the compiled template, if it is already known; otherwise it is
+        compiled on first use
+    """
+
+    def __init__(self, name, text, compiled=None):
+        self.name = name
+        self.text = text
+        self._compiled = compiled
+
+    @property
+    def compiled(self):
+        """The compiled template.
+        """
+        if self._compiled is None:
+            self._compiled = CompiledTemplate.fromText(self.text)
+        return self._compiled
+
+    @property
+    def placeholders(self):
+        """The placeholders used in the template.
+        """
+        return self.compiled.placeholders
+
 
 class TemplateWriter:
     """Class to take a template file, substitute values through it, and
     write a new file with those values.
+
+    Parameters
+    ----------
+    cache : `TemplateCache`, optional
+        cache to read templates through; if None, templates are read from
+        disk every time
+    atomic : `bool`, optional
+        if True, output files are written to a temporary file which is then
+        renamed over the output, so readers never see a partial file
+    skipUnchanged : `bool`, optional
+        if True, an output file whose contents would not change is left
+        untouched
     """
 
+    def __init__(self, cache=None, atomic=False, skipUnchanged=False):
+        self.cache = cache
+        self.atomic = atomic
+        self.skipUnchanged = skipUnchanged
+        self.writes = 0
+        self.writesSkipped = 0
+
+    def read(self, input):
+        """Read the contents of a template, through the cache if there is one.
+        @param input - the input template name
+        @return the contents of the template
+        """
+        return self.load(input).text
+
+    def load(self, input):
+        """Read and parse a template, through the cache if there is one.
+        @param input - the input template name
+        @return the ParsedTemplate
+        """
+        if self.cache is not None:
+            return self.cache.get(input)
+        with open(input, 'r') as fpInput:
+            return ParsedTemplate(input, fpInput.read())
+
+    def placeholders(self, input):
+        """Index the placeholders used in a template.
+        @param input - the input template name
+        @return frozenset of placeholder names used in the template
+        """
+        return self.load(input).placeholders
+
     def rewrite(self, input, output, pairs):
         """Given a input template, take the keys from key/values in the config
         object and substitute the values, and write those to the output file.
@@ -39,19 +335,90 @@ class TemplateWriter:
         @param output - the output file name
         @param pairs of values to substitute in the template
         """
-        fpInput = open(input, 'r')
-        fpOutput = open(output, 'w')
-
-        while True:
-            line = fpInput.readline()
-            if len(line) == 0:
-                break
-
-            # replace the user defined names
-            for name in pairs:
-                key = "$"+name
-                val = str(pairs[name])
-                line = line.replace(key, val)
-            fpOutput.write(line)
-        fpInput.close()
-        fpOutput.close()
+        self.write(output, self.load(input).compiled.render(pairs))
+
+    def render(self, input, pairs, fp=None):
+        """Render a template in memory, without creating an output file.
+        @param input - the input template name
+        @param pairs of values to substitute in the template
+        @param fp - optional file-like object the rendered text is written to
+        @return the rendered text
+        """
+        text = self.load(input).compiled.render(pairs)
+        if fp is not None:
+            fp.write(text)
+        return text
+
+    def renderMany(self, input, pairsList):
+        """Render one template once for each set of pairs, reading the
+        template only once.
+        @param input - the input template name
+        @param pairsList - iterable of dicts of values to substitute
+        @return generator yielding the rendered text for each set of pairs
+        """
+        compiled = self.load(input).compiled
+        for pairs in pairsList:
+            yield compiled.render(pairs)
+
+    def rewriteMany(self, input, outputs):
+        """Render one template once for each output, reading the template
+        only once.
+        @param input - the input template name
+        @param outputs - iterable of (output file name, pairs) tuples
+        @return list of the output file names written
+        """
+        compiled = self.load(input).compiled
+        written = []
+        for output, pairs in outputs:
+            self.write(output, compiled.render(pairs))
+            written.append(output)
+        return written
+
+    def write(self, output, text):
+        """Write text to an output file, honoring the atomic and
+        skipUnchanged settings.
+        @param output - the output file name
+        @param text - the contents to write
+        @return True if the file was written, False if it was unchanged
+        """
+        data = text.encode()
+        if self.skipUnchanged and self.isUnchanged(output, data):
+            self.writesSkipped += 1
+            return False
+        if not self.atomic:
+            with open(output, 'wb') as fpOutput:
+                fpOutput.write(data)
+        else:
+            writeAtomic(output, data)
+        self.writes += 1
+        return True
+
+    def isUnchanged(self, output, data):
+        """Check whether an existing output file already holds data.
+        @param output - the output file name
+        @param data - the encoded contents to compare against
+        @return True if the file exists with exactly these contents
+        """
+        try:
+            if os.stat(output).st_size != len(data):
+                return False
+            with open(output, 'rb') as fpOutput:
+                digest = hashlib.sha256(fpOutput.read()).digest()
+        except OSError:
+            return False
+        return digest == hashlib.sha256(data).digest()
+
+    def substitute(self, text, pairs, placeholders=None):
+        """Substitute the values in pairs for each "$KEY" found in text.
+        Values which are `LazyValue` objects are only computed if the text
+        uses them.
+        @param text - the template contents
+        @param pairs of values to substitute in the template
+        @param placeholders - optional placeholder index of text; if given,
+        only the keys the text uses are matched against it
+        @return the text with all the values substituted
+        """
+        expander = _Expander(pairs)
+        if placeholders is None:
+            return expander.expand(text)
+        return expander.expand(text, names=usedKeys(placeholders, pairs))
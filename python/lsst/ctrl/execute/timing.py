@@ -0,0 +1,150 @@
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Timer:
+    """Collects named, possibly nested, timing spans.
+
+    Spans are only recorded while the timer is enabled, so instrumented
+    code costs next to nothing otherwise.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.origin = time.time()
+        self.spans = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def reset(self):
+        """Forget the recorded spans, and restart the clock.
+        """
+        with self._lock:
+            self.origin = time.time()
+            self.spans = []
+
+    @contextmanager
+    def span(self, name, detail=None):
+        """Record the time spent in the with block as a span.
+
+        Parameters
+        ----------
+        name : `str`
+            the name of the span
+        detail : `str`, optional
+            extra information about the span, such as a file name
+        """
+        if not self.enabled:
+            yield
+            return
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        record = {"name": name, "detail": detail, "parent": stack[-1]["name"] if stack else None,
+                  "depth": len(stack), "thread": threading.current_thread().name,
+                  "start": time.time() - self.origin, "elapsed": None}
+        stack.append(record)
+        start = time.time()
+        try:
+            yield
+        finally:
+            record["elapsed"] = time.time() - start
+            stack.pop()
+            with self._lock:
+                self.spans.append(record)
+
+    def totals(self):
+        """Return the total time recorded for each span name.
+
+        Returns
+        -------
+        totals : `dict`
+            seconds, keyed on span name
+        """
+        totals = {}
+        with self._lock:
+            for record in self.spans:
+                totals[record["name"]] = totals.get(record["name"], 0.0) + record["elapsed"]
+        return totals
+
+    def toDict(self):
+        """Return the recorded spans, in the order they started, with the
+        totals for each span name.
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda record: record["start"])
+        return {"wallClock": time.time() - self.origin, "totals": self.totals(), "spans": spans}
+
+    def writeJson(self, fileName):
+        """Write the recorded spans to a JSON file.
+
+        Parameters
+        ----------
+        fileName : `str`
+            the file to write
+        """
+        with open(fileName, "w") as f:
+            json.dump(self.toDict(), f, indent=2)
+            f.write("\n")
+
+
+# the timer shared by everything in this process
+timer = Timer()
+
+
+@contextmanager
+def profiled(jsonFileName=None, statsFileName=None):
+    """Record timing spans, and optionally a cProfile profile, for the with
+    block, and write them out when it exits, even if it exits with an
+    error or SystemExit.
+
+    Parameters
+    ----------
+    jsonFileName : `str`, optional
+        file the span timings are written to, as JSON
+    statsFileName : `str`, optional
+        file the cProfile statistics are written to, in pstats format
+    """
+    if jsonFileName is None and statsFileName is None:
+        yield
+        return
+    timer.reset()
+    timer.enabled = jsonFileName is not None
+    profile = None
+    if statsFileName is not None:
+        import cProfile
+        profile = cProfile.Profile()
+        profile.enable()
+    try:
+        yield
+    finally:
+        if profile is not None:
+            profile.disable()
+            profile.dump_stats(statsFileName)
+        if jsonFileName is not None:
+            timer.enabled = False
+            timer.writeJson(jsonFileName)
@@ -0,0 +1,67 @@
+#
+# LSST Data Management System
+# Copyright 2008-2016 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import itertools
+import os
+import pwd
+import re
+import socket
+from datetime import datetime
+
+# per-process counter, distinguishing identifiers created in the same
+# microsecond
+_counter = itertools.count()
+
+
+def _hostName():
+    """The first component of this host's name, restricted to characters
+    which are safe in file names.
+    """
+    name = socket.gethostname().split('.')[0]
+    return re.sub(r'[^A-Za-z0-9-]', '-', name) or "localhost"
+
+
+def createUniqueId(username=None):
+    """Creates an identifier which is human readable, sorts by creation
+    time, and is unique across processes and hosts.
+
+    The identifier has the form
+    <login>_YYYY_MMDD_HHMMSS_uuuuuu_<host>_<pid>_<n> where uuuuuu is
+    microseconds, and n counts identifiers created by this process.
+
+    Parameters
+    ----------
+    username : `str`, optional
+        the name to start the identifier with; defaults to the name of the
+        user running this process
+
+    Returns
+    -------
+    ident : `str`
+        the new identifier
+    """
+    if username is None:
+        username = pwd.getpwuid(os.geteuid()).pw_name
+    now = datetime.now()
+    return "%s_%04d_%02d%02d_%02d%02d%02d_%06d_%s_%d_%d" % (
+        username, now.year, now.month, now.day, now.hour, now.minute, now.second, now.microsecond,
+        _hostName(), os.getpid(), next(_counter))
@@ -20,13 +20,16 @@
 # see <http://www.lsstcorp.org/LegalNotices/>.
 #
 import sys
+import os
 import os.path
+import tempfile
 import time
 import filecmp
 import unittest
 from lsst.ctrl.execute.namedClassFactory import NamedClassFactory
 from lsst.ctrl.execute.allocatorParser import AllocatorParser
 from lsst.ctrl.execute.condorConfig import CondorConfig
+from lsst.ctrl.execute.seqFile import SeqAllocator, SeqFile
 import lsst.utils.tests
 
 
@@ -36,6 +39,17 @@ def setup_module(module):
 
 class TestAllocator(lsst.utils.tests.TestCase):
 
+    def setUp(self):
+        # keep the compiled templates out of the user's cache directory
+        self.cacheDirectory = tempfile.TemporaryDirectory()
+        self.environ = dict(os.environ)
+        os.environ["XDG_CACHE_HOME"] = self.cacheDirectory.name
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.environ)
+        self.cacheDirectory.cleanup()
+
     def verboseArgs(self):
         argv = ["allocator_test",
                 "test_platform",
@@ -155,6 +169,54 @@ class TestAllocator(lsst.utils.tests.TestCase):
         os.rmdir(configPath)
         os.rmdir(localScratch)
 
+    def test5(self):
+        sys.argv = self.regularArgs()
+        al = self.subSetup("config_condor_slurm_batch.py")
+
+        fileName = os.path.join("tests", "testfiles", "config_allocation_slurm.py")
+        al.loadSlurm(fileName, None)
+        slurmName = os.path.join("tests", "testfiles", "generic.slurm.template")
+        outputs = []
+        for i in range(3):
+            name = os.path.join(al.configDir, "alloc_%d.slurm" % i)
+            outputs.append((name, {"NODE_SET": "test_set_%d" % i}))
+        generatedFiles = al.createFiles(slurmName, outputs)
+        self.assertEqual(len(generatedFiles), 3)
+        for i, name in enumerate(generatedFiles):
+            with open(name) as f:
+                self.assertIn("#SBATCH -J test_set_%d\n" % i, f.read())
+            os.remove(name)
+
+        # render in memory, and pipe to a command
+        compare = os.path.join("tests", "testfiles", "generic.slurm.txt")
+        script = al.renderFile(slurmName)
+        with open(compare) as f:
+            self.assertEqual(script, f.read())
+        self.assertEqual(al.runCommandWithInput("grep -q test_set", script, False), 0)
+        self.assertEqual(al.runCommandWithInput("grep -q no_such_set", script, False), 1)
+        localScratch = "./tests/condor_scratch_slurm_batch"
+        configPath = "./tests/condor_scratch_slurm_batch/configs"
+        os.rmdir(configPath)
+        os.rmdir(localScratch)
+
+    def test6(self):
+        # node set names are taken from the user's sequence file, several
+        # at a time if asked for
+        os.environ["HOME"] = self.cacheDirectory.name
+        os.mkdir(os.path.join(self.cacheDirectory.name, ".lsst"))
+        sys.argv = self.regularArgs()
+        al = self.subSetup("config_condor.py")
+        self.assertEqual(al.createNodeSetNames(3), ["c3po_0", "c3po_1", "c3po_2"])
+        self.assertEqual(al.createNodeSetName(), "c3po_3")
+        seqFile = SeqFile(al.nodeSetSeqFileName)
+        self.assertEqual(seqFile.readSeq(), 3)
+
+        # allocators sharing a block reserve it once
+        al.nodeSetSeq = SeqAllocator(seqFile, blockSize=10)
+        self.assertEqual(al.createNodeSetName(), "c3po_4")
+        self.assertEqual(al.createNodeSetNames(2), ["c3po_5", "c3po_6"])
+        self.assertEqual(seqFile.readSeq(), 13)
+
 
 class AllocatorMemoryTest(lsst.utils.tests.MemoryTestCase):
     pass
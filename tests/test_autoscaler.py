@@ -0,0 +1,226 @@
+#
+# LSST Data Management System
+# Copyright 2008-2012 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+import os
+import tempfile
+import unittest
+from lsst.ctrl.execute.autoscaler import Autoscaler, CommandQueueQuery, CondorQueueQuery, QueueQuery
+from lsst.ctrl.execute.autoscaler import parseWallClock
+import lsst.utils.tests
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class FakeQuery(QueueQuery):
+
+    def __init__(self):
+        self.idleJobs = 0
+        self.busy = set()
+
+    def getIdleJobs(self):
+        return self.idleJobs
+
+    def getBusyNodeSets(self):
+        return self.busy
+
+
+class FakeBackend:
+    """Gives each node set its own name, so the tests can tell them apart.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.cancelled = []
+        self.ended = set()
+        self.nodeSets = set()
+
+    def submit(self, count, nodeSet):
+        self.nodeSets.add(nodeSet)
+        entries = []
+        for i in range(count):
+            entries.append({"nodeSet": "c3po_%d" % self.count, "jobId": str(self.count), "allocator": None})
+            self.count += 1
+        return entries
+
+    def getActiveJobs(self, entries):
+        return set(entry["jobId"] for entry in entries if entry["jobId"] not in self.ended)
+
+    def cancel(self, entry):
+        if entry["jobId"] in self.ended:
+            return False
+        self.cancelled.append(entry["nodeSet"])
+        self.ended.add(entry["jobId"])
+        return True
+
+
+class TestAutoscaler(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        self.query = FakeQuery()
+        self.backend = FakeBackend()
+
+    def clock(self):
+        return self.now
+
+    def makeAutoscaler(self, **kwargs):
+        return Autoscaler(self.query, self.backend, "c3po_pool", slotsPerNodeSet=10, wallClock=86400,
+                          clock=self.clock, **kwargs)
+
+    def test1(self):
+        self.assertEqual(parseWallClock("00:30:00"), 1800)
+        self.assertEqual(parseWallClock("1-02:00:00"), 93600)
+        self.assertEqual(parseWallClock("90:00"), 5400)
+        self.assertEqual(parseWallClock("15"), 900)
+        with self.assertRaises(RuntimeError):
+            parseWallClock("1:2:3:4")
+
+        query = CommandQueueQuery("echo 17", "printf 'c3po_1\\n\"c3po_2\"\\nc3po_1\\n'")
+        self.assertEqual(query.getIdleJobs(), 17)
+        self.assertEqual(query.getBusyNodeSets(), {"c3po_1", "c3po_2"})
+        query = CommandQueueQuery("printf '1\\n2\\n3\\n'", countLines=True)
+        self.assertEqual(query.getIdleJobs(), 3)
+        self.assertEqual(query.getBusyNodeSets(), set())
+        self.assertEqual(CommandQueueQuery("echo 48213", countLines=True).getIdleJobs(), 1)
+        self.assertEqual(CommandQueueQuery("true").getIdleJobs(), 0)
+        with self.assertRaises(RuntimeError):
+            CommandQueueQuery("printf '1\\n2\\n'").getIdleJobs()
+        with self.assertRaises(RuntimeError):
+            CommandQueueQuery("false").getIdleJobs()
+
+        with self.assertRaises(RuntimeError):
+            self.makeAutoscaler(minNodeSets=3, maxNodeSets=2)
+
+    def test2(self):
+        autoscaler = self.makeAutoscaler(minNodeSets=1, maxNodeSets=6, cooldown=60, maxStep=4,
+                                         idleGrace=300)
+        # the minimum pool is submitted straight away
+        action = autoscaler.step()
+        self.assertEqual(action["submitted"], ["c3po_0"])
+        self.assertEqual(self.backend.nodeSets, {"c3po_pool"})
+
+        # demand grows the pool, at most maxStep at a time, after the
+        # cooldown
+        self.query.idleJobs = 95
+        self.now += 30
+        self.assertEqual(autoscaler.step()["submitted"], [])
+        self.now += 30
+        action = autoscaler.step()
+        self.assertEqual(action["desired"], 6)
+        self.assertEqual(len(action["submitted"]), 4)
+        self.now += 60
+        self.assertEqual(len(autoscaler.step()["submitted"]), 1)
+        self.assertEqual(len(autoscaler.nodeSets), 6)
+
+        # the jobs start on three node sets; the other three are idle, but
+        # aren't cancelled until the grace period has passed
+        self.query.idleJobs = 0
+        self.query.busy = {"c3po_0", "c3po_1", "c3po_2"}
+        self.now += 60
+        action = autoscaler.step()
+        self.assertEqual(action["desired"], 3)
+        self.assertEqual(action["cancelled"], [])
+        self.now += 300
+        action = autoscaler.step()
+        self.assertEqual(action["cancelled"], ["c3po_5", "c3po_4", "c3po_3"])
+
+        # busy node sets are never cancelled, and the minimum is kept
+        self.query.busy = {"c3po_1"}
+        self.now += 300
+        action = autoscaler.step()
+        self.assertEqual(sorted(action["cancelled"]), ["c3po_0", "c3po_2"])
+        self.assertEqual([e["nodeSet"] for e in autoscaler.nodeSets], ["c3po_1"])
+
+    def test3(self):
+        autoscaler = self.makeAutoscaler(maxNodeSets=10, cooldown=0, maxStep=10, maxSubmitsPerHour=5)
+        self.query.idleJobs = 100
+        self.assertEqual(len(autoscaler.step()["submitted"]), 5)
+        self.now += 1800
+        self.assertEqual(autoscaler.step()["submitted"], [])
+        self.now += 1800
+        self.assertEqual(len(autoscaler.step()["submitted"]), 5)
+
+        # node sets past their wall clock limit leave the pool
+        autoscaler.wallClock = 3000
+        self.now += 1800
+        action = autoscaler.step()
+        self.assertEqual(action["size"], 5)
+
+        autoscaler.run(interval=0, maxSteps=2)
+
+    def test4(self):
+        # condor_q prints a ClusterId for each idle job; one idle job isn't
+        # taken for a count.  Only the user's jobs, and the glide-ins, of
+        # the pool's node set are asked about.
+        environ = dict(os.environ)
+        with tempfile.TemporaryDirectory() as binDir:
+            for name, output in (("condor_q", "48213"), ("condor_status", "c3po_pool")):
+                path = os.path.join(binDir, name)
+                with open(path, "w") as f:
+                    f.write("#!/bin/sh\necho \"$@\" > %s.args\necho %s\n" % (path, output))
+                os.chmod(path, 0o755)
+            os.environ["PATH"] = binDir + os.pathsep + os.environ["PATH"]
+            try:
+                query = CondorQueueQuery("c3po_pool")
+                self.assertEqual(query.getIdleJobs(), 1)
+                self.assertEqual(query.getBusyNodeSets(), {"c3po_pool"})
+                with open(os.path.join(binDir, "condor_q.args")) as f:
+                    self.assertEqual(f.read(),
+                                     '-constraint JobStatus == 1 && NODE_SET == "c3po_pool" -af ClusterId\n')
+                with open(os.path.join(binDir, "condor_status.args")) as f:
+                    self.assertEqual(f.read(), '-constraint IS_GLIDEIN && State == "Claimed" && '
+                                     'NODE_SET == "c3po_pool" -af NODE_SET\n')
+            finally:
+                os.environ.clear()
+                os.environ.update(environ)
+
+    def test5(self):
+        # node sets whose glide-ins end early leave the pool, so returning
+        # demand submits new ones
+        autoscaler = self.makeAutoscaler(maxNodeSets=4, cooldown=0, maxStep=4)
+        self.query.idleJobs = 40
+        self.assertEqual(len(autoscaler.step()["submitted"]), 4)
+        self.query.idleJobs = 0
+        self.query.busy = {"c3po_0", "c3po_1", "c3po_2", "c3po_3"}
+        self.now += 60
+        autoscaler.step()
+
+        # two glide-ins shut down after running out of work
+        self.backend.ended.update({"0", "1"})
+        self.query.busy = {"c3po_2", "c3po_3"}
+        self.query.idleJobs = 20
+        self.now += 60
+        action = autoscaler.step()
+        self.assertEqual(action["size"], 2)
+        self.assertEqual(action["submitted"], ["c3po_4", "c3po_5"])
+        self.assertEqual([e["nodeSet"] for e in autoscaler.nodeSets],
+                         ["c3po_2", "c3po_3", "c3po_4", "c3po_5"])
+
+
+class AutoscalerMemoryTest(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -0,0 +1,171 @@
+#
+# LSST Data Management System
+# Copyright 2008-2012 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from lsst.ctrl.execute.allocator import Allocator
+from lsst.ctrl.execute.bulkAllocator import BulkAllocator, readManifest
+from lsst.ctrl.execute.configCache import clearConfigs
+from lsst.ctrl.execute.seqFile import SeqFile
+import lsst.utils.tests
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class TestBulkAllocator(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        root = self.directory.name
+        self.environ = dict(os.environ)
+
+        # a platform package with a fake sbatch, which records how it was
+        # run, fails for the "fail_set" node set, and otherwise uses the
+        # node set name as the job id
+        self.platformDir = os.path.join(root, "ctrl_platform_lsst")
+        configDir = os.path.join(self.platformDir, "etc", "config")
+        templateDir = os.path.join(self.platformDir, "etc", "templates")
+        os.makedirs(configDir)
+        os.makedirs(templateDir)
+        testfiles = os.path.join("tests", "testfiles")
+        with open(os.path.join(testfiles, "config_condor_slurm_batch.py")) as f:
+            execConfig = f.read().replace("./tests/condor_scratch_slurm_batch", os.path.join(root, "scratch"))
+        with open(os.path.join(configDir, "execConfig.py"), "w") as f:
+            f.write(execConfig)
+        shutil.copy(os.path.join(testfiles, "config_allocation_slurm.py"),
+                    os.path.join(configDir, "slurmConfig.py"))
+        shutil.copy(os.path.join(testfiles, "generic.slurm.template"), templateDir)
+        shutil.copy(os.path.join(testfiles, "glidein_condor_config.template"), templateDir)
+        with open(os.path.join(templateDir, "allocation.sh.template"), "w") as f:
+            f.write("#!/bin/sh\necho $NODE_SET\n")
+
+        binDir = os.path.join(root, "bin")
+        os.mkdir(binDir)
+        self.sbatchLog = os.path.join(root, "sbatch.log")
+        sbatch = os.path.join(binDir, "sbatch")
+        with open(sbatch, "w") as f:
+            f.write("#!/bin/sh\necho \"$PWD $1\" >> %s\n" % self.sbatchLog)
+            f.write("grep -q fail_set \"$1\" && exit 1\n")
+            f.write("echo Submitted batch job $(sed -n 's/^#SBATCH -J //p' \"$1\")\n")
+        os.chmod(sbatch, 0o755)
+        scancel = os.path.join(binDir, "scancel")
+        with open(scancel, "w") as f:
+            f.write("#!/bin/sh\necho \"scancel $1\" >> %s\n" % self.sbatchLog)
+        os.chmod(scancel, 0o755)
+
+        os.mkdir(os.path.join(root, "home"))
+        os.mkdir(os.path.join(root, "home", ".lsst"))
+        os.environ["HOME"] = os.path.join(root, "home")
+        os.environ["XDG_CACHE_HOME"] = os.path.join(root, "cache")
+        os.environ["PATH"] = binDir + os.pathsep + os.environ["PATH"]
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.environ)
+        clearConfigs()
+        self.directory.cleanup()
+
+    def request(self, **kwargs):
+        request = {"platform": "lsst", "nodeCount": 2, "cpus": 12, "maximumWallClock": "00:30:00"}
+        request.update(kwargs)
+        return request
+
+    def test1(self):
+        requests = [self.request(), self.request(queue="normal", dynamic=True)]
+        name = os.path.join(self.directory.name, "manifest.json")
+        with open(name, "w") as f:
+            json.dump(requests, f)
+        self.assertEqual(readManifest(name), requests)
+        with open(name, "w") as f:
+            for request in requests:
+                f.write(json.dumps(request) + "\n")
+        self.assertEqual(readManifest(name), requests)
+        with open(name, "w") as f:
+            f.write("[1, 2]")
+        with self.assertRaises(RuntimeError):
+            readManifest(name)
+
+        allocator = BulkAllocator(requests)
+        opts = allocator.makeOptions(requests[1])
+        self.assertEqual(opts.nodeCount, 2)
+        self.assertEqual(opts.queue, "normal")
+        self.assertEqual(opts.dynamic, "__default__")
+        self.assertIsNone(opts.nodeSet)
+        with self.assertRaises(RuntimeError):
+            allocator.makeOptions({"platform": "lsst", "nodeCount": 2})
+        with self.assertRaises(RuntimeError):
+            allocator.makeOptions(self.request(kazoo=1))
+        with self.assertRaises(RuntimeError):
+            allocator.makeOptions(self.request(cpus="many"))
+
+    def test2(self):
+        requests = [self.request(),
+                    self.request(nodeSet="fail_set"),
+                    self.request(cpus=None),
+                    self.request(queue="normal"),
+                    self.request(dynamic="/no/such/dynamic_slots.template")]
+        allocator = BulkAllocator(requests, maxConcurrent=2,
+                                  condorInfoFileName=os.path.join("tests", "testfiles", "allocator-info1.py"),
+                                  platformDirs={"lsst": self.platformDir})
+        results = allocator.run()
+        self.assertEqual([r["index"] for r in results], list(range(5)))
+        self.assertEqual([r["status"] for r in results],
+                         ["submitted", "failed", "failed", "submitted", "failed"])
+        self.assertEqual(results[0]["exitCode"], 0)
+        self.assertEqual(results[1]["exitCode"], 1)
+        self.assertEqual(results[0]["jobId"], results[0]["nodeSet"])
+        self.assertEqual(results[3]["jobId"], results[3]["nodeSet"])
+        self.assertIsNone(results[1]["jobId"])
+        self.assertIn("cpus", results[2]["error"])
+        self.assertIsNotNone(results[4]["error"])
+
+        # the node set names were reserved together
+        self.assertEqual([results[i]["nodeSet"] for i in (0, 1, 3, 4)],
+                         ["c3po_0", "fail_set", "c3po_1", "c3po_2"])
+        self.assertEqual(SeqFile(Allocator.nodeSetSeqFileName).readSeq(), 2)
+        self.assertEqual(len(allocator.platforms), 1)
+
+        # sbatch ran in the local scratch directory, once per prepared request
+        with open(self.sbatchLog) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 3)
+        scratch = os.path.realpath(os.path.join(self.directory.name, "scratch"))
+        for line in lines:
+            self.assertEqual(os.path.realpath(line.split()[0]), scratch)
+
+        # the allocations can be cancelled through their plugin
+        self.assertEqual(results[0]["allocator"].cancel(results[0]["jobId"]), 0)
+        with open(self.sbatchLog) as f:
+            self.assertEqual(f.read().splitlines()[-1], "scancel %s" % results[0]["jobId"])
+
+
+class BulkAllocatorMemoryTest(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
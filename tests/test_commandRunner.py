@@ -0,0 +1,87 @@
+#
+# LSST Data Management System
+# Copyright 2008-2012 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+import os
+import tempfile
+import time
+import unittest
+from lsst.ctrl.execute.commandRunner import CommandPool, runCommand, splitCommand
+import lsst.utils.tests
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class TestCommandRunner(lsst.utils.tests.TestCase):
+
+    def test1(self):
+        self.assertEqual(splitCommand("echo 'a b' c"), ["echo", "a b", "c"])
+        self.assertEqual(splitCommand(["echo", "a b"]), ["echo", "a b"])
+
+        result = runCommand("sh -c 'echo out; echo err >&2; exit 3'")
+        self.assertEqual(result.exitCode, 3)
+        self.assertFalse(result.ok)
+        self.assertEqual(result.stdout, "out\n")
+        self.assertEqual(result.stderr, "err\n")
+        self.assertFalse(result.timedOut)
+
+        result = runCommand("cat", input="some input")
+        self.assertTrue(result.ok)
+        self.assertEqual(result.stdout, "some input")
+
+        with tempfile.TemporaryDirectory() as directory:
+            result = runCommand("pwd", cwd=directory)
+            self.assertEqual(os.path.realpath(result.stdout.strip()), os.path.realpath(directory))
+
+        result = runCommand("echo discarded", capture=False)
+        self.assertTrue(result.ok)
+        self.assertIsNone(result.stdout)
+
+        result = runCommand("/no/such/command")
+        self.assertEqual(result.exitCode, 127)
+
+    def test2(self):
+        start = time.time()
+        result = runCommand("sleep 10", timeout=0.2)
+        self.assertTrue(result.timedOut)
+        self.assertFalse(result.ok)
+        self.assertLess(time.time() - start, 5)
+
+    def test3(self):
+        commands = ["sh -c 'sleep 0.%d; echo %d'" % (5 - i, i) for i in range(4)]
+        start = time.time()
+        with CommandPool(2) as pool:
+            results = pool.runAll(commands)
+        # at most two commands ran at once
+        self.assertGreaterEqual(time.time() - start, 0.6)
+        self.assertEqual([r.stdout for r in results], ["0\n", "1\n", "2\n", "3\n"])
+        with self.assertRaises(RuntimeError):
+            CommandPool(0)
+
+
+class CommandRunnerMemoryTest(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
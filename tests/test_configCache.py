@@ -0,0 +1,173 @@
+#
+# LSST Data Management System
+# Copyright 2008-2012 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+import os
+import tempfile
+import unittest
+from lsst.ctrl.execute.allocationConfig import AllocationConfig
+from lsst.ctrl.execute.condorInfoConfig import CondorInfoConfig
+from lsst.ctrl.execute.configCache import ConfigSnapshotStore, clearConfigs, getPlatformDir, \
+    loadConfig, makeSnapshot
+import lsst.utils.tests
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class TestConfigCache(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        clearConfigs()
+        self.storeDir = tempfile.TemporaryDirectory()
+        self.environ = dict(os.environ)
+
+    def tearDown(self):
+        clearConfigs()
+        self.storeDir.cleanup()
+        os.environ.clear()
+        os.environ.update(self.environ)
+
+    def test1(self):
+        # a snapshot reads like the config it was taken from
+        fileName = os.path.join("tests", "testfiles", "config_allocation.py")
+        config = AllocationConfig()
+        config.load(fileName)
+        snapshot = loadConfig(AllocationConfig, fileName, store=ConfigSnapshotStore(self.storeDir.name))
+        self.assertEqual(snapshot, makeSnapshot(config))
+        self.assertEqual(snapshot.platform.queue, config.platform.queue)
+        self.assertEqual(snapshot.toDict(), config.toDict())
+
+    def test2(self):
+        # a new process reuses the snapshot stored by an earlier one
+        fileName = os.path.join("tests", "testfiles", "allocator-info1.py")
+        store = ConfigSnapshotStore(self.storeDir.name)
+        first = loadConfig(CondorInfoConfig, fileName, store=store)
+        self.assertIs(loadConfig(CondorInfoConfig, fileName, store=store), first)
+        self.assertEqual(store.misses, 1)
+        self.assertEqual(store.hits, 0)
+
+        clearConfigs()
+        second = loadConfig(CondorInfoConfig, fileName, store=store)
+        self.assertEqual(store.hits, 1)
+        self.assertEqual(second, first)
+        self.assertIn("bigboxes", second.platform)
+        self.assertIn("lsst", second.platform)
+        self.assertEqual(second.platform["lsst"].user.name, "c3po")
+        self.assertEqual(second.platform["bigboxes"].user.home, "/home/thx1138")
+
+        # a corrupt entry is reloaded
+        for name in os.listdir(self.storeDir.name):
+            with open(os.path.join(self.storeDir.name, name), "wb") as f:
+                f.write(b"garbage")
+        clearConfigs()
+        self.assertEqual(loadConfig(CondorInfoConfig, fileName, store=store), first)
+        self.assertEqual(store.misses, 2)
+
+    def test3(self):
+        # snapshots are invalidated by changes to the file, and to the
+        # environment variables it reads
+        store = ConfigSnapshotStore(self.storeDir.name)
+        with lsst.utils.tests.getTempFilePath(".py") as fileName:
+            with open(fileName, "w") as f:
+                f.write("import os\n")
+                f.write("config.platform['lsst'].user.name = os.environ.get('TEST_USER_NAME', 'nobody')\n")
+            os.environ["TEST_USER_NAME"] = "r2d2"
+            self.assertEqual(loadConfig(CondorInfoConfig, fileName, store=store).platform["lsst"].user.name,
+                             "r2d2")
+            clearConfigs()
+            os.environ["TEST_USER_NAME"] = "c3po"
+            self.assertEqual(loadConfig(CondorInfoConfig, fileName, store=store).platform["lsst"].user.name,
+                             "c3po")
+            self.assertEqual(store.misses, 2)
+
+            clearConfigs()
+            with open(fileName, "a") as f:
+                f.write("config.platform['lsst'].user.home = '/home/c3po'\n")
+            config = loadConfig(CondorInfoConfig, fileName, store=store)
+            self.assertEqual(config.platform["lsst"].user.home, "/home/c3po")
+            self.assertEqual(store.misses, 3)
+
+    def test4(self):
+        os.environ["CTRL_PLATFORM_TESTPLATFORM_DIR"] = self.storeDir.name
+        self.assertEqual(getPlatformDir("testplatform"), self.storeDir.name)
+
+    def test5(self):
+        # a long-running process, like the execute daemon, gets configs
+        # loaded under the current environment, not the one they were
+        # first loaded under
+        os.environ["XDG_CACHE_HOME"] = self.storeDir.name
+        os.environ["CTRL_EXECUTE_CONFIG_SNAPSHOTS"] = "0"
+        with lsst.utils.tests.getTempFilePath(".py") as fileName:
+            with open(fileName, "w") as f:
+                f.write("import os\n")
+                f.write("config.platform['lsst'].user.name = os.environ.get('TEST_USER_NAME', 'nobody')\n")
+            os.environ["TEST_USER_NAME"] = "r2d2"
+            first = loadConfig(CondorInfoConfig, fileName)
+            self.assertEqual(first.platform["lsst"].user.name, "r2d2")
+            os.environ["TEST_USER_NAME"] = "c3po"
+            self.assertEqual(loadConfig(CondorInfoConfig, fileName).platform["lsst"].user.name, "c3po")
+            os.environ["TEST_USER_NAME"] = "r2d2"
+            self.assertIs(loadConfig(CondorInfoConfig, fileName), first)
+        # snapshots were turned off after this module was imported
+        self.assertEqual(os.listdir(self.storeDir.name), [])
+
+    def test6(self):
+        # files which load other files aren't snapshotted, since their
+        # snapshots couldn't tell when the other files change
+        store = ConfigSnapshotStore(self.storeDir.name)
+        with lsst.utils.tests.getTempFilePath(".py") as included, \
+                lsst.utils.tests.getTempFilePath(".py") as fileName:
+            with open(included, "w") as f:
+                f.write("config.platform['lsst'].user.name = 'r2d2'\n")
+            with open(fileName, "w") as f:
+                f.write("config.load(%r)\n" % included)
+            self.assertEqual(loadConfig(CondorInfoConfig, fileName, store=store).platform["lsst"].user.name,
+                             "r2d2")
+            with open(included, "w") as f:
+                f.write("config.platform['lsst'].user.name = 'c3po'\n")
+            clearConfigs()
+            self.assertEqual(loadConfig(CondorInfoConfig, fileName, store=store).platform["lsst"].user.name,
+                             "c3po")
+            self.assertEqual(store.misses, 0)
+            self.assertEqual(os.listdir(self.storeDir.name), [])
+
+            # variables expanded from $NAME are part of the key
+            with open(fileName, "w") as f:
+                f.write("import os\n")
+                f.write("config.platform['lsst'].user.home = os.path.expandvars('$TEST_USER_HOME')\n")
+            os.environ["TEST_USER_HOME"] = "/home/r2d2"
+            self.assertEqual(loadConfig(CondorInfoConfig, fileName, store=store).platform["lsst"].user.home,
+                             "/home/r2d2")
+            clearConfigs()
+            os.environ["TEST_USER_HOME"] = "/home/c3po"
+            self.assertEqual(loadConfig(CondorInfoConfig, fileName, store=store).platform["lsst"].user.home,
+                             "/home/c3po")
+            self.assertEqual(store.misses, 2)
+
+
+class TestConfigCacheMemoryTest(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -0,0 +1,133 @@
+#
+# LSST Data Management System
+# Copyright 2008-2012 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import os
+import tempfile
+import time
+import unittest
+from lsst.ctrl.execute.configLayout import ConfigLayout
+import lsst.utils.tests
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class TestConfigLayout(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.now = time.mktime((2021, 11, 26, 12, 0, 0, 0, 0, -1))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def writeFiles(self, layout, ident, daysAgo, count):
+        when = self.now - daysAgo * 86400
+        directory = layout.makeDirectory(ident, when)
+        for i in range(count):
+            with open(os.path.join(directory, "%s_%d.config" % (ident, i)), "w"):
+                pass
+        layout.recordFiles(directory, count)
+        return directory
+
+    def test1(self):
+        layout = ConfigLayout(self.directory.name)
+        self.assertEqual(layout.makeDirectory("c3po_1"), os.path.join(self.directory.name, "configs"))
+        self.assertEqual(layout.maybePrune(maxAgeDays=1), [])
+
+    def test2(self):
+        layout = ConfigLayout(self.directory.name, sharded=True)
+        directory = self.writeFiles(layout, "c3po_1", 0, 3)
+        dayDir = os.path.join(self.directory.name, "configs", "2021", "11", "26")
+        self.assertTrue(directory.startswith(dayDir))
+        self.assertEqual(layout.getDirectory("c3po_1", self.now), directory)
+        self.writeFiles(layout, "c3po_2", 0, 2)
+        self.writeFiles(layout, "c3po_3", 3, 2)
+        self.writeFiles(layout, "c3po_4", 40, 2)
+
+        days = layout.listDays()
+        self.assertEqual([time.strftime("%m%d", d) for d, p in days], ["1017", "1123", "1126"])
+        self.assertEqual(layout.countFiles(days[-1][1]), 5)
+
+        # by age
+        removed = layout.prune(maxAgeDays=30, dryRun=True, now=self.now)
+        self.assertEqual(removed, [days[0][1]])
+        self.assertEqual(len(layout.listDays()), 3)
+        layout.prune(maxAgeDays=30, now=self.now)
+        self.assertEqual(len(layout.listDays()), 2)
+        self.assertFalse(os.path.exists(os.path.join(layout.root, "2021", "10")))
+
+        # by count, newest days are kept
+        removed = layout.prune(maxCount=5, now=self.now)
+        self.assertEqual(removed, [days[1][1]])
+        self.assertEqual(len(layout.listDays()), 1)
+
+        # a prune was just done, so this does nothing
+        self.assertEqual(layout.maybePrune(maxCount=0), [])
+
+    def test3(self):
+        layout = ConfigLayout(self.directory.name, sharded=True)
+        for i in range(5):
+            self.writeFiles(layout, "c3po_%d" % i, 10 + i, 1)
+        self.assertEqual(len(layout.prune(maxAgeDays=1, limit=2, now=self.now)), 2)
+        self.assertEqual(len(layout.listDays()), 3)
+
+        # files from the flat layout
+        old = os.path.join(layout.root, "alloc_old.slurm")
+        new = os.path.join(layout.root, "alloc_new.slurm")
+        for name in (old, new):
+            with open(name, "w"):
+                pass
+        os.utime(old, (self.now - 5 * 86400, self.now - 5 * 86400))
+        os.utime(new, (self.now, self.now))
+        self.assertEqual(layout.pruneFlat(1, now=self.now), [old])
+        self.assertTrue(os.path.exists(new))
+
+    def test4(self):
+        # pruning by count never removes the current day, or a day being
+        # written to, even when their files are over the limit
+        layout = ConfigLayout(self.directory.name, sharded=True)
+        today = self.writeFiles(layout, "c3po_1", 0, 3)
+        older = self.writeFiles(layout, "c3po_2", 1, 1)
+        oldest = self.writeFiles(layout, "c3po_3", 2, 1)
+        removed = layout.prune(maxCount=2, now=self.now, keep=[older])
+        self.assertEqual(removed, [os.path.dirname(oldest)])
+        self.assertTrue(os.path.isdir(today))
+        self.assertTrue(os.path.isdir(older))
+
+        # with no timestamp given, the real current day is kept
+        current = layout.makeDirectory("c3po_4")
+        layout.recordFiles(current, 3)
+        os.remove(os.path.join(layout.root, layout.stampName))
+        layout.maybePrune(maxCount=2)
+        self.assertTrue(os.path.isdir(current))
+        self.assertFalse(os.path.exists(today))
+
+
+class TestConfigLayoutMemoryTest(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -21,7 +21,9 @@
 #
 import unittest
 import sys
+import os
 import os.path
+import tempfile
 import time
 from lsst.ctrl.execute.configurator import Configurator
 from lsst.ctrl.execute.runOrcaParser import RunOrcaParser
@@ -34,6 +36,17 @@ def setup_module(module):
 
 class TestConfigurator(lsst.utils.tests.TestCase):
 
+    def setUp(self):
+        # keep the compiled templates out of the user's cache directory
+        self.cacheDirectory = tempfile.TemporaryDirectory()
+        self.environ = dict(os.environ)
+        os.environ["XDG_CACHE_HOME"] = self.cacheDirectory.name
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.environ)
+        self.cacheDirectory.cleanup()
+
     def getRemoteArgs(self):
         sys.argv = ["configurator_test",
                     "-p", "bigboxes",
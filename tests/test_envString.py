@@ -0,0 +1,69 @@
+#
+# LSST Data Management System
+# Copyright 2008-2012 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import unittest
+from lsst.ctrl.execute import envString
+import lsst.utils.tests
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class TestEnvString(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.env = {"HOME": "/home/c3po", "USER": "c3po", "EMPTY": "", "ODD": "a\\1"}
+
+    def test1(self):
+        self.assertEqual(envString.resolve("$HOME/.lsst/node-set.seq", self.env),
+                         "/home/c3po/.lsst/node-set.seq")
+        self.assertEqual(envString.resolve("${HOME}_x/$USER", self.env), "/home/c3po_x/c3po")
+        self.assertEqual(envString.resolve("$ODD $HOME", self.env), "a\\1 /home/c3po")
+        self.assertEqual(envString.resolve("no variables", self.env), "no variables")
+        with self.assertRaises(RuntimeError):
+            envString.resolve("$HOME/$KAZOO", self.env)
+        with self.assertRaises(RuntimeError):
+            envString.resolve("${KAZOO}", self.env)
+
+    def test2(self):
+        self.assertEqual(envString.resolve("${KAZOO:-/tmp}/x", self.env), "/tmp/x")
+        self.assertEqual(envString.resolve("${EMPTY:-none}", self.env), "none")
+        self.assertEqual(envString.resolve("${USER:-none}", self.env), "c3po")
+
+    def test3(self):
+        strVals = ["$HOME/a", "${USER}", "$HOME/a"]
+        expected = ["/home/c3po/a", "c3po", "/home/c3po/a"]
+        self.assertEqual(envString.resolveMany(strVals, self.env), expected)
+        self.assertEqual(envString.resolveMany(strVals, self.env, memoize=True), expected)
+        self.assertEqual(envString.resolveMany(strVals, self.env, memoize=True), expected)
+        env = dict(self.env, HOME="/home/r2d2")
+        self.assertEqual(envString.resolveMany(strVals[:1], env, memoize=True), ["/home/r2d2/a"])
+
+
+class TestEnvStringMemoryTest(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -0,0 +1,127 @@
+#
+# LSST Data Management System
+# Copyright 2008-2012 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from lsst.ctrl.execute.executeDaemon import runInDaemon, stopDaemon
+import lsst.utils.tests
+
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# a stand-in for qstatus.py, reporting where, and with what, it was run
+_script = """import os
+import sys
+from lsst.ctrl.execute.atomicFile import getUmask
+from lsst.ctrl.execute.executeDaemon import runMain
+
+
+def main():
+    print("%d %s %s %03o %s" % (os.getpid(), os.getcwd(), os.environ.get("TEST_VALUE"), getUmask(),
+                                " ".join(sys.argv[1:])))
+    sys.stderr.write("to stderr\\n")
+    sys.exit(int(sys.argv[1]))
+
+
+if __name__ == "__main__":
+    runMain(__file__, main)
+"""
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class TestExecuteDaemon(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.socketName = os.path.join(self.directory.name, "daemon.sock")
+        self.script = os.path.join(self.directory.name, "qstatus.py")
+        with open(self.script, "w") as f:
+            f.write(_script)
+        self.env = dict(os.environ)
+        self.env["PYTHONPATH"] = os.pathsep.join([os.path.join(_root, "python")] +
+                                                 [p for p in [self.env.get("PYTHONPATH")] if p])
+        self.env["CTRL_EXECUTE_DAEMON_SOCKET"] = self.socketName
+        self.env.pop("CTRL_EXECUTE_NO_DAEMON", None)
+        self.daemon = None
+
+    def tearDown(self):
+        if self.daemon is not None:
+            stopDaemon(self.socketName)
+            self.daemon.wait(30)
+        self.directory.cleanup()
+
+    def startDaemon(self):
+        self.daemon = subprocess.Popen([sys.executable, os.path.join(_root, "bin.src", "executeDaemon.py"),
+                                        "-s", self.socketName, "--idle-timeout", "60"], env=self.env)
+        for i in range(200):
+            if os.path.exists(self.socketName):
+                return
+            time.sleep(0.05)
+        self.fail("the daemon didn't start")
+
+    def runScript(self, *args, umask=0o022, **environ):
+        env = dict(self.env)
+        env.update(environ)
+        proc = subprocess.Popen([sys.executable, self.script] + list(args), env=env, cwd=self.directory.name,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True,
+                                preexec_fn=lambda: os.umask(umask))
+        stdout, stderr = proc.communicate(timeout=60)
+        pid, cwd, value, mask, argv = stdout.split(" ", 4)
+        self.assertEqual(os.path.realpath(cwd), os.path.realpath(self.directory.name))
+        self.assertEqual(int(mask, 8), umask)
+        self.assertEqual(stderr, "to stderr\n")
+        return proc.returncode, int(pid) == proc.pid, value, argv.strip()
+
+    def test1(self):
+        # without a daemon, the command runs in its own process
+        self.assertEqual(runInDaemon(self.script, ["qstatus.py"], self.socketName), None)
+        self.assertEqual(self.runScript("3", "a"), (3, True, "None", "3 a"))
+
+        # with one, the daemon runs it with the client's arguments,
+        # environment, working directory, umask and output
+        self.startDaemon()
+        self.assertEqual(self.runScript("0", "b", TEST_VALUE="one"), (0, False, "one", "0 b"))
+        self.assertEqual(self.runScript("4", "c", umask=0o077, TEST_VALUE="two"), (4, False, "two", "4 c"))
+        self.assertEqual(self.runScript("0", "e", umask=0o002), (0, False, "None", "0 e"))
+
+        # and it can be bypassed
+        self.assertEqual(self.runScript("0", "d", CTRL_EXECUTE_NO_DAEMON="1"), (0, True, "None", "0 d"))
+
+        self.assertTrue(stopDaemon(self.socketName))
+        self.assertEqual(self.daemon.wait(30), 0)
+        self.daemon = None
+        self.assertFalse(os.path.exists(self.socketName))
+        self.assertFalse(stopDaemon(self.socketName))
+
+
+class TestExecuteDaemonMemoryTest(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
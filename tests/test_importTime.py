@@ -0,0 +1,108 @@
+#
+# LSST Data Management System
+# Copyright 2008-2012 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+import os
+import subprocess
+import sys
+import unittest
+import lsst.utils.tests
+
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the most time, in milliseconds, each command may spend importing modules
+# before main() starts; scaled by $CTRL_EXECUTE_IMPORT_BUDGET_SCALE on slow
+# machines
+budgets = {
+    "allocateNodes.py": 150,
+    "autoscale.py": 150,
+    "dagIdInfo.py": 100,
+    "executeDaemon.py": 100,
+    "pruneConfigs.py": 100,
+    "qdelete.py": 100,
+    "qstatus.py": 100,
+    "queryRegistry.py": 100,
+    "runOrca.py": 150,
+}
+
+# modules which are only imported when they're actually used
+heavyModules = ["eups", "lsst.pex.config", "lsst.utils"]
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+def importProfile(script):
+    """Import everything a bin.src script imports, without running its
+    main(), under "python -X importtime".
+
+    Returns
+    -------
+    total : `float`
+        the time spent importing, in milliseconds
+    modules : `list` of `str`
+        the names of the modules imported
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([os.path.join(_root, "python")] +
+                                        [p for p in [env.get("PYTHONPATH")] if p])
+    fileName = os.path.join(_root, "bin.src", script)
+    code = "import runpy; runpy.run_path(%r, run_name='__importtime__')" % fileName
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    if proc.returncode != 0:
+        raise RuntimeError("importing %s failed:\n%s" % (script, proc.stderr))
+    total = 0
+    modules = []
+    started = False
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        selfTime, cumulative, name = line[len("import time:"):].split("|")
+        name = name[1:]
+        if started:
+            modules.append(name.strip())
+            if not name.startswith(" "):
+                total += int(cumulative)
+        elif name == "runpy":
+            started = True
+    return total / 1000.0, modules
+
+
+class TestImportTime(lsst.utils.tests.TestCase):
+
+    def test1(self):
+        scale = float(os.environ.get("CTRL_EXECUTE_IMPORT_BUDGET_SCALE", "1"))
+        for script, budget in sorted(budgets.items()):
+            with self.subTest(script=script):
+                total, modules = importProfile(script)
+                for name in heavyModules:
+                    self.assertNotIn(name, modules)
+                self.assertLess(total, budget * scale)
+
+
+class TestImportTimeMemoryTest(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -0,0 +1,93 @@
+#
+# LSST Data Management System
+# Copyright 2008-2012 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import os
+import stat
+import tempfile
+import unittest
+from lsst.ctrl.execute.atomicFile import getUmask, writeAtomic
+from lsst.ctrl.execute.marshalStore import MarshalStore
+import lsst.utils.tests
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class TestMarshalStore(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.savedEnviron = os.environ.copy()
+        os.environ["XDG_CACHE_HOME"] = self.directory.name
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.savedEnviron)
+        self.directory.cleanup()
+
+    def test1(self):
+        """writeAtomic keeps the replaced file's mode, and leaves no
+        temporary files behind"""
+        fileName = os.path.join(self.directory.name, "data")
+        writeAtomic(fileName, b"one\n", mode=0o600)
+        writeAtomic(fileName, b"two\n")
+        with open(fileName, 'rb') as fp:
+            self.assertEqual(fp.read(), b"two\n")
+        self.assertEqual(stat.S_IMODE(os.stat(fileName).st_mode), 0o600)
+        self.assertEqual(os.listdir(self.directory.name), ["data"])
+
+        # new files follow the umask at the time they're written
+        umask = os.umask(0o027)
+        try:
+            self.assertEqual(getUmask(), 0o027)
+            newName = os.path.join(self.directory.name, "new")
+            writeAtomic(newName, b"three\n")
+            self.assertEqual(stat.S_IMODE(os.stat(newName).st_mode), 0o640)
+        finally:
+            os.umask(umask)
+
+    def test2(self):
+        """entries round trip, and entries of other versions are ignored"""
+        store = MarshalStore()
+        store.name = "test"
+        self.assertEqual(store.directory, os.path.join(self.directory.name, "ctrl_execute", "test"))
+        path = os.path.join(store.directory, "entry")
+        self.assertIsNone(store.load(path))
+        store.save(path, {"a": [1, 2]})
+        self.assertEqual(store.load(path), {"a": [1, 2]})
+
+        store.version = 2
+        self.assertIsNone(store.load(path))
+
+        with open(path, 'wb') as fp:
+            fp.write(b"not marshal data")
+        self.assertIsNone(store.load(path))
+
+
+class TestMarshalStoreMemoryTest(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -0,0 +1,211 @@
+#
+# LSST Data Management System
+# Copyright 2008-2012 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from lsst.ctrl.execute.allocatorParser import AllocatorParser
+from lsst.ctrl.execute.condorConfig import CondorConfig
+from lsst.ctrl.execute.pbsPlugin import PbsPlugin
+from lsst.ctrl.execute.registry import Registry
+from lsst.ctrl.execute.remoteSession import RemoteSession, closeSessions
+import lsst.utils.tests
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+# stand-ins for gsissh and gsiscp, which log how they were run and then
+# run the remote command, or copy the file, locally
+fakeLogin = """#!/bin/sh
+echo "gsissh $@" >> %(log)s
+while [ $# -gt 0 ]; do
+    case "$1" in
+        -o|-O) shift 2;;
+        *) break;;
+    esac
+done
+shift
+exec sh -c "$*"
+"""
+
+fakeCopy = """#!/bin/sh
+echo "gsiscp $@" >> %(log)s
+while [ $# -gt 2 ]; do shift; done
+cp "$1" "${2#*:}"
+"""
+
+fakeQsub = """#!/bin/sh
+test -f "$1" || exit 1
+echo "qsub $PWD $1" >> %(log)s
+echo 1234.bighost 2> /dev/null
+exit 0
+"""
+
+
+class TestPbsPlugin(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        root = self.directory.name
+        self.environ = dict(os.environ)
+        self.log = os.path.join(root, "commands.log")
+        self.remoteDir = os.path.join(root, "remote")
+
+        self.platformDir = os.path.join(root, "ctrl_platform_lsst")
+        os.makedirs(os.path.join(self.platformDir, "etc", "config"))
+        templateDir = os.path.join(self.platformDir, "etc", "templates")
+        os.makedirs(templateDir)
+        testfiles = os.path.join("tests", "testfiles")
+        shutil.copy(os.path.join(testfiles, "generic.pbs.template"), templateDir)
+        shutil.copy(os.path.join(testfiles, "glidein_condor_config.template"), templateDir)
+
+        utilDir = os.path.join(root, "util")
+        os.mkdir(utilDir)
+        with open(os.path.join(self.platformDir, "etc", "config", "pbsConfig.py"), "w") as f:
+            f.write('config.platform.queue = "normal"\n')
+            f.write('config.platform.scratchDirectory = "%s"\n' % self.remoteDir)
+            f.write('config.platform.loginHostName = "bighost.lsstcorp.org"\n')
+            f.write('config.platform.utilityPath = "%s"\n' % utilDir)
+
+        self.loginCmd = RemoteSession.loginCmd
+        self.copyCmd = RemoteSession.copyCmd
+        for name, text in (("gsissh", fakeLogin), ("gsiscp", fakeCopy),
+                           (os.path.join("util", "qsub"), fakeQsub)):
+            path = os.path.join(root, name)
+            with open(path, "w") as f:
+                f.write(text % {"log": self.log})
+            os.chmod(path, 0o755)
+        RemoteSession.loginCmd = os.path.join(root, "gsissh")
+        RemoteSession.copyCmd = os.path.join(root, "gsiscp")
+
+        os.mkdir(os.path.join(root, "home"))
+        os.environ["HOME"] = os.path.join(root, "home")
+        os.environ["XDG_CACHE_HOME"] = os.path.join(root, "cache")
+
+    def tearDown(self):
+        closeSessions()
+        RemoteSession.loginCmd = self.loginCmd
+        RemoteSession.copyCmd = self.copyCmd
+        os.environ.clear()
+        os.environ.update(self.environ)
+        self.directory.cleanup()
+
+    def subSetup(self, *extraArgs):
+        sys.argv = ["pbs_test", "lsst", "-n", "4", "-c", "12", "-m", "00:30:00",
+                    "-N", "test_set"] + list(extraArgs)
+        args = AllocatorParser(sys.argv[0]).getArgs()
+        configuration = CondorConfig()
+        configuration.load(os.path.join("tests", "testfiles", "config_condor.py"))
+        configuration.platform.localScratch = os.path.join(self.directory.name, "scratch")
+        fileName = os.path.join("tests", "testfiles", "allocator-info1.py")
+        plugin = PbsPlugin("lsst", args, configuration, fileName)
+        plugin.prepare("lsst", self.platformDir)
+        return plugin
+
+    def readLog(self):
+        with open(self.log) as f:
+            return f.read().splitlines()
+
+    def test1(self):
+        plugin = self.subSetup("--bundle")
+        result = plugin.submitPrepared()
+        self.assertTrue(result.ok)
+        self.assertEqual(result.jobId, "1234.bighost")
+        self.assertEqual(result.nodeSet, "test_set")
+        self.assertEqual(result.files, [plugin.generatedPbsFile, plugin.generatedCondorConfigFile])
+        for phase in ("init", "loadAllocationConfig", "createFile", "prepare", "qsub"):
+            self.assertIn(phase, result.timings)
+        self.assertNotIn("copy", result.timings)
+
+        # after checking for a shared connection, one remote command
+        # unpacked both files and ran qsub
+        lines = self.readLog()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].endswith("-O check c3po@bighost.lsstcorp.org"))
+        self.assertTrue(lines[1].startswith("gsissh -o ControlMaster=no"))
+        self.assertIn("c3po@bighost.lsstcorp.org", lines[1])
+        pbsName = os.path.basename(plugin.generatedPbsFile)
+        self.assertEqual(lines[2], "qsub %s %s" % (self.remoteDir, pbsName))
+        for name in (plugin.generatedPbsFile, plugin.generatedCondorConfigFile):
+            with open(name) as f, open(os.path.join(self.remoteDir, os.path.basename(name))) as g:
+                self.assertEqual(f.read(), g.read())
+
+        with Registry() as registry:
+            allocations = registry.findAllocations(nodeSet="test_set")
+        self.assertEqual(len(allocations), 1)
+        self.assertEqual(allocations[0]["job_id"], "1234.bighost")
+        self.assertEqual(allocations[0]["id"], result.allocationId)
+
+    def test2(self):
+        plugin = self.subSetup()
+        os.mkdir(self.remoteDir)
+        result = plugin.submitPrepared()
+        self.assertTrue(result.ok)
+        self.assertEqual(result.jobId, "1234.bighost")
+        self.assertIn("copy", result.timings)
+        self.assertIn("qsub", result.timings)
+        lines = self.readLog()
+        self.assertEqual([line.split()[0] for line in lines],
+                         ["gsissh", "gsiscp", "gsiscp", "gsissh", "qsub"])
+        self.assertTrue(os.path.exists(os.path.join(self.remoteDir,
+                                                    os.path.basename(plugin.generatedCondorConfigFile))))
+
+        # a failing remote command is reported
+        os.remove(os.path.join(self.directory.name, "util", "qsub"))
+        plugin = self.subSetup("--bundle")
+        result = plugin.submitPrepared()
+        self.assertFalse(result.ok)
+        self.assertIsNone(result.jobId)
+        self.assertIsNone(result.allocationId)
+
+    def test3(self):
+        # options only the slurm plugin supports are rejected
+        for option in ("--submit-stdin", "--keep-submit-file"):
+            with self.assertRaises(RuntimeError):
+                self.subSetup(option)
+
+    def test4(self):
+        # the allocations still queued or running are listed by qselect on
+        # the login host
+        qselect = os.path.join(self.directory.name, "util", "qselect")
+        with open(qselect, "w") as f:
+            f.write("#!/bin/sh\necho \"qselect $@\" >> %s\necho 1234.bighost\necho 1235.bighost\n" % self.log)
+        os.chmod(qselect, 0o755)
+        plugin = self.subSetup()
+        self.assertEqual(plugin.getActiveJobs(), {"1234.bighost", "1235.bighost"})
+        self.assertEqual(self.readLog()[-1], "qselect -u c3po -s EHQRSTW")
+
+        os.remove(qselect)
+        with self.assertRaises(RuntimeError):
+            plugin.getActiveJobs()
+
+
+class PbsPluginMemoryTest(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
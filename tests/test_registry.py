@@ -0,0 +1,91 @@
+#
+# LSST Data Management System
+# Copyright 2008-2012 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import os
+import tempfile
+import unittest
+from lsst.ctrl.execute.registry import Registry
+import lsst.utils.tests
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class TestRegistry(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.fileName = os.path.join(self.directory.name, "registry.sqlite3")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test1(self):
+        with Registry(self.fileName) as registry:
+            first = registry.recordAllocation("c3po_1", "lsst", scheduler="slurm", jobId="1001",
+                                              artifacts=["alloc_a.slurm", "condor_a.config"],
+                                              submitted=1000.0)
+            registry.recordAllocation("c3po_2", "lsst", scheduler="slurm", submitted=2000.0)
+            registry.recordAllocation("c3po_3", "bigboxes", scheduler="pbs", jobId="77", submitted=3000.0)
+
+        # the records are still there once the registry is reopened
+        with Registry(self.fileName) as registry:
+            allocations = registry.findAllocations(platform="lsst")
+            self.assertEqual([a["node_set"] for a in allocations], ["c3po_2", "c3po_1"])
+            self.assertEqual(registry.findAllocations(jobId="77")[0]["node_set"], "c3po_3")
+            self.assertEqual(len(registry.findAllocations(since=1500.0, until=3000.0)), 1)
+            self.assertEqual(len(registry.findAllocations(limit=2)), 2)
+            paths = registry.getArtifacts(allocationId=first)
+            self.assertEqual([os.path.basename(p) for p in paths], ["alloc_a.slurm", "condor_a.config"])
+
+    def test2(self):
+        with Registry(self.fileName) as registry:
+            runRecordId = registry.recordRun("c3po_2021_1126_120000", "lsst", nodeSet="c3po_1",
+                                             artifacts=["/tmp/c3po_2021_1126_120000.config"])
+            registry.recordRun("c3po_2021_1126_120001", "lsst", nodeSet="")
+            runs = registry.findRuns(nodeSet="c3po_1")
+            self.assertEqual(len(runs), 1)
+            self.assertEqual(runs[0]["run_id"], "c3po_2021_1126_120000")
+            self.assertEqual(registry.getArtifacts(runRecordId=runRecordId),
+                             ["/tmp/c3po_2021_1126_120000.config"])
+            self.assertEqual(len(registry.findRuns(platform="lsst")), 2)
+
+    def test3(self):
+        # lookups use the indexes rather than scanning the tables
+        with Registry(self.fileName) as registry:
+            for query in ["SELECT * FROM allocations WHERE node_set = 'x'",
+                          "SELECT * FROM allocations WHERE platform = 'x' AND submitted >= 0",
+                          "SELECT * FROM allocations WHERE job_id = 'x'",
+                          "SELECT * FROM runs WHERE run_id = 'x'"]:
+                plan = " ".join(str(tuple(row)) for row in
+                                registry.connection.execute("EXPLAIN QUERY PLAN " + query))
+                self.assertIn("USING INDEX", plan)
+
+
+class TestRegistryMemoryTest(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -0,0 +1,131 @@
+#
+# LSST Data Management System
+# Copyright 2008-2012 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+import os
+import tempfile
+import time
+import unittest
+from lsst.ctrl.execute.remoteSession import RemoteSession, closeSessions, getSession
+import lsst.utils.tests
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class TestRemoteSession(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.controlDirectory = os.path.join(self.directory.name, "ssh")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test1(self):
+        session = RemoteSession("c3po", "bighost.lsstcorp.org", 300, self.controlDirectory)
+        options = "-o ControlMaster=no -o ControlPath=%s/%%r@%%h:%%p" % self.controlDirectory
+        self.assertEqual(session.loginCommand("/bin/qsub /tmp/alloc.pbs"),
+                         "/usr/bin/gsissh %s c3po@bighost.lsstcorp.org /bin/qsub /tmp/alloc.pbs" % options)
+        self.assertEqual(session.copyCommand("alloc.pbs", "/tmp/alloc.pbs"),
+                         "/usr/bin/gsiscp %s alloc.pbs c3po@bighost.lsstcorp.org:/tmp/alloc.pbs" % options)
+        # building command lines doesn't start the shared connection
+        self.assertIsNone(session.masterCheckTime)
+        self.assertFalse(os.path.exists(self.controlDirectory))
+
+        # without sharing, the commands are the plain ones
+        session = RemoteSession("c3po", "bighost.lsstcorp.org", 0, self.controlDirectory)
+        self.assertEqual(session.loginCommand("hostname"),
+                         "/usr/bin/gsissh c3po@bighost.lsstcorp.org hostname")
+        self.assertEqual(session.close(), 0)
+
+    def test3(self):
+        # the shared connection is started on its own, if it isn't already
+        # open, and checked again once it may have expired
+        log = os.path.join(self.directory.name, "gsissh.log")
+        fake = os.path.join(self.directory.name, "gsissh")
+        with open(fake, "w") as f:
+            f.write("#!/bin/sh\necho \"$@\" >> %s\n"
+                    "case \"$*\" in *\"-O check\"*) exit 255;; esac\n" % log)
+        os.chmod(fake, 0o755)
+        session = RemoteSession("c3po", "bighost.lsstcorp.org", 300, self.controlDirectory)
+        session.loginCmd = fake
+        session.loginCommand("hostname")
+        session.run("hostname")
+        session.run("hostname")
+        self.assertEqual(os.stat(self.controlDirectory).st_mode & 0o777, 0o700)
+        controlPath = "-o ControlPath=%s" % session.getControlPath()
+        destination = "c3po@bighost.lsstcorp.org"
+        check = "%s -O check %s" % (controlPath, destination)
+        start = "-o ControlMaster=yes %s -o ControlPersist=300 -f -N %s" % (controlPath, destination)
+        command = "-o ControlMaster=no %s %s hostname" % (controlPath, destination)
+        with open(log) as f:
+            self.assertEqual(f.read().splitlines(), [check, start, command, command])
+
+        session.masterCheckTime -= 300
+        session.run("hostname")
+        with open(log) as f:
+            self.assertEqual(f.read().splitlines()[4:], [check, start, command])
+
+    def test4(self):
+        # starting the shared connection gives up after the timeout
+        fake = os.path.join(self.directory.name, "gsissh")
+        with open(fake, "w") as f:
+            f.write("#!/bin/sh\nexec sleep 30\n")
+        os.chmod(fake, 0o755)
+        session = RemoteSession("c3po", "bighost.lsstcorp.org", 300, self.controlDirectory)
+        session.loginCmd = fake
+        start = time.time()
+        session.startMaster(timeout=0.5)
+        self.assertLess(time.time() - start, 10)
+
+    def test2(self):
+        session = getSession("c3po", "bighost.lsstcorp.org")
+        self.assertIs(getSession("c3po", "bighost.lsstcorp.org"), session)
+        self.assertIsNot(getSession("r2d2", "bighost.lsstcorp.org", persist=0), session)
+        self.assertIsNot(getSession("c3po", "bighost.lsstcorp.org", persist=0), session)
+        closeSessions()
+
+        # close asks the master connection to exit
+        log = os.path.join(self.directory.name, "gsissh.log")
+        fake = os.path.join(self.directory.name, "gsissh")
+        with open(fake, "w") as f:
+            f.write("#!/bin/sh\necho \"$@\" >> %s\n" % log)
+        os.chmod(fake, 0o755)
+        session = getSession("c3po", "bighost.lsstcorp.org", persist=60)
+        session.loginCmd = fake
+        closeSessions()
+        with open(log) as f:
+            self.assertEqual(f.read(), "-o ControlPath=%s -O exit c3po@bighost.lsstcorp.org\n" %
+                             session.getControlPath())
+        session = getSession("c3po", "bighost.lsstcorp.org", persist=60)
+        self.assertEqual(session.persist, 60)
+        session.loginCmd = fake
+        closeSessions()
+
+
+class RemoteSessionMemoryTest(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
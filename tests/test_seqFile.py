@@ -20,8 +20,11 @@
 # see <http://www.lsstcorp.org/LegalNotices/>.
 #
 
+import os
+import time
 import unittest
-from lsst.ctrl.execute.seqFile import SeqFile
+from concurrent.futures import ProcessPoolExecutor
+from lsst.ctrl.execute.seqFile import SeqAllocator, SeqFile
 import lsst.utils.tests
 
 
@@ -29,6 +32,16 @@ def setup_module(module):
     lsst.utils.tests.init()
 
 
+def reserve(filename, count):
+    sf = SeqFile(filename)
+    return [sf.reserve(count) for i in range(10)]
+
+
+def increment(filename, count):
+    sf = SeqFile(filename)
+    return [sf.nextSeq() for i in range(count)]
+
+
 class TestSeqFile(lsst.utils.tests.TestCase):
 
     def test1(self):
@@ -38,6 +51,48 @@ class TestSeqFile(lsst.utils.tests.TestCase):
             self.assertTrue(a == 0)
             a = sf.nextSeq()
             self.assertTrue(a == 1)
+            os.remove(sf.lockFileName)
+
+    def test2(self):
+        # many processes incrementing the same file never get the same number
+        processes = 8
+        increments = 200
+        with lsst.utils.tests.getTempFilePath(".seq") as filename:
+            start = time.time()
+            with ProcessPoolExecutor(processes) as pool:
+                futures = [pool.submit(increment, filename, increments) for i in range(processes)]
+                seqs = [seq for future in futures for seq in future.result()]
+            elapsed = time.time() - start
+            os.remove(filename + ".lock")
+        self.assertEqual(sorted(seqs), list(range(processes * increments)))
+        print("%d processes: %.0f increments/second" % (processes, len(seqs) / elapsed))
+
+    def test3(self):
+        with lsst.utils.tests.getTempFilePath(".seq") as filename:
+            sf = SeqFile(filename)
+            self.assertEqual(sf.reserve(500), 0)
+            self.assertEqual(sf.nextSeq(), 500)
+            self.assertEqual(sf.reserve(10), 501)
+            self.assertEqual(sf.readSeq(), 510)
+            with self.assertRaises(RuntimeError):
+                sf.reserve(0)
+
+            alloc = SeqAllocator(sf, blockSize=4)
+            self.assertEqual([alloc.nextSeq() for i in range(5)], [511, 512, 513, 514, 515])
+            self.assertEqual(sf.readSeq(), 518)
+            self.assertEqual(alloc.take(2), [516, 517])
+            self.assertEqual(alloc.take(6), [519, 520, 521, 522, 523, 524])
+            self.assertEqual(sf.readSeq(), 524)
+            os.remove(sf.lockFileName)
+
+    def test4(self):
+        # blocks reserved by concurrent processes never overlap
+        with lsst.utils.tests.getTempFilePath(".seq") as filename:
+            with ProcessPoolExecutor(4) as pool:
+                futures = [pool.submit(reserve, filename, 25) for i in range(4)]
+                firsts = [first for future in futures for first in future.result()]
+            os.remove(filename + ".lock")
+        self.assertEqual(sorted(firsts), list(range(0, 1000, 25)))
 
 
 class TestSeqFileMemoryTest(lsst.utils.tests.MemoryTestCase):
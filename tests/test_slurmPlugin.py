@@ -0,0 +1,191 @@
+#
+# LSST Data Management System
+# Copyright 2008-2012 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+import io
+import os
+import sys
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+from lsst.ctrl.execute.allocatorParser import AllocatorParser
+from lsst.ctrl.execute.condorConfig import CondorConfig
+from lsst.ctrl.execute.slurmPlugin import SlurmPlugin
+import lsst.utils.tests
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+template = """#!/bin/bash -l
+#SBATCH -N $NODE_COUNT
+#SBATCH -J $NODE_SET
+#SBATCH -o $OUTPUT_LOG
+$HETEROGENEOUS_BLOCK
+# $ARRAY_SIZE $ARRAY_SPEC $HET_SIZE $HET_GROUPS
+srun --het-group=$HET_GROUPS ./glidein $ARRAY_TASK_ID
+"""
+
+
+class TestSlurmPlugin(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        # keep the compiled templates out of the user's cache directory
+        self.environ = dict(os.environ)
+        os.environ["XDG_CACHE_HOME"] = os.path.join(self.directory.name, "cache")
+        self.templateName = os.path.join(self.directory.name, "array.slurm.template")
+        with open(self.templateName, "w") as f:
+            f.write(template)
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.environ)
+        self.directory.cleanup()
+
+    def subSetup(self, *extraArgs, shardConfigs=False):
+        sys.argv = ["slurm_test", "lsst", "-n", "4", "-c", "12", "-m", "00:30:00",
+                    "-N", "test_set"] + list(extraArgs)
+        args = AllocatorParser(sys.argv[0]).getArgs()
+        configuration = CondorConfig()
+        configuration.load(os.path.join("tests", "testfiles", "config_condor_slurm.py"))
+        configuration.platform.localScratch = os.path.join(self.directory.name, "scratch")
+        configuration.platform.shardConfigs = shardConfigs
+        fileName = os.path.join("tests", "testfiles", "allocator-info1.py")
+        plugin = SlurmPlugin("lsst", args, configuration, fileName)
+        plugin.loadSlurm(os.path.join("tests", "testfiles", "config_allocation_slurm.py"), None)
+        return plugin
+
+    def render(self, plugin):
+        name = plugin.createSubmitFile(self.templateName)
+        with open(name) as f:
+            return f.read().splitlines()
+
+    def test1(self):
+        plugin = self.subSetup()
+        self.assertEqual(plugin.getSubmitCommand("job.slurm"), "sbatch job.slurm")
+        self.assertEqual(plugin.getSubmitCommand(), "sbatch")
+        lines = self.render(plugin)
+        self.assertEqual(lines[3:7], ["#SBATCH -o test_set.out", "#", "# 1  1 0-0",
+                                      "srun --het-group=0-0 ./glidein ${SLURM_ARRAY_TASK_ID:-0}"])
+
+    def test2(self):
+        plugin = self.subSetup("--array", "25", "--array-throttle", "5")
+        self.assertEqual(plugin.getSubmitCommand("job.slurm"), "sbatch --array=0-24%5 job.slurm")
+        lines = self.render(plugin)
+        self.assertEqual(lines[3], "#SBATCH -o test_set_%a.out")
+        self.assertEqual(lines[5], "# 25 0-24%5 1 0-0")
+        self.assertEqual(plugin.getTotalNodes(), 100)
+        self.assertEqual(plugin.getJobShape(), "as a job array of 25 tasks of 4 nodes each")
+
+    def test3(self):
+        plugin = self.subSetup("--het-component", "2:32", "--het-component", "8:4")
+        self.assertEqual(plugin.getSubmitCommand("job.slurm"), "sbatch job.slurm")
+        lines = self.render(plugin)
+        self.assertEqual(lines[4:12], ["#SBATCH hetjob", "#SBATCH -N 2", "#SBATCH -n 2", "#SBATCH -c 32",
+                                       "#SBATCH hetjob", "#SBATCH -N 8", "#SBATCH -n 8", "#SBATCH -c 4"])
+        self.assertEqual(lines[12], "# 1  3 0-2")
+
+        # without $HETEROGENEOUS_BLOCK in the template, the components are
+        # given to sbatch on the command line
+        plainName = os.path.join(self.directory.name, "plain.slurm.template")
+        with open(plainName, "w") as f:
+            f.write("#!/bin/bash -l\n#SBATCH -N $NODE_COUNT\n./glidein\n")
+        plugin.checkJobShape(plainName)
+        self.assertEqual(plugin.getSubmitCommand("job.slurm"),
+                         "sbatch -N 4 -n 4 -c 12 : -N 2 -n 2 -c 32 : -N 8 -n 8 -c 4 job.slurm")
+        plugin.checkJobShape(self.templateName)
+        self.assertEqual(plugin.getSubmitCommand("job.slurm"), "sbatch job.slurm")
+
+        self.assertEqual(plugin.getTotalNodes(), 14)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            plugin.printNodeSetInfo()
+        lines = output.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith("14 nodes will be allocated"))
+        self.assertEqual(lines[1], "as a heterogeneous job of 4 nodes with 12 cpus, 2 nodes with 32 cpus, "
+                         "8 nodes with 4 cpus")
+
+        with self.assertRaises(RuntimeError):
+            self.subSetup("--het-component", "2x32")
+        with self.assertRaises(RuntimeError):
+            self.subSetup("--het-component", "2:32", "--array", "4")
+        with self.assertRaises(RuntimeError):
+            self.subSetup("--array", "0")
+
+    def test4(self):
+        # files are counted in the day's manifest when they're written,
+        # whether or not the allocation is submitted
+        plugin = self.subSetup(shardConfigs=True)
+        self.render(plugin)
+        plugin.createCondorConfigFile(self.templateName)
+        manifest = os.path.join(os.path.dirname(plugin.configDir), plugin.configLayout.manifestName)
+        with open(manifest) as f:
+            self.assertEqual(f.read(), "1\n1\n")
+        self.assertEqual(len(plugin.generatedFiles), 2)
+
+    def test5(self):
+        # old files are pruned once the new ones are written, without
+        # removing the directory they were written to
+        plugin = self.subSetup(shardConfigs=True)
+        plugin.configRetentionCount = 1
+        oldDir = plugin.configLayout.makeDirectory("old", time.time() - 3 * 86400)
+        plugin.configLayout.recordFiles(oldDir, 1)
+        self.render(plugin)
+        plugin.createCondorConfigFile(self.templateName)
+        self.assertEqual(plugin.pruneConfigs(), [os.path.dirname(oldDir)])
+        self.assertTrue(os.path.isdir(plugin.configDir))
+        self.assertEqual(len(os.listdir(plugin.configDir)), 2)
+
+    def test6(self):
+        # the allocations still queued or running are listed by squeue,
+        # under the job id sbatch printed
+        binDir = os.path.join(self.directory.name, "bin")
+        os.mkdir(binDir)
+        squeue = os.path.join(binDir, "squeue")
+        with open(squeue, "w") as f:
+            f.write("#!/bin/sh\necho \"$@\" > %s/squeue.args\n"
+                    "printf '101\\n102_3\\n102_[4-9%%%%2]\\n103+0\\n103+1\\n'\n" % self.directory.name)
+        os.chmod(squeue, 0o755)
+        environ = dict(os.environ)
+        os.environ["PATH"] = binDir + os.pathsep + os.environ["PATH"]
+        try:
+            plugin = self.subSetup()
+            self.assertEqual(plugin.getActiveJobs(), {"101", "102", "103"})
+            with open(os.path.join(self.directory.name, "squeue.args")) as f:
+                self.assertEqual(f.read(), "-h -o %i -u c3po\n")
+            with open(squeue, "w") as f:
+                f.write("#!/bin/sh\nexit 1\n")
+            with self.assertRaises(RuntimeError):
+                plugin.getActiveJobs()
+        finally:
+            os.environ.clear()
+            os.environ.update(environ)
+
+
+class SlurmPluginMemoryTest(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -0,0 +1,128 @@
+#
+# LSST Data Management System
+# Copyright 2008-2012 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import os
+import tempfile
+import unittest
+from lsst.ctrl.execute.templateCache import TemplateCache
+from lsst.ctrl.execute.templateStore import CompiledTemplateStore
+from lsst.ctrl.execute.templateWriter import TemplateWriter
+import lsst.utils.tests
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class TestTemplateCache(lsst.utils.tests.TestCase):
+
+    def writeFile(self, name, text):
+        with open(name, "w") as fp:
+            fp.write(text)
+
+    def test1(self):
+        infile = os.path.join("tests", "testfiles", "templateWriter.template")
+        cache = TemplateCache()
+        first = cache.get(infile)
+        second = cache.get(infile)
+        self.assertIs(first, second)
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(cache.hits, 1)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.hits, 0)
+
+    def test2(self):
+        # a changed file is reread
+        cache = TemplateCache()
+        with lsst.utils.tests.getTempFilePath(".template") as filename:
+            self.writeFile(filename, "$TEST1\n")
+            self.assertEqual(cache.get(filename).text, "$TEST1\n")
+            self.writeFile(filename, "$TEST1 $TEST2\n")
+            self.assertEqual(cache.get(filename).text, "$TEST1 $TEST2\n")
+            self.assertEqual(cache.misses, 2)
+
+    def test3(self):
+        # least recently used templates are evicted
+        cache = TemplateCache(maxSize=2)
+        with lsst.utils.tests.getTempFilePath(".a") as fileA, \
+                lsst.utils.tests.getTempFilePath(".b") as fileB, \
+                lsst.utils.tests.getTempFilePath(".c") as fileC:
+            for name in (fileA, fileB, fileC):
+                self.writeFile(name, name)
+            cache.get(fileA)
+            cache.get(fileB)
+            cache.get(fileA)
+            cache.get(fileC)
+            self.assertEqual(len(cache), 2)
+            cache.get(fileA)
+            self.assertEqual(cache.hits, 2)
+            cache.get(fileB)
+            self.assertEqual(cache.misses, 4)
+
+    def test4(self):
+        cache = TemplateCache()
+        pairs = {"TEST1": "Hello", "TEST2": "Goodbye"}
+        infile = os.path.join("tests", "testfiles", "templateWriter.template")
+        with lsst.utils.tests.getTempFilePath("_template.txt") as outfile:
+            temp = TemplateWriter(cache=cache)
+            temp.rewrite(infile, outfile, pairs)
+            temp.rewrite(infile, outfile, pairs)
+            with open(outfile) as fp:
+                self.assertEqual(fp.readline(), "Hello\n")
+        self.assertEqual(cache.hits, 1)
+
+    def test5(self):
+        # compiled templates are stored on disk and reused by a new cache
+        infile = os.path.join("tests", "testfiles", "templateWriter.template")
+        pairs = {"TEST1": "Hello", "TEST2": "Goodbye"}
+        with tempfile.TemporaryDirectory() as storeDir:
+            store = CompiledTemplateStore(storeDir)
+            # small templates are just parsed
+            TemplateCache(store=store).get(infile).compiled
+            self.assertEqual(store.misses, 0)
+            self.assertEqual(os.listdir(storeDir), [])
+            first = TemplateCache(store=store, storeMinSize=0).get(infile)
+            self.assertEqual(store.misses, 1)
+            self.assertEqual(len(os.listdir(storeDir)), 1)
+
+            store = CompiledTemplateStore(storeDir)
+            second = TemplateCache(store=store, storeMinSize=0).get(infile)
+            self.assertEqual(store.hits, 1)
+            self.assertEqual(second.compiled.parts, first.compiled.parts)
+            self.assertEqual(second.compiled.render(pairs), "Hello\nGoodbye\nGoodbye Hello\nHello Goodbye\n")
+
+            # a corrupt entry is recompiled
+            with open(store.getPath(second.text), "wb") as f:
+                f.write(b"garbage")
+            third = TemplateCache(store=store, storeMinSize=0).get(infile)
+            self.assertEqual(store.misses, 1)
+            self.assertEqual(third.compiled.parts, first.compiled.parts)
+
+
+class TestTemplateCacheMemoryTest(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
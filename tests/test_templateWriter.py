@@ -24,7 +24,9 @@ import unittest
 import os
 import os.path
 import filecmp
-from lsst.ctrl.execute.templateWriter import TemplateWriter
+import io
+from lsst.ctrl.execute.templateCache import TemplateCache
+from lsst.ctrl.execute.templateWriter import LazyValue, TemplateWriter, findPlaceholders, usedKeys
 import lsst.utils.tests
 
 
@@ -45,6 +47,105 @@ class TestTemplateWriter(lsst.utils.tests.TestCase):
             temp.rewrite(infile, outfile, pairs)
             self.assertTrue(filecmp.cmp(compare, outfile))
 
+    def test2(self):
+        # a key which is a prefix of another key must not clobber it,
+        # regardless of the order of the keys
+        temp = TemplateWriter()
+        text = "#SBATCH -J $NODE_SET $NODE\n"
+        pairs = {"NODE": "n1", "NODE_SET": "set1"}
+        self.assertEqual(temp.substitute(text, pairs), "#SBATCH -J set1 n1\n")
+        pairs = {"NODE_SET": "set1", "NODE": "n1"}
+        self.assertEqual(temp.substitute(text, pairs), "#SBATCH -J set1 n1\n")
+
+    def test3(self):
+        # values refering to keys that follow them are expanded too
+        temp = TemplateWriter()
+        pairs = {"TEST1": "$TEST2 there", "TEST2": "Hello"}
+        self.assertEqual(temp.substitute("$TEST1 $(LOG) $TEST3", pairs), "Hello there $(LOG) $TEST3")
+
+    def test4(self):
+        temp = TemplateWriter()
+        infile = os.path.join("tests", "testfiles", "templateWriter.template")
+        pairsList = [{"TEST1": "a%d" % i, "TEST2": "b%d" % i} for i in range(3)]
+        rendered = list(temp.renderMany(infile, pairsList))
+        self.assertEqual(len(rendered), 3)
+        self.assertEqual(rendered[2], "a2\nb2\nb2 a2\na2 b2\n")
+
+        compare = os.path.join("tests", "testfiles", "templateWriter.txt")
+        pairs = {"TEST1": "Hello", "TEST2": "Goodbye"}
+        with lsst.utils.tests.getTempFilePath("_1.txt") as out1, \
+                lsst.utils.tests.getTempFilePath("_2.txt") as out2:
+            written = temp.rewriteMany(infile, [(out1, pairs), (out2, pairs)])
+            self.assertEqual(written, [out1, out2])
+            self.assertTrue(filecmp.cmp(compare, out1))
+            self.assertTrue(filecmp.cmp(compare, out2))
+
+    def test5(self):
+        temp = TemplateWriter()
+        infile = os.path.join("tests", "testfiles", "templateWriter.template")
+        compare = os.path.join("tests", "testfiles", "templateWriter.txt")
+        pairs = {"TEST1": "Hello", "TEST2": "Goodbye"}
+        fp = io.StringIO()
+        text = temp.render(infile, pairs, fp)
+        with open(compare) as f:
+            expected = f.read()
+        self.assertEqual(text, expected)
+        self.assertEqual(fp.getvalue(), expected)
+
+    def test6(self):
+        infile = os.path.join("tests", "testfiles", "templateWriter.template")
+        compare = os.path.join("tests", "testfiles", "templateWriter.txt")
+        pairs = {"TEST1": "Hello", "TEST2": "Goodbye"}
+        with lsst.utils.tests.getTempFilePath("_template.txt") as outfile:
+            temp = TemplateWriter(atomic=True, skipUnchanged=True)
+            temp.rewrite(infile, outfile, pairs)
+            self.assertTrue(filecmp.cmp(compare, outfile))
+            mtime = os.stat(outfile).st_mtime_ns
+            temp.rewrite(infile, outfile, pairs)
+            self.assertEqual(os.stat(outfile).st_mtime_ns, mtime)
+            self.assertEqual(temp.writes, 1)
+            self.assertEqual(temp.writesSkipped, 1)
+
+            pairs["TEST1"] = "Howdy"
+            self.assertTrue(temp.write(outfile, temp.render(infile, pairs)))
+            self.assertEqual(temp.writes, 2)
+            with open(outfile) as f:
+                self.assertEqual(f.readline(), "Howdy\n")
+            # no temporary files are left behind
+            dirName, baseName = os.path.split(os.path.abspath(outfile))
+            leftovers = [n for n in os.listdir(dirName) if n.startswith(".%s." % baseName)]
+            self.assertEqual(leftovers, [])
+
+    def test7(self):
+        text = "NODE_SET = \"$NODE_SET\" $(LOG) ${id_option} $TEST1x\n"
+        placeholders = findPlaceholders(text)
+        self.assertEqual(placeholders, frozenset(["NODE_SET", "TEST1x"]))
+        pairs = {"TEST1": "a", "NODE": "b", "NODE_SET": "c", "UNUSED": "d"}
+        self.assertEqual(usedKeys(placeholders, pairs), ("TEST1", "NODE", "NODE_SET"))
+
+        infile = os.path.join("tests", "testfiles", "templateWriter.template")
+        temp = TemplateWriter(cache=TemplateCache())
+        self.assertEqual(temp.placeholders(infile), frozenset(["TEST1", "TEST2"]))
+
+    def test8(self):
+        calls = []
+
+        def provider():
+            calls.append(1)
+            return "Goodbye"
+
+        infile = os.path.join("tests", "testfiles", "templateWriter.template")
+        compare = os.path.join("tests", "testfiles", "templateWriter.txt")
+        with open(compare) as f:
+            expected = f.read()
+        temp = TemplateWriter(cache=TemplateCache())
+        pairs = {"TEST1": "Hello", "TEST2": LazyValue(provider), "TEST3": LazyValue(provider)}
+        self.assertEqual(temp.render(infile, pairs), expected)
+        # TEST2 is computed once, TEST3 is never used
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(temp.substitute("$TEST1", pairs), "Hello")
+        self.assertEqual(len(calls), 1)
+
 
 class TestTemplateWriterTestCase(lsst.utils.tests.MemoryTestCase):
     pass
@@ -0,0 +1,90 @@
+#
+# LSST Data Management System
+# Copyright 2008-2012 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+import json
+import os
+import pstats
+import tempfile
+import unittest
+from lsst.ctrl.execute.timing import Timer, profiled, timer
+import lsst.utils.tests
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class TestTiming(lsst.utils.tests.TestCase):
+
+    def test1(self):
+        t = Timer()
+        with t.span("ignored"):
+            pass
+        self.assertEqual(t.spans, [])
+
+        t.enabled = True
+        with t.span("outer", "detail"):
+            with t.span("inner"):
+                pass
+            with t.span("inner"):
+                pass
+        spans = t.toDict()["spans"]
+        self.assertEqual([s["name"] for s in spans], ["outer", "inner", "inner"])
+        self.assertEqual(spans[0]["detail"], "detail")
+        self.assertIsNone(spans[0]["parent"])
+        self.assertEqual(spans[1]["parent"], "outer")
+        self.assertEqual(spans[1]["depth"], 1)
+        totals = t.totals()
+        self.assertEqual(sorted(totals), ["inner", "outer"])
+        self.assertGreaterEqual(totals["outer"], totals["inner"])
+
+        t.reset()
+        self.assertEqual(t.totals(), {})
+
+    def test2(self):
+        with tempfile.TemporaryDirectory() as directory:
+            jsonName = os.path.join(directory, "profile.json")
+            statsName = os.path.join(directory, "profile.pstats")
+            with self.assertRaises(SystemExit):
+                with profiled(jsonName, statsName):
+                    with timer.span("phase"):
+                        raise SystemExit(1)
+            self.assertFalse(timer.enabled)
+            with open(jsonName) as f:
+                profile = json.load(f)
+            self.assertEqual([s["name"] for s in profile["spans"]], ["phase"])
+            self.assertIn("phase", profile["totals"])
+            pstats.Stats(statsName)
+
+            # nothing is recorded without a file to write to
+            with profiled():
+                with timer.span("phase"):
+                    pass
+            self.assertFalse(timer.enabled)
+
+
+class TimingMemoryTest(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -0,0 +1,72 @@
+#
+# LSST Data Management System
+# Copyright 2008-2012 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import re
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from lsst.ctrl.execute.uniqueId import createUniqueId
+import lsst.utils.tests
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+def createIds(count):
+    return [createUniqueId("c3po") for i in range(count)]
+
+
+class TestUniqueId(lsst.utils.tests.TestCase):
+
+    def test1(self):
+        ident = createUniqueId("c3po")
+        self.assertIsNotNone(re.match(r"^c3po_\d{4}_\d{4}_\d{6}_\d{6}_[A-Za-z0-9-]+_\d+_\d+$", ident))
+        self.assertTrue(createUniqueId().startswith(createUniqueId().split("_")[0]))
+
+    def test2(self):
+        # identifiers created back to back are distinct and in order
+        ids = createIds(1000)
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual([i.split("_")[:5] for i in ids], sorted(i.split("_")[:5] for i in ids))
+
+    def test3(self):
+        # no collisions between processes creating identifiers concurrently
+        processes = 4
+        count = 25000
+        start = time.time()
+        with ProcessPoolExecutor(processes) as pool:
+            futures = [pool.submit(createIds, count) for i in range(processes)]
+            ids = [ident for future in futures for ident in future.result()]
+        elapsed = time.time() - start
+        self.assertEqual(len(ids), processes * count)
+        self.assertEqual(len(set(ids)), len(ids))
+        print("%d processes: %.0f identifiers/second" % (processes, len(ids) / elapsed))
+
+
+class TestUniqueIdMemoryTest(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -0,0 +1,9 @@
+# flake8: noqa
+config.platform.defaultRoot = "/usr"
+config.platform.localScratch = "./tests/condor_scratch_slurm_batch"
+config.platform.dataDirectory = "/tmp/data_slurm_batch"
+config.platform.fileSystemDomain = "lsstcorp.org"
+config.platform.eupsPath = "/var/tmp"
+config.platform.scheduler = "slurm"
+config.platform.setup_using = "getenv"
+config.platform.manager = "dagman"